@@ -0,0 +1,8 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+@Author: XieLong
+@Date: 2026/10/19
+@File: __init__.py
+@Description: 框架自身开销基准测试（python -m benchmarks.run_benchmarks）
+"""
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+@Author: XieLong
+@Date: 2026/10/19
+@File: bench_cases.py
+@Description: 基准测试项：按数千条用例/步骤规模构造合成输入，测量YAML读取、关键字分发、日志、配置初始化、结果分类与报告格式化的开销
+"""
+import os
+import shutil
+import tempfile
+
+import yaml
+
+from config.conf import cm, ConfigManager
+
+# 合成输入规模
+CASE_STEPS = 2000     # 单条合成用例的步骤数
+REPORT_TESTS = 5000   # 合成测试报告的用例数
+FAILED_RATIO = 0.2    # 合成报告中失败用例占比
+SLOW_EVERY = 7        # 合成报告中每N条用例有1条超出性能预算
+
+# 已注册的基准测试：[(名称, 准备函数, 每轮调用次数)]
+BENCHMARKS = []
+
+
+def benchmark(name: str, number: int = 1):
+    """
+    注册基准测试：被装饰的函数负责准备输入（不计时），返回待计时的无参函数
+    :param number: 每轮调用次数（结果按单次调用耗时统计）
+    """
+    def decorator(setup):
+        BENCHMARKS.append((name, setup, number))
+        return setup
+    return decorator
+
+
+def synthetic_steps(count: int):
+    """合成步骤：覆盖点击、输入、单项/多项断言、滚动"""
+    steps = [{"action": "setup", "url": "${TEST_URL}", "desc": "打开收银台"}]
+    for i in range(count - 1):
+        kind = i % 5
+        if kind == 0:
+            steps.append({"action": "click", "locator": ["xpath", f'//button[contains(text(), "商品{i}")]'],
+                          "desc": f"点击商品{i}"})
+        elif kind == 1:
+            steps.append({"action": "input_text", "locator": f'x://input[@placeholder="备注{i}"]',
+                          "text": f"备注${{CASHIER_USER}}{i}", "desc": f"输入备注{i}"})
+        elif kind == 2:
+            steps.append({"action": "assert_text", "locator": ["xpath", f'//div[contains(text(), "合计{i}")]'],
+                          "expected": f"合计{i}", "desc": f"验证合计{i}"})
+        elif kind == 3:
+            steps.append({"action": "assert_texts", "desc": f"验证小票{i}", "expected": {
+                f'x://span[text()="单价{i}"]': f"单价{i}", f'x://span[text()="数量{i}"]': f"数量{i}"}})
+        else:
+            steps.append({"action": "scroll_to_bottom", "desc": "滚动到底部"})
+    return steps
+
+
+def synthetic_report(count: int):
+    """合成pytest结果（与json/report.json结构一致），含重跑产生的重复记录及超出性能预算的记录"""
+    tests = []
+    failed_every = int(1 / FAILED_RATIO)
+    for i in range(count):
+        name = f"testcase/test_cashier_main.py::TestCashierMain::test_main_case[case_{i}.yaml]"
+        failed = i % failed_every == 0
+        slow = not failed and i % SLOW_EVERY == 0
+        props = [["case_id", f"main/case_{i}.yaml"]] + ([["slow", f"步骤{i}：1800ms > 预算1000ms"]] if slow else [])
+        tests.append({"name": name, "outcome": "failed" if failed else "passed", "when": "call", "duration": 1.0,
+                      "user_properties": props,
+                      "call": {"stdout": f"AssertionError: 断言失败{i}\n" * 5 if failed else ""}, "reason": ""})
+        if failed and i % 2 == 0:
+            tests.append(dict(tests[-1], outcome="passed", call={"stdout": ""}))  # 重跑后通过
+    return {"report": {"summary": {}, "tests": tests}}
+
+
+class BenchWorkspace:
+    """基准测试的临时目录：合成YAML与解析缓存写在这里，不影响项目数据"""
+
+    def __init__(self):
+        self.path = tempfile.mkdtemp(prefix="cashier_bench_")
+        self.yaml_path = os.path.join(self.path, "bench_case.yaml")
+        with open(self.yaml_path, "w", encoding="utf-8") as f:
+            yaml.dump({"tags": ["bench"], "bench_case": synthetic_steps(CASE_STEPS)}, f, allow_unicode=True,
+                      sort_keys=False)
+        self.cache_path = os.path.join(self.path, "yaml_cache")
+        os.makedirs(self.cache_path)
+        # 日志改写到临时目录（基准会写入数千行，不能进入项目日志）
+        from loguru import logger as loguru_logger
+        from util.logger import custom_formatter
+        self.log_file = os.path.join(self.path, "bench.log")
+        loguru_logger.remove()
+        loguru_logger.add(self.log_file, format=custom_formatter, level="DEBUG", encoding="utf-8")
+
+    def cleanup(self):
+        from loguru import logger as loguru_logger
+        loguru_logger.remove()
+        shutil.rmtree(self.path, ignore_errors=True)
+
+
+workspace = None
+
+
+def get_workspace():
+    global workspace
+    if workspace is None:
+        workspace = BenchWorkspace()
+    cm.YAML_CACHE_PATH = workspace.cache_path  # 解析缓存写入临时目录
+    return workspace
+
+
+# ---------------------------- 基准测试项 ----------------------------
+@benchmark("config_manager_init", number=2000)
+def bench_config_manager_init():
+    """在独立实例上执行初始化（绕过单例，不重置全局cm的运行时设置）"""
+    def run():
+        ConfigManager.__init__(object.__new__(ConfigManager))
+    return run
+
+
+@benchmark("logger_log", number=5000)
+def bench_logger_log():
+    from util.logger import logger_instance as logger
+    return lambda: logger.log("INFO", "✅ 基准测试日志")
+
+
+@benchmark("yaml_read_cold", number=3)
+def bench_yaml_read_cold():
+    from common.yaml_util import YamlUtil
+    ws, yaml_util = get_workspace(), YamlUtil()
+
+    def run():
+        YamlUtil._cache.clear()
+        for name in os.listdir(cm.YAML_CACHE_PATH):
+            os.remove(os.path.join(cm.YAML_CACHE_PATH, name))
+        yaml_util.read_yaml(ws.yaml_path)
+    return run
+
+
+@benchmark("yaml_read_warm", number=50)
+def bench_yaml_read_warm():
+    from common.yaml_util import YamlUtil
+    ws, yaml_util = get_workspace(), YamlUtil()
+    yaml_util.read_yaml(ws.yaml_path)
+    return lambda: yaml_util.read_yaml(ws.yaml_path)
+
+
+@benchmark("run_yaml_case_dispatch", number=1)
+def bench_run_yaml_case_dispatch():
+    """在内存假页面上执行合成用例（步骤分发+断言+步骤记录），不含浏览器耗时"""
+    from page_case.keyword_driver import KeywordDriver
+    ws = get_workspace()
+    cm.PAGE_BACKEND = "fake"
+    cm.FAKE_PAGE_SCRIPT = os.path.join(ws.path, "fake_page.yaml")  # 不存在时全部按默认行为
+    cm.LOCATOR_HEALING = False
+    cm.PREFIX_CHECKPOINT = False
+    # 只测步骤分发本身：浏览器遥测与步骤耗时采集默认开启，会把采样线程与页面耗时脚本计入结果
+    cm.BROWSER_TELEMETRY = False
+    cm.STEP_TIMING = False
+    cm.NETWORK_CAPTURE = False
+
+    def run():
+        driver = KeywordDriver()
+        try:
+            driver.run_yaml_case(ws.yaml_path)
+        finally:
+            driver.teardown()
+    return run
+
+
+@benchmark("classify_test_results", number=20)
+def bench_classify_test_results():
+    import run
+    results = synthetic_report(REPORT_TESTS)
+    return lambda: run.classify_test_results(results)
+
+
+@benchmark("format_test_report", number=20)
+def bench_format_test_report():
+    import run
+    passed, failed, failed_details, slow_details = run.classify_test_results(synthetic_report(REPORT_TESTS))
+    temp_dict = {name: f"用例描述{name}" for name in passed[::2]}
+    quarantined = failed[::3]
+    return lambda: run.format_test_report(passed, failed, temp_dict, failed_details, "附加统计", quarantined,
+                                          slow_details)
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+@Author: XieLong
+@Date: 2026/10/19
+@File: run_benchmarks.py
+@Description: 执行框架开销基准测试并与基线（benchmarks/baseline.json）比较，任一项单次最短耗时超过基线的阈值百分比
+（且增加量超过绝对下限）即返回非0
+
+每次运行同时测量一段固定的纯Python校准负载，比较前按校准耗时折算到基线机器速度（整机变慢/CPU降频时各项同比变慢，
+不应判定回归）
+
+用法：
+    python -m benchmarks.run_benchmarks                  # 与基线比较
+    python -m benchmarks.run_benchmarks --update         # 重新记录基线
+    python -m benchmarks.run_benchmarks -k yaml          # 只执行名称包含yaml的基准
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+# 默认回归阈值（%），可在基线文件中整体或按基准项覆盖
+DEFAULT_THRESHOLD_PCT = 30.0
+# 默认绝对下限（毫秒）：增加量低于该值时视为噪声，不判定回归；同样可在基线文件中覆盖（min_delta_ms）
+DEFAULT_MIN_DELTA_MS = 0.5
+# 校准负载名称（与基准项一起交替执行，不参与回归判定）
+CALIBRATION = "_calibration"
+
+
+def calibration_load():
+    """固定的纯Python负载（字符串拼接、字典读写、排序），耗时只随机器速度变化"""
+    data = {f"key_{i}": i * 7 % 1000 for i in range(2000)}
+    return sorted(data.items(), key=lambda item: (item[1], item[0]))
+
+
+def measure(benchmarks, repeat: int):
+    """
+    轮流执行各基准：每轮对每项调用number次，共repeat轮（交替执行，机器负载的短时波动分摊到各项的不同轮次，
+    不会集中拖慢某一项的全部轮次）
+    :param benchmarks: [(名称, 待计时函数, 每轮调用次数)]
+    :return: {名称: 每轮的单次调用耗时列表（毫秒）}
+    """
+    for _, func, _ in benchmarks:
+        func()  # 预热（导入、缓存等一次性开销不计入）
+    samples = {name: [] for name, _, _ in benchmarks}
+    for _ in range(repeat):
+        for name, func, number in benchmarks:
+            start = time.perf_counter()
+            for _ in range(number):
+                func()
+            samples[name].append((time.perf_counter() - start) * 1000 / number)
+    return samples
+
+
+def load_baseline():
+    try:
+        with open(BASELINE_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {"threshold_pct": DEFAULT_THRESHOLD_PCT, "benchmarks": {}}
+
+
+def save_baseline(baseline: dict, results: dict):
+    baseline["machine"] = f"{platform.system()} {platform.machine()} / Python {platform.python_version()}"
+    baseline["recorded_at"] = time.strftime("%Y-%m-%d %H:%M:%S")
+    if CALIBRATION in results:
+        baseline["calibration_ms"] = round(results[CALIBRATION]["min_ms"], 4)
+    for name, result in results.items():
+        if name == CALIBRATION:
+            continue
+        entry = baseline["benchmarks"].setdefault(name, {})
+        entry.update({"median_ms": round(result["median_ms"], 4), "min_ms": round(result["min_ms"], 4)})
+    with open(BASELINE_FILE, "w", encoding="utf-8") as f:
+        json.dump(baseline, f, ensure_ascii=False, indent=2)
+        f.write("\n")
+
+
+def speed_factor(baseline: dict, results: dict):
+    """机器速度系数：基线校准耗时 / 本次校准耗时（<1 表示本次机器更慢）；缺少校准数据时为1"""
+    if not baseline.get("calibration_ms") or CALIBRATION not in results:
+        return 1.0
+    return baseline["calibration_ms"] / results[CALIBRATION]["min_ms"]
+
+
+def compare(baseline: dict, results: dict):
+    """
+    与基线比较（按各轮最短耗时：受机器负载干扰最小，并按校准负载折算到基线机器速度）；
+    变化超过阈值百分比且增加量超过绝对下限才判定回归
+    :return: [(名称, 折算后耗时, 基线耗时, 变化%, 阈值%, 是否回归)]
+    """
+    factor = speed_factor(baseline, results)
+    rows = []
+    for name, result in results.items():
+        if name == CALIBRATION:
+            continue
+        current = result["min_ms"] * factor
+        entry = baseline["benchmarks"].get(name)
+        if not entry:
+            rows.append((name, current, None, None, None, False))
+            continue
+        threshold = entry.get("threshold_pct", baseline.get("threshold_pct", DEFAULT_THRESHOLD_PCT))
+        min_delta = entry.get("min_delta_ms", baseline.get("min_delta_ms", DEFAULT_MIN_DELTA_MS))
+        delta = current - entry["min_ms"]
+        change = delta / entry["min_ms"] * 100
+        rows.append((name, current, entry["min_ms"], change, threshold, change > threshold and delta > min_delta))
+    return rows
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="框架开销基准测试")
+    parser.add_argument("--update", action="store_true", help="以本次结果重新记录基线")
+    parser.add_argument("-k", dest="keyword", help="只执行名称包含该关键字的基准")
+    parser.add_argument("--repeat", type=int, default=7, help="每项基准的执行轮数（取最短耗时比较，同时记录中位数）")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    from benchmarks import bench_cases
+
+    results = {}
+    bench_cases.get_workspace()  # 先建临时目录：基准期间的日志与解析缓存都写在这里
+    try:
+        benchmarks = [(name, setup(), number) for name, setup, number in bench_cases.BENCHMARKS
+                      if not args.keyword or args.keyword in name]
+        benchmarks.append((CALIBRATION, calibration_load, 20))
+        for name, samples in measure(benchmarks, args.repeat).items():
+            results[name] = {"median_ms": statistics.median(samples), "min_ms": min(samples)}
+    finally:
+        if bench_cases.workspace:
+            bench_cases.workspace.cleanup()
+
+    baseline = load_baseline()
+    if baseline.get("machine") and args.update is False:
+        print(f"基线环境：{baseline['machine']}（{baseline.get('recorded_at', '')}）")
+        print(f"机器速度系数：{speed_factor(baseline, results):.2f}（当前耗时已按校准负载折算）")
+    print(f"{'基准项':<28}{'当前(ms)':>12}{'基线(ms)':>12}{'变化':>10}{'阈值':>8}")
+    regressions = []
+    for name, current, base, change, threshold, regressed in compare(baseline, results):
+        if base is None:
+            print(f"{name:<28}{current:>12.4f}{'-':>12}{'无基线':>10}{'-':>8}")
+            continue
+        flag = "  ❌ 回归" if regressed else ""
+        print(f"{name:<28}{current:>12.4f}{base:>12.4f}{change:>+9.1f}%{threshold:>7g}%{flag}")
+        if regressed:
+            regressions.append(name)
+
+    if args.update:
+        save_baseline(baseline, results)
+        print(f"✅ 基线已更新：{BASELINE_FILE}")
+        return 0
+    if regressions:
+        print(f"❌ {len(regressions)}项基准超过回归阈值：{', '.join(regressions)}")
+        return 1
+    print("✅ 所有基准均在阈值内")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
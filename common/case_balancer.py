@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+@Author: XieLong
+@Date: 2026/10/19
+@File: case_balancer.py
+@Description: 按历史耗时排序用例并分配到各worker（最长优先、分给当前负载最小的worker），结束时对比预测与实际总耗时
+"""
+
+import heapq
+import json
+import os
+
+import pytest
+
+from config.conf import cm
+from util.history_store import history_store, case_id_of
+from util.logger import logger_instance as logger
+
+
+def plan_assignment(estimates: dict, workers: int):
+    """
+    LPT调度：按预估耗时从长到短，依次分给当前负载最小的worker
+    :param estimates: {case_id: 预估秒数}
+    :return: ({case_id: worker序号}, [各worker预估负载])
+    """
+    workers = max(1, workers)
+    heap = [(0.0, w) for w in range(workers)]
+    assignment = {}
+    loads = [0.0] * workers
+    for case_id, estimate in sorted(estimates.items(), key=lambda kv: (-kv[1], kv[0])):
+        load, worker = heapq.heappop(heap)
+        assignment[case_id] = worker
+        loads[worker] = load + estimate
+        heapq.heappush(heap, (loads[worker], worker))
+    return assignment, loads
+
+
+class CaseBalancer:
+    """用例排序/分配插件"""
+
+    def __init__(self, config):
+        self.config = config
+        self.workers = config.getoption("workers") or self._xdist_workers() or 1
+        self.worker_index = config.getoption("worker_index")
+        if self.worker_index is not None and not 0 <= self.worker_index < self.workers:
+            # 序号越界时所有用例都会被取消选择，运行“成功”却什么也没执行
+            raise pytest.UsageError(f"--worker-index={self.worker_index} 超出范围：应为0到{self.workers - 1}"
+                                    f"（--workers={self.workers}）")
+        self.assignment = {}
+        self.predicted = []
+        self.actual = {}
+
+    def _xdist_workers(self):
+        numprocesses = getattr(self.config.option, "numprocesses", None)
+        return numprocesses if isinstance(numprocesses, int) else None
+
+    # 普通优先级：在筛选类插件（tryfirst）之后、xdist分组（先注册的插件后执行）之前运行
+    def pytest_collection_modifyitems(self, session, config, items):
+        if not items:
+            return
+        case_ids = {item: case_id_of(item) for item in items}
+        history = history_store.estimated_durations(set(case_ids.values()))
+        estimates = {cid: history.get(cid, cm.DEFAULT_CASE_ESTIMATE) for cid in case_ids.values()}
+        self.assignment, self.predicted = plan_assignment(estimates, self.workers)
+
+        # 最长优先排序（worker内部也按此顺序执行）
+        items.sort(key=lambda item: -estimates[case_ids[item]])
+
+        if self.worker_index is not None:
+            # 分片模式：本进程只执行分给自己的用例（多机/多进程各取一片）
+            keep = [i for i in items if self.assignment[case_ids[i]] == self.worker_index]
+            deselected = [i for i in items if self.assignment[case_ids[i]] != self.worker_index]
+            if deselected:
+                config.hook.pytest_deselected(items=deselected)
+            items[:] = keep
+        elif self.workers > 1 and config.pluginmanager.hasplugin("xdist"):
+            # xdist（--dist loadgroup）：同组用例分到同一worker
+            for item in items:
+                item.add_marker(pytest.mark.xdist_group(name=f"w{self.assignment[case_ids[item]]}"))
+
+        if os.getenv("PYTEST_XDIST_WORKER"):
+            # xdist下由worker收集用例，计划写入文件供主控进程汇总
+            with open(cm.json_file("makespan_plan.json"), "w", encoding="utf-8") as f:
+                json.dump({"workers": self.workers, "predicted": self.predicted}, f)
+            return
+
+        unknown = sum(1 for cid in estimates if cid not in history)
+        logger.log("INFO", f"📊 用例耗时调度：{len(estimates)}条用例分配到{self.workers}个worker，"
+                           f"预测总耗时{max(self.predicted):.1f}s（{unknown}条无历史，按{cm.DEFAULT_CASE_ESTIMATE:g}s预估）")
+
+    def pytest_runtest_logreport(self, report):
+        node = getattr(report, "node", None)
+        gateway = getattr(node, "gateway", None)
+        worker = getattr(gateway, "id", None) or os.getenv("PYTEST_XDIST_WORKER") or str(self.worker_index or 0)
+        self.actual[worker] = self.actual.get(worker, 0.0) + report.duration
+
+    def _load_worker_plan(self):
+        try:
+            with open(cm.json_file("makespan_plan.json"), "r", encoding="utf-8") as f:
+                self.predicted = json.load(f)["predicted"]
+        except (OSError, ValueError, KeyError):
+            self.predicted = []
+
+    def pytest_terminal_summary(self, terminalreporter):
+        if not self.predicted and self.workers > 1:
+            self._load_worker_plan()
+        if not self.predicted or not self.actual:
+            return
+        loads = self.predicted if self.worker_index is None else [self.predicted[self.worker_index]]
+        predicted, actual = max(loads), max(self.actual.values())
+        summary = {
+            "workers": self.workers,
+            "worker_index": self.worker_index,
+            "predicted_makespan": round(predicted, 1),
+            "actual_makespan": round(actual, 1),
+            "predicted_loads": [round(v, 1) for v in loads],
+            "actual_loads": {k: round(v, 1) for k, v in self.actual.items()}
+        }
+        msg = f"预测总耗时 {summary['predicted_makespan']}s / 实际总耗时 {summary['actual_makespan']}s"
+        terminalreporter.write_sep("-", f"用例耗时调度：{msg}")
+        logger.log("INFO", f"📊 {msg}，各worker实际负载：{summary['actual_loads']}")
+        with open(cm.json_file("makespan.json"), "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("case_balancer", "按历史耗时调度用例")
+    group.addoption("--workers", type=int, default=None, help="参与分配的worker数量（默认取xdist的-n，否则为1）")
+    group.addoption("--worker-index", type=int, default=None,
+                    help="分片模式：只执行分配给该worker序号（从0开始）的用例")
+
+
+def pytest_configure(config):
+    config.pluginmanager.register(CaseBalancer(config), "case_balancer")
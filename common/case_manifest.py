@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+@Author: XieLong
+@Date: 2026/10/19
+@File: case_manifest.py
+@Description: 用例清单：索引全部YAML用例（用例名/标签/标记/租户/所需关键字/引用变量/预估耗时），文件变更时增量重建；
+pytest按清单参数化并按标签筛选；解析失败或引用了未定义变量的用例在收集阶段即记为错误，执行时直接失败
+"""
+
+import json
+import os
+
+import pytest
+
+from common.yaml_util import YamlUtil, split_case, expand_matrix, referenced_vars
+from config.conf import cm
+from util.history_store import history_store, case_file_of
+from util.logger import logger_instance as logger
+
+MANIFEST_VERSION = 3
+
+
+class CaseManifest:
+    """用例清单（单例），清单文件：json/case_manifest.json"""
+    _instance = None
+
+    def __new__(cls, *args, **kwargs):
+        if not cls._instance:
+            cls._instance = super(CaseManifest, cls).__new__(cls)
+            cls._instance.cases = None
+        return cls._instance
+
+    def __init__(self):
+        self.manifest_file = cm.json_file("case_manifest.json")
+        self.yaml_util = YamlUtil()
+
+    def _load(self):
+        try:
+            with open(self.manifest_file, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+            if manifest.get("version") == MANIFEST_VERSION:
+                return manifest["cases"]
+        except (OSError, ValueError, KeyError):
+            pass
+        return {}
+
+    def _index_case(self, case_id: str, mark: str, path: str, stat):
+        """解析单个YAML用例生成清单条目"""
+        raw_data = self.yaml_util.load_raw(path)
+        case_name, steps, meta = split_case(raw_data)
+        tags = meta.get("tags") or []
+        matrix = meta.get("matrix") or {}
+        variants = expand_matrix(matrix)  # 校验矩阵格式，变体在收集时才展开
+        tenants = {str(s["app_id"]) for s in steps if isinstance(s, dict) and "app_id" in s}
+        tenants = {t for t in tenants if "${" not in t} | {str(v["app_id"]) for v in variants if "app_id" in v}
+        return {
+            "path": os.path.relpath(path, cm.BASE_DIR),
+            "mtime_ns": stat.st_mtime_ns,
+            "size": stat.st_size,
+            "name": case_name,
+            "mark": mark,
+            "tags": [str(t) for t in (tags if isinstance(tags, list) else [tags])],
+            "tenant": sorted(tenants),
+            "actions": sorted({s.get("action") for s in steps if isinstance(s, dict) and s.get("action")}),
+            "steps": len(steps),
+            "matrix": matrix,
+            "variants": len(variants),
+            "variables": sorted(referenced_vars(raw_data) - set(matrix)),  # 需由配置快照提供的变量
+        }
+
+    @staticmethod
+    def _error_case(mark: str, path: str, stat, error: Exception):
+        """索引失败的YAML：保留为一条error条目，仍参与参数化，执行时报出解析错误（不中断整个会话）"""
+        return {
+            "path": os.path.relpath(path, cm.BASE_DIR),
+            "mtime_ns": stat.st_mtime_ns,
+            "size": stat.st_size,
+            "name": os.path.splitext(os.path.basename(path))[0],
+            "mark": mark,
+            "tags": [],
+            "tenant": [],
+            "actions": [],
+            "steps": 0,
+            "matrix": {},
+            "variants": 1,
+            "variables": [],
+            "error": str(error),
+        }
+
+    @staticmethod
+    def case_error(case: dict):
+        """清单条目的错误：解析失败，或引用了配置快照中不存在的变量（未出错时为None）"""
+        if case.get("error"):
+            return case["error"]
+        if case.get("unknown_variables"):
+            return f"YAML用例引用了未定义的变量：{', '.join(case['unknown_variables'])}"
+        return None
+
+    def check_variables(self, cases: dict):
+        """按当前配置快照校验各用例引用的变量（每次刷新都校验：配置变更后沿用的条目同样生效）"""
+        snapshot = cm.config_snapshot()
+        for case_id, case in cases.items():
+            unknown = [name for name in case.get("variables", []) if name not in snapshot]
+            if unknown:
+                case["unknown_variables"] = unknown
+                logger.log("ERROR", f"❌ {case_id} {self.case_error(case)}，该用例执行时将失败")
+            else:
+                case.pop("unknown_variables", None)
+
+    def refresh(self):
+        """增量重建：只重新解析新增/修改过的YAML，删除的文件移出清单；解析失败的YAML记为error条目"""
+        old_cases = self._load() if self.cases is None else self.cases
+        cases, changed = {}, 0
+        for mark in (cm.MAIN_CASE_MARK, cm.OTHER_CASE_MARK):
+            mark_dir = os.path.join(cm.ELEMENT_PATH, mark)
+            if not os.path.isdir(mark_dir):
+                continue
+            with os.scandir(mark_dir) as entries:
+                for entry in sorted(entries, key=lambda e: e.name):
+                    if not entry.name.endswith(".yaml"):
+                        continue
+                    case_id = f"{mark}/{entry.name}"
+                    stat = entry.stat()
+                    old = old_cases.get(case_id)
+                    if old and (old["mtime_ns"], old["size"]) == (stat.st_mtime_ns, stat.st_size):
+                        cases[case_id] = old
+                        continue
+                    try:
+                        cases[case_id] = self._index_case(case_id, mark, entry.path, stat)
+                    except Exception as e:
+                        logger.log("ERROR", f"❌ 用例清单索引失败（{case_id}），该用例执行时将失败：{str(e)}")
+                        cases[case_id] = self._error_case(mark, entry.path, stat, e)
+                    changed += 1
+
+        self.check_variables(cases)
+        estimates = history_store.estimated_durations(cases)
+        for case_id, case in cases.items():
+            case["estimated_duration"] = round(estimates.get(case_id, cm.DEFAULT_CASE_ESTIMATE), 1)
+
+        removed = len(set(old_cases) - set(cases))
+        self.cases = cases
+        with open(self.manifest_file, "w", encoding="utf-8") as f:
+            json.dump({"version": MANIFEST_VERSION, "cases": cases}, f, ensure_ascii=False, indent=2, default=str)
+        if changed or removed:
+            logger.log("INFO", f"✅ 用例清单已更新：共{len(cases)}条，重新索引{changed}条，移除{removed}条")
+        return cases
+
+    def get_cases(self, mark: str = None):
+        """按标记获取清单条目 {case_id: 条目}（首次调用时增量刷新）"""
+        if self.cases is None:
+            self.refresh()
+        return {cid: c for cid, c in self.cases.items() if mark is None or c["mark"] == mark}
+
+    def files(self, mark: str):
+        """某标记下的YAML文件名列表"""
+        return [os.path.basename(cid) for cid in self.get_cases(mark)]
+
+    def variants(self, mark: str):
+        """
+        某标记下的用例变体（用于参数化）：无matrix的用例为1个变体，有matrix的按参数笛卡尔积展开
+        :return: [(YAML文件名, 变量dict)]
+        """
+        return [(os.path.basename(cid), variables)
+                for cid, case in self.get_cases(mark).items()
+                for variables in expand_matrix(case.get("matrix"))]
+
+
+# 全局唯一用例清单
+case_manifest = CaseManifest()
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("case_manifest", "用例清单")
+    group.addoption("--tags", default=None, help="按标签筛选用例（逗号分隔，命中任一标签即执行），如 payment,discount")
+
+
+def pytest_configure(config):
+    # 每次会话开始时按文件变更增量刷新清单（常驻进程内多次运行也能发现新增用例）
+    case_manifest.refresh()
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_collection_modifyitems(session, config, items):
+    cases = case_manifest.get_cases()
+    for item in items:
+        case = cases.get(case_file_of(item))
+        item.manifest_error = case_manifest.case_error(case) if case else None
+    tags = config.getoption("tags")
+    if not tags:
+        return
+    wanted = {t.strip() for t in tags.split(",") if t.strip()}
+    keep, deselected = [], []
+    for item in items:
+        case = cases.get(case_file_of(item))
+        # 出错的用例没有可信的标签，不排除，执行时报出错误
+        (keep if case and (item.manifest_error or wanted & set(case["tags"])) else deselected).append(item)
+    if deselected:
+        config.hook.pytest_deselected(items=deselected)
+    items[:] = keep
+    logger.log("INFO", f"🏷️ 按标签{sorted(wanted)}筛选：执行{len(keep)}条，排除{len(deselected)}条")
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_runtest_setup(item):
+    # 清单中出错的用例在fixture（浏览器、数据初始化）之前直接失败
+    error = getattr(item, "manifest_error", None)
+    if error:
+        pytest.fail(f"用例清单错误：{error}", pytrace=False)
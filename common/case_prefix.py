@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+@Author: XieLong
+@Date: 2026/10/19
+@File: case_prefix.py
+@Description: 共享前缀执行：收集完成后对所选用例建立前缀计划（首条用例执行前缀并保存检查点，其余用例恢复检查点后从分叉点继续），会话结束写入复用统计
+"""
+
+import json
+import os
+
+from common.yaml_util import YamlUtil, split_case
+from config.conf import cm
+from page_case.checkpoint import checkpoint_store, build_prefix_plan, saving_text
+from util.history_store import history_store, case_id_of, case_file_of
+from util.logger import logger_instance as logger
+
+
+class CasePrefix:
+    """共享前缀插件：前缀计划基于最终执行的用例集合（筛选/分片之后）"""
+
+    def __init__(self):
+        self.summary_file = cm.json_file("checkpoint_summary.json")
+
+    def pytest_collection_modifyitems(self, session, config, items):
+        checkpoint_store.reset()
+        if not cm.PREFIX_CHECKPOINT:
+            return
+        yaml_util = YamlUtil()
+        cases, case_ids = {}, {}
+        for item in items:
+            case_file = case_file_of(item)
+            yaml_path = os.path.join(cm.ELEMENT_PATH, case_file) if case_file else None
+            if not yaml_path or not os.path.isfile(yaml_path):
+                continue
+            variables = item.callspec.params.get("case_variables") or {}
+            key = checkpoint_store.case_key(yaml_path, variables)
+            if key in cases:
+                continue
+            try:
+                # 按矩阵变量替换后的步骤规划：登录同一租户的变体共享登录前缀（复用同一登录态）
+                cases[key] = split_case(yaml_util.read_yaml(yaml_path, variables))[1]
+                case_ids[key] = case_id_of(item)
+            except Exception as e:
+                # 解析失败的用例不参与前缀计划，执行时照常报错
+                logger.log("WARNING", f"共享前缀计划跳过用例（{case_id_of(item)}）：{str(e)}")
+        # 按历史步骤耗时与实测恢复耗时衡量收益，只规划能节省时间的前缀
+        history = history_store.step_durations(set(case_ids.values()))
+        step_seconds = {key: history.get(case_id, {}) for key, case_id in case_ids.items()}
+        checkpoint_store.set_plan(build_prefix_plan(cases, step_seconds, checkpoint_store.measured_restore_seconds()))
+        summary = checkpoint_store.summary()
+        if summary["planned_cases"]:
+            logger.log("INFO", f"🌳 共享前缀计划：{summary['prefixes']}个共享前缀，覆盖{summary['planned_cases']}条用例")
+
+    def pytest_sessionfinish(self, session, exitstatus):
+        if session.config.option.collectonly:
+            return
+        summary = checkpoint_store.summary()
+        with open(self.summary_file, "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+        if summary["reused"]:
+            logger.log("INFO", f"⏩ 共享前缀复用{summary['reused']}次，{saving_text(summary['saved_seconds'])}")
+
+
+def pytest_configure(config):
+    config.pluginmanager.register(CasePrefix(), "case_prefix")
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+@Author: XieLong
+@Date: 2026/10/19
+@File: case_rerun.py
+@Description: 失败用例重跑（复用已登录的浏览器，受单次运行的时间预算限制）及不稳定用例隔离（照常执行，失败不通知群）
+"""
+
+import json
+import time
+
+import pytest
+from _pytest.runner import runtestprotocol
+
+from config.conf import cm
+from page_case.browser_pool import browser_pool
+from util.history_store import history_store, case_id_of, QUARANTINE_PROPERTY
+from util.logger import logger_instance as logger
+
+
+class CaseRerun:
+    """重跑/隔离插件"""
+
+    def __init__(self, config):
+        self.reruns = config.getoption("reruns")
+        if self.reruns is None:
+            self.reruns = cm.RERUN_COUNT
+        self.budget = cm.RERUN_BUDGET_SECONDS
+        self.spent = 0.0
+        self.quarantine = {}
+
+    # ---------------- 不稳定用例隔离 ----------------
+    def pytest_collection_modifyitems(self, session, config, items):
+        if not cm.QUARANTINE_FLAKY or not items:
+            return
+        try:
+            self.quarantine = {f["case_id"]: f["reason"] for f in history_store.flaky_cases()}
+        except Exception as e:
+            logger.log("ERROR", f"❌ 读取不稳定用例失败：{str(e)}")
+            return
+        quarantined = []
+        for item in items:
+            case_id = case_id_of(item)
+            if case_id in self.quarantine:
+                item.user_properties.append((QUARANTINE_PROPERTY, self.quarantine[case_id]))
+                quarantined.append(case_id)
+        with open(cm.json_file("quarantine.json"), "w", encoding="utf-8") as f:
+            json.dump({cid: self.quarantine[cid] for cid in quarantined}, f, ensure_ascii=False, indent=2)
+        if quarantined:
+            logger.log("WARNING", f"🔒 隔离不稳定用例{len(quarantined)}条（照常执行，失败不通知群）：{quarantined}")
+
+    # ---------------- 失败重跑 ----------------
+    @pytest.hookimpl(tryfirst=True)
+    def pytest_runtest_protocol(self, item, nextitem):
+        if self.reruns <= 0:
+            return None
+        item.ihook.pytest_runtest_logstart(nodeid=item.nodeid, location=item.location)
+        attempt = 0
+        while True:
+            # 允许重跑时，用例结束只拆除用例自身（父级节点的fixture保留，浏览器保留），重跑直接复用
+            # 用例清单错误（YAML解析失败/未定义变量）每次都会失败，不重跑
+            item.rerun_allowed = (attempt < self.reruns and self.spent < self.budget
+                                  and not getattr(item, "manifest_error", None))
+            start = time.perf_counter()
+            reports = runtestprotocol(item, nextitem=item.parent if item.rerun_allowed else nextitem, log=False)
+            elapsed = time.perf_counter() - start
+            if attempt:
+                self.spent += elapsed
+            for report in reports:
+                item.ihook.pytest_runtest_logreport(report=report)
+
+            failed = any(r.failed for r in reports)
+            if not failed or not item.rerun_allowed:
+                break
+            if self.spent + elapsed > self.budget:
+                logger.log("WARNING", f"⏱️ 重跑时间预算不足（已用{self.spent:.0f}s/{self.budget:g}s），不再重跑：{item.nodeid}")
+                break
+            attempt += 1
+            logger.log("INFO", f"🔁 第{attempt}次重跑失败用例：{item.nodeid}")
+
+        if item.rerun_allowed:
+            # 最后一次执行只拆除到父级节点，这里补做更高层级fixture的拆除
+            try:
+                item.session._setupstate.teardown_exact(nextitem)
+            except Exception as e:
+                logger.log("ERROR", f"❌ 重跑后拆除fixture失败：{str(e)}")
+        browser_pool.discard_parked()
+        item.ihook.pytest_runtest_logfinish(nodeid=item.nodeid, location=item.location)
+        return True
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("case_rerun", "失败用例重跑")
+    group.addoption("--reruns", type=int, default=None, help="失败用例最多重跑次数（默认取RERUN_COUNT）")
+
+
+def pytest_configure(config):
+    config.pluginmanager.register(CaseRerun(config), "case_rerun")
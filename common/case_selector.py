@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+@Author: XieLong
+@Date: 2026/10/19
+@File: case_selector.py
+@Description: 变更影响选择执行：按YAML内容哈希+关键字引擎版本（引擎源码与执行相关配置）生成指纹，只执行新增/变更/上次失败的用例，按周期强制全量
+"""
+
+import glob
+import hashlib
+import os
+import time
+
+import pytest
+
+from config.conf import cm
+from util.history_store import history_store, case_id_of, case_file_of, REUSED_REASON
+from util.logger import logger_instance as logger
+
+# 关键字引擎源文件（page_case下全部模块及YAML解析）：任一变更都会使全部用例指纹失效
+ENGINE_FILES = sorted(glob.glob(os.path.join(cm.BASE_DIR, "page_case", "*.py"))) + [
+    os.path.join(cm.BASE_DIR, "common", "yaml_util.py"),
+]
+# 影响用例执行的配置项：取值变化同样使全部用例指纹失效
+ENGINE_SETTINGS = ("TEST_URL", "POS_BASE_URL", "PAGE_BACKEND", "FAKE_PAGE_SCRIPT")
+
+
+def engine_version():
+    """关键字引擎版本（引擎源文件内容 + 执行相关配置的哈希）"""
+    digest = hashlib.sha1()
+    for path in ENGINE_FILES:
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    for key in ENGINE_SETTINGS:
+        digest.update(f"{key}={getattr(cm, key, '')}\n".encode())
+    return digest.hexdigest()[:12]
+
+
+def case_fingerprint(yaml_path: str, engine: str):
+    """用例指纹：YAML内容哈希 + 引擎版本"""
+    with open(yaml_path, "rb") as f:
+        return hashlib.sha256(f.read() + engine.encode()).hexdigest()
+
+
+class CaseSelector:
+    """选择执行插件：记录每条用例的指纹，未变更且上次通过的用例跳过并标记为复用结果"""
+
+    def __init__(self, config):
+        self.enabled = config.getoption("changed_only") or cm.SELECT_CHANGED_ONLY
+        self.engine = None  # 收集时计算（--dry-run等插件在配置阶段才切换PAGE_BACKEND）
+        self.fingerprints = {}  # nodeid -> (case_id, 指纹)
+        self.full_run = True
+        # 全量周期按用例标记分别计算（main/other各自的全量时间）
+        self.full_run_key = f"last_full_run_at:{config.getoption('markexpr') or 'all'}"
+
+    def _due_full_run(self):
+        last_full = float(history_store.get_meta(self.full_run_key, 0))
+        return time.time() - last_full >= cm.FULL_RUN_INTERVAL_HOURS * 3600
+
+    @pytest.hookimpl(tryfirst=True)
+    def pytest_collection_modifyitems(self, session, config, items):
+        self.engine = engine_version()
+        for item in items:
+            case_file = case_file_of(item)
+            yaml_path = os.path.join(cm.ELEMENT_PATH, case_file) if case_file else None
+            if yaml_path and os.path.isfile(yaml_path):
+                self.fingerprints[item.nodeid] = (case_id_of(item), case_fingerprint(yaml_path, self.engine))
+
+        if not self.enabled:
+            return
+        if self._due_full_run():
+            logger.log("INFO", f"🔁 距上次全量运行已超过{cm.FULL_RUN_INTERVAL_HOURS:g}小时，本次执行全量用例")
+            return
+
+        self.full_run = False
+        known = history_store.fingerprints()
+        reused = 0
+        for item in items:
+            case_id, fingerprint = self.fingerprints.get(item.nodeid, (None, None))
+            if fingerprint and known.get(case_id) == (fingerprint, "passed"):
+                item.add_marker(pytest.mark.skip(reason=REUSED_REASON))
+                reused += 1
+        logger.log("INFO", f"♻️ 选择执行：{len(items) - reused}条新增/变更/上次失败的用例执行，{reused}条复用上次结果")
+
+    def pytest_runtest_logreport(self, report):
+        # 只记录实际执行过的结果（主体结果或前置失败）
+        if report.skipped or (report.when != "call" and not report.failed):
+            return
+        if report.nodeid in self.fingerprints:
+            case_id, fingerprint = self.fingerprints[report.nodeid]
+            history_store.save_fingerprint(case_id, fingerprint, report.outcome)
+
+    def pytest_sessionfinish(self, session, exitstatus):
+        config = session.config
+        if config.option.collectonly or config.getoption("worker_index") is not None:
+            return
+        if self.full_run and session.testscollected:
+            history_store.set_meta(self.full_run_key, time.time())
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("case_selector", "变更影响选择执行")
+    group.addoption("--changed-only", action="store_true", default=False,
+                    help="只执行新增/变更/上次失败的用例，其余复用上次结果")
+
+
+def pytest_configure(config):
+    config.pluginmanager.register(CaseSelector(config), "case_selector")
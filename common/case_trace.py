@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+@Author: XieLong
+@Date: 2026/10/19
+@File: case_trace.py
+@Description: 链路追踪插件（--trace-events/TRACE_EVENTS）：记录运行与用例（setup/call/teardown）区间，会话结束写入分段文件，主控进程合并为Chrome trace-event JSON
+"""
+import os
+
+import pytest
+
+from config.conf import cm
+from util.history_store import history_store, case_id_of
+from util.logger import logger_instance as logger
+from util.tracer import tracer, merge_trace, now_us
+
+
+class CaseTracer:
+    """链路追踪插件：每个进程一条轨道（主进程main、xdist worker-gwN、分片shard-N）"""
+
+    def __init__(self, config):
+        worker = os.getenv("PYTEST_XDIST_WORKER")
+        worker_index = config.getoption("worker_index")
+        if worker:
+            track, sort_index = f"worker-{worker}", int(worker.lstrip("gw") or 0) + 1
+        elif worker_index is not None:
+            track, sort_index = f"shard-{worker_index}", worker_index
+        else:
+            track, sort_index = "main", 0
+        self.is_worker = bool(worker)
+        tracer.enable(track, sort_index)
+        self.start = now_us()
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_protocol(self, item, nextitem):
+        with tracer.span(case_id_of(item), "case", nodeid=item.nodeid):
+            yield
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_setup(self, item):
+        with tracer.span("setup", "phase"):
+            yield
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_call(self, item):
+        with tracer.span("call", "phase"):
+            yield
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_teardown(self, item):
+        with tracer.span("teardown", "phase"):
+            yield
+
+    @pytest.hookimpl(trylast=True)
+    def pytest_sessionfinish(self, session, exitstatus):
+        tracer.complete(f"运行 {history_store.run_id}", "run", self.start, exitstatus=int(exitstatus))
+        tracer.flush(history_store.run_id)
+        tracer.disable()
+        if self.is_worker:
+            return  # xdist worker只写分段文件，由主控进程合并
+        # 只合并本机日志目录下的分段文件：多机分片不共享日志目录时，结束后用 python -m util.tracer 收集合并
+        trace_file, count = merge_trace(history_store.run_id)
+        if trace_file:
+            logger.log("INFO", f"🧭 链路追踪已写入{trace_file}（{count}个事件，可用chrome://tracing或Perfetto打开）")
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("case_trace", "链路追踪")
+    group.addoption("--trace-events", action="store_true", default=False,
+                    help="记录运行/用例/步骤/浏览器等待/HTTP请求的时间线，导出Chrome trace-event JSON（logs/trace/运行ID.json）")
+
+
+def pytest_configure(config):
+    if (config.getoption("trace_events") or cm.TRACE_EVENTS) and not config.option.collectonly:
+        config.pluginmanager.register(CaseTracer(config), "case_tracer")
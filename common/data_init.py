@@ -12,22 +12,24 @@ import time
 import requests
 from config.conf import cm  # 项目全局配置
 from util.logger import logger_instance  # 项目日志工具
+from util.tracer import trace_session  # 链路追踪（HTTP请求区间）
 
 # 日志实例（适配自定义Logger类，仅支持log(level, msg)方法）
 logger = logger_instance
 
 # 测试常量（集中管理，避免硬编码；后续可迁移到cm配置中）
+# 接口地址经cm.pos_url改写：POS_TRAFFIC_MODE=record/replay时指向本地替身
 TEST_CONSTANTS = {
     "APP_ID": "10046",
     "MEMBER_USER_ID": "136680",  # 测试会员ID
     "TEST_COUPON_ID": "14879",   # 测试优惠券ID
-    "CASHIER_LOGIN_URL": "https://pos.amfuture.sg/index.php/cashier/passport/login",
-    "CASHIER_COUPON_URL": "https://pos.amfuture.sg/index.php/shop/plus.coupon.coupon/index",
-    "DEL_MEMBER_ORDER_URL": "https://pos.amfuture.sg/api/autotest/delUserOrder",
-    "DEL_ALL_COUPON_URL": "https://pos.amfuture.sg/api/autotest/delUserCoupon",
-    "SEND_COUPON_URL": "https://pos.amfuture.sg/index.php/shop/plus.coupon.receive/SendCoupon",
-    "GET_STAY_ORDER_URL": "https://pos.amfuture.sg/index.php/cashier/order.CartHandle/getStayList",
-    "DEL_STAY_ORDER_URL": "https://pos.amfuture.sg/index.php/cashier/order.CartHandle/setDelCart"
+    "CASHIER_LOGIN_URL": cm.pos_url("https://pos.amfuture.sg/index.php/cashier/passport/login"),
+    "CASHIER_COUPON_URL": cm.pos_url("https://pos.amfuture.sg/index.php/shop/plus.coupon.coupon/index"),
+    "DEL_MEMBER_ORDER_URL": cm.pos_url("https://pos.amfuture.sg/api/autotest/delUserOrder"),
+    "DEL_ALL_COUPON_URL": cm.pos_url("https://pos.amfuture.sg/api/autotest/delUserCoupon"),
+    "SEND_COUPON_URL": cm.pos_url("https://pos.amfuture.sg/index.php/shop/plus.coupon.receive/SendCoupon"),
+    "GET_STAY_ORDER_URL": cm.pos_url("https://pos.amfuture.sg/index.php/cashier/order.CartHandle/getStayList"),
+    "DEL_STAY_ORDER_URL": cm.pos_url("https://pos.amfuture.sg/index.php/cashier/order.CartHandle/setDelCart")
 }
 
 
@@ -35,13 +37,19 @@ class CashierDataInit:
     """收银台测试数据初始化工具类"""
     def __init__(self):
         # 复用会话（保持登录态，减少重复请求）
-        self.session = requests.Session()
+        self.session = trace_session(requests.Session())
         # 存储登录后的headers（供后续接口使用）
         self.shop_headers = None  # 商家后台headers
         self.cashier_headers = None  # 收银台后台headers
         # 请求超时时间（防止网络阻塞）
         self.request_timeout = 15
 
+    def reset_login(self):
+        """丢弃登录态（新会话，下次调用时重新登录双后台）"""
+        self.session = trace_session(requests.Session())
+        self.shop_headers = None
+        self.cashier_headers = None
+
     def login_shop(self):
         """
         登录商家后台，获取并存储headers
@@ -240,6 +248,7 @@ class CashierDataInit:
         """
         主方法：完整测试数据清理流程
         流程：登录双后台 → 清空会员订单 → 清空优惠券 → 发送测试券 → 清空挂单
+        常驻进程内沿用上次运行的登录态，执行失败时（如登录态过期）重新登录后重试一次
         :raise: Exception - 任一环节失败则抛出异常
         """
         logger.log("INFO", "=" * 60)
@@ -247,15 +256,15 @@ class CashierDataInit:
         logger.log("INFO", "=" * 60)
 
         try:
-            # 1. 前置：登录双后台（确保后续接口有权限）
-            self.login_shop()
-            self.login_cashier_backend()
-
-            # 2. 执行数据清理子步骤（顺序不可乱）
-            self._clear_member_orders()
-            self._clear_all_coupons()
-            self._send_test_coupon()
-            self._clear_stay_orders()
+            logged_in = bool(self.shop_headers and self.cashier_headers)
+            try:
+                self._clear_steps()
+            except Exception as e:
+                if not logged_in:
+                    raise
+                logger.log("WARNING", f"沿用的登录态执行失败，重新登录后重试：{str(e)}")
+                self.reset_login()
+                self._clear_steps()
 
             # 3. 后置：等待数据同步（原逻辑保留，可根据实际调整）
             time.sleep(2)
@@ -270,11 +279,27 @@ class CashierDataInit:
             logger.log("INFO", "=" * 60)
             raise Exception(error_msg) from e  # 抛出异常，终止测试用例
 
+    def _clear_steps(self):
+        """登录双后台并依次执行清理子步骤"""
+        # 1. 前置：登录双后台（确保后续接口有权限）
+        self.login_shop()
+        self.login_cashier_backend()
+
+        # 2. 执行数据清理子步骤（顺序不可乱）
+        self._clear_member_orders()
+        self._clear_all_coupons()
+        self._send_test_coupon()
+        self._clear_stay_orders()
+
+
+# 全局唯一数据初始化（会话与登录headers保存在模块级：进程内多次执行pytest时conftest会被重新导入，
+# 实例放在这里才能在常驻调度的多次运行之间保持登录态）
+data_init = CashierDataInit()
+
 
 # 测试代码（单独运行时验证功能，集成到测试框架时不会执行）
 if __name__ == "__main__":
     try:
-        data_init = CashierDataInit()
         data_init.clear_test_data()
     except Exception as e:
         logger.log("ERROR", f"独立测试失败: {str(e)}")
\ No newline at end of file
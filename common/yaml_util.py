@@ -4,40 +4,176 @@
 @Author: XieLong
 @Date: 2025/10/24 10:40
 @File: yaml_util.py
-@Description: YAML文件读取工具（支持变量替换）
+@Description: YAML文件读取工具（解析结果缓存+一次性变量替换）
 """
-import yaml
+import hashlib
+import itertools
 import os
+import pickle
+import re
+
+import yaml
 from config.conf import cm
 from util.logger import logger_instance as logger
 
+# 优先使用C加速的解析器（libyaml），不可用时退回纯Python实现
+SafeLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+# 变量占位符：${VAR}
+VAR_PATTERN = re.compile(r"\$\{(\w+)\}")
+
+
+# 用例YAML中的保留顶层字段（用例元数据，不是用例名）
+CASE_META_KEYS = ("tags", "matrix", "budget_ms")
+
+
+def split_case(case_data: dict):
+    """
+    拆分用例YAML：第一个非保留字段为用例名（值为步骤列表），保留字段为元数据
+    :return: (用例名, 步骤列表, 元数据dict)
+    """
+    meta = {k: v for k, v in case_data.items() if k in CASE_META_KEYS}
+    names = [k for k in case_data if k not in CASE_META_KEYS]
+    if not names:
+        raise ValueError(f"YAML用例缺少用例名及步骤：{list(case_data)}")
+    return names[0], case_data[names[0]], meta
+
+
+def expand_matrix(matrix: dict):
+    """
+    展开用例矩阵：各参数取值的笛卡尔积，每个组合作为一组变量（步骤中以${参数名}引用）
+    如 {"app_id": [10014, 10015], "lang": ["简体中文", "English"]} 展开为4组变量
+    :param matrix: {参数名: 取值列表}，为空时返回[{}]（不展开）
+    :return: [{参数名: 取值}]
+    """
+    if not matrix:
+        return [{}]
+    if not isinstance(matrix, dict):
+        raise ValueError(f"matrix必须是 参数名: 取值列表 的映射：{matrix}")
+    axes = []
+    for name, values in matrix.items():
+        if not isinstance(values, list):
+            values = [values]
+        if not values:
+            raise ValueError(f"matrix参数{name}的取值列表为空")
+        axes.append([(name, value) for value in values])
+    return [dict(combo) for combo in itertools.product(*axes)]
+
+
+def variant_id(variables: dict):
+    """矩阵变体标识（用于测试ID/历史记录），如 app_id=10014-lang=English"""
+    return "-".join(f"{k}={v}" for k, v in variables.items())
+
+
+class UnknownVariableError(ValueError):
+    """YAML用例引用了未定义的变量"""
+
+
+def substitute_vars(data, variables: dict, unknown: set):
+    """一次遍历替换所有字符串中的${VAR}（返回新结构，不修改缓存的解析结果）"""
+    if isinstance(data, str):
+        if "${" not in data:
+            return data
+
+        def replace(match):
+            name = match.group(1)
+            if name not in variables:
+                unknown.add(name)
+                return match.group(0)
+            return str(variables[name])
+        return VAR_PATTERN.sub(replace, data)
+    if isinstance(data, dict):
+        return {k: substitute_vars(v, variables, unknown) for k, v in data.items()}
+    if isinstance(data, list):
+        return [substitute_vars(v, variables, unknown) for v in data]
+    return data
+
+
+def referenced_vars(data, names: set = None):
+    """收集解析结果中所有字符串引用的${VAR}变量名"""
+    names = set() if names is None else names
+    if isinstance(data, str):
+        if "${" in data:
+            names.update(VAR_PATTERN.findall(data))
+    elif isinstance(data, dict):
+        for value in data.values():
+            referenced_vars(value, names)
+    elif isinstance(data, list):
+        for value in data:
+            referenced_vars(value, names)
+    return names
+
 
 class YamlUtil:
-    def read_yaml(self, yaml_path: str):
+    # 解析结果内存缓存（进程内共享）：{绝对路径: (mtime_ns, size, sha256, 解析结果)}
+    _cache = {}
+
+    def _cache_file(self, yaml_path: str):
+        return os.path.join(cm.YAML_CACHE_PATH, hashlib.sha1(yaml_path.encode("utf-8")).hexdigest() + ".pickle")
+
+    def load_raw(self, yaml_path: str):
         """
-        读取YAML用例文件，并自动替换变量（如${TEST_URL}）
+        读取并解析YAML（未替换变量），按 路径+修改时间+内容哈希 命中内存/磁盘缓存
+        :return: 解析后的原始数据（调用方不得修改）
+        """
+        yaml_path = os.path.abspath(yaml_path)
+        stat = os.stat(yaml_path)
+        cached = self._cache.get(yaml_path)
+        if cached and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+            return cached[3]
+
+        cache_file = self._cache_file(yaml_path)
+        if not cached and os.path.exists(cache_file):
+            try:
+                with open(cache_file, "rb") as f:
+                    cached = pickle.load(f)
+                if cached[:2] == (stat.st_mtime_ns, stat.st_size):
+                    self._cache[yaml_path] = cached
+                    return cached[3]
+            except Exception:
+                cached = None  # 缓存损坏或版本不兼容时重新解析
+
+        with open(yaml_path, "rb") as f:
+            content = f.read()
+        digest = hashlib.sha256(content).hexdigest()
+        if cached and cached[2] == digest:
+            data = cached[3]  # 仅修改时间变化，内容未变
+        else:
+            data = yaml.load(content.decode("utf-8"), Loader=SafeLoader)
+        entry = (stat.st_mtime_ns, stat.st_size, digest, data)
+        self._cache[yaml_path] = entry
+        try:
+            with open(cache_file, "wb") as f:
+                pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+        except OSError as e:
+            logger.log("WARNING", f"写入YAML解析缓存失败（{yaml_path}）：{str(e)}")
+        return data
+
+    def read_yaml(self, yaml_path: str, variables: dict = None):
+        """
+        读取YAML用例文件，并一次性替换所有变量（如${TEST_URL}、${CASHIER_PWD}）
         :param yaml_path: YAML文件路径
+        :param variables: 额外变量（覆盖配置快照中的同名变量）
         :return: 解析后的YAML字典数据
+        :raise UnknownVariableError: 引用了配置快照中不存在的变量
         """
         try:
             # 1. 检查YAML文件是否存在
             if not os.path.exists(yaml_path):
                 raise FileNotFoundError(f"YAML用例文件不存在：{yaml_path}")
 
-            # 2. 读取YAML内容并替换变量
-            with open(yaml_path, "r", encoding="utf-8") as f:
-                yaml_content = f.read()
-                # 替换${TEST_URL}为cm.TEST_URL（从.env读取的配置）
-                yaml_content = yaml_content.replace("${TEST_URL}", cm.TEST_URL)
-                # 如需替换其他变量（如${CASHIER_USER}），可在此处添加
-                yaml_content = yaml_content.replace("${CASHIER_USER}", cm.CASHIER_USER)
-                yaml_content = yaml_content.replace("${CASHIER_PIN}", cm.CASHIER_PIN)
-
-            # 3. 解析YAML内容（安全加载，避免执行恶意代码）
-            case_data = yaml.safe_load(yaml_content)
-            if not case_data:
+            # 2. 读取解析结果（命中缓存时不重复解析）
+            raw_data = self.load_raw(yaml_path)
+            if not raw_data:
                 raise ValueError(f"YAML用例文件为空：{yaml_path}")
 
+            # 3. 按配置快照一次性替换变量，未知变量直接报错
+            snapshot = cm.config_snapshot()
+            snapshot.update(variables or {})
+            unknown = set()
+            case_data = substitute_vars(raw_data, snapshot, unknown)
+            if unknown:
+                raise UnknownVariableError(f"YAML用例引用了未定义的变量：{', '.join(sorted(unknown))}")
+
             logger.log("INFO", f"✅ 成功读取YAML用例：{os.path.basename(yaml_path)}")
             return case_data
 
@@ -52,11 +52,26 @@ class ConfigManager(object):
         # Allure报告相关目录
         self.ALLURE_RESULTS_PATH = os.path.join(self.BASE_DIR, "allure-results")  # 结果目录
         self.ALLURE_REPORT_PATH = os.path.join(self.BASE_DIR, "allure-report")  # 报告目录
+        # 持久化数据目录（data，存放运行历史库等）
+        self.DATA_PATH = os.path.join(self.BASE_DIR, "data")
+        # 运行历史SQLite库（记录每次运行的用例/步骤结果与耗时）
+        self.HISTORY_DB_FILE = os.path.join(self.DATA_PATH, "history.db")
+        # YAML用例解析缓存目录（按文件路径/修改时间/内容哈希缓存解析结果）
+        self.YAML_CACHE_PATH = os.path.join(self.DATA_PATH, "yaml_cache")
+        # 定位符自愈：定位成功元素的指纹库
+        self.LOCATOR_FINGERPRINT_FILE = os.path.join(self.DATA_PATH, "locator_fingerprints.json")
+        # 干跑（--dry-run）的运行历史库（与真实运行分开，不影响耗时/不稳定分析）
+        self.DRY_RUN_HISTORY_DB_FILE = os.path.join(self.DATA_PATH, "history_dryrun.db")
+        # 网络抓包（NETWORK_CAPTURE）目录：按运行ID分目录，每条用例一个类HAR文件（JSON Lines）
+        self.HAR_PATH = os.path.join(self.DATA_PATH, "har")
+        # 产物库（截图/DOM快照/日志按内容哈希存储，旧运行按天归档）
+        self.ARTIFACT_PATH = os.path.join(self.DATA_PATH, "artifacts")
 
         # 自动创建所有目录（不存在则创建）
         for path in [
             self.ELEMENT_PATH, self.TESTCASE_PATH, self.SCREENSHOT_PATH,
-            self.LOG_PATH, self.JSON_PATH, self.ALLURE_RESULTS_PATH, self.ALLURE_REPORT_PATH
+            self.LOG_PATH, self.JSON_PATH, self.ALLURE_RESULTS_PATH, self.ALLURE_REPORT_PATH,
+            self.DATA_PATH, self.YAML_CACHE_PATH
         ]:
             if not os.path.exists(path):
                 os.makedirs(path)
@@ -64,10 +79,33 @@ class ConfigManager(object):
     # ---------------- 环境变量配置（从.env读取） ----------------
     def _init_env_vars(self):
         """从.env文件读取配置（支持默认值）"""
+        # POS流量模式：live直连线上；record经本地替身转发并录制；replay由本地替身按录制归档回放
+        # record/replay下所有POS地址（TEST_URL、SHOP_LOGIN_URL、数据初始化接口、Shop登录页）自动指向本地替身
+        self.POS_TRAFFIC_MODE = os.getenv("POS_TRAFFIC_MODE", "live").lower()
+        if self.POS_TRAFFIC_MODE not in ("live", "record", "replay"):
+            raise ValueError(f"POS_TRAFFIC_MODE只支持live/record/replay：{self.POS_TRAFFIC_MODE}")
+        self.POS_ORIGIN = os.getenv("POS_ORIGIN", "https://pos.amfuture.sg").rstrip("/")
+        # 本地替身端口、录制归档文件
+        self.REPLAY_PORT = int(os.getenv("REPLAY_PORT", "8765"))
+        self.TRAFFIC_ARCHIVE_FILE = os.getenv("TRAFFIC_ARCHIVE_FILE", os.path.join(self.DATA_PATH, "pos_traffic.jsonl.gz"))
+        # 回放延迟：毫秒数，或recorded（按录制时的实际耗时）
+        self.REPLAY_LATENCY_MS = os.getenv("REPLAY_LATENCY_MS", "0")
+        # 预发环境地址：live模式下配置后，所有POS地址改写为预发环境（压测只允许指向本地替身或预发环境）
+        self.POS_STAGING_URL = os.getenv("POS_STAGING_URL", "").rstrip("/")
+        if self.POS_TRAFFIC_MODE == "live":
+            self.POS_BASE_URL = self.POS_STAGING_URL or self.POS_ORIGIN
+        else:
+            self.POS_BASE_URL = f"http://127.0.0.1:{self.REPLAY_PORT}"
+
         # 测试环境URL
-        self.TEST_URL = os.getenv("TEST_URL", "https://pos.amfuture.sg/cashier/Login")
+        self.TEST_URL = self.pos_url(os.getenv("TEST_URL", "https://pos.amfuture.sg/cashier/Login"))
         # 浏览器无头模式（True/False）
         self.HEADLESS_MODE = os.getenv("HEADLESS_MODE", "True").lower() == "true"
+        # 页面后端：chromium=真实浏览器，fake=内存假页面（--dry-run时自动切换）；假页面的元素/文本/延迟脚本
+        self.PAGE_BACKEND = os.getenv("PAGE_BACKEND", "chromium").lower()
+        self.FAKE_PAGE_SCRIPT = os.getenv("FAKE_PAGE_SCRIPT", os.path.join(self.BASE_DIR, "config", "fake_page.yaml"))
+        # 常驻浏览器：用例之间复用同一浏览器（调度守护进程模式下自动开启）
+        self.KEEP_BROWSER_WARM = os.getenv("KEEP_BROWSER_WARM", "False").lower() == "true"
         # 测试超时时间（秒）
         self.TEST_TIMEOUT = int(os.getenv("TEST_TIMEOUT", "60"))
 
@@ -80,7 +118,7 @@ class ConfigManager(object):
         self.MEMBER_PHONE = os.getenv("MEMBER_PHONE", "24120501")
 
         # 商家后台配置
-        self.SHOP_LOGIN_URL = os.getenv("SHOP_LOGIN_URL", "https://pos.amfuture.sg/index.php/shop/passport/login")
+        self.SHOP_LOGIN_URL = self.pos_url(os.getenv("SHOP_LOGIN_URL", "https://pos.amfuture.sg/index.php/shop/passport/login"))
         self.SHOP_USER = os.getenv("SHOP_USER", "自动化测试")
         self.SHOP_PWD = os.getenv("SHOP_PWD", "123456")
 
@@ -88,6 +126,92 @@ class ConfigManager(object):
         self.MAIN_CASE_MARK = os.getenv("MAIN_CASE_MARK", "main")
         self.OTHER_CASE_MARK = os.getenv("OTHER_CASE_MARK", "other")
 
+        # 报告生成：默认纯Python生成；ALLURE_CLI=true时额外调用Allure CLI（需本机安装Java及allure）
+        self.ALLURE_CLI = os.getenv("ALLURE_CLI", "False").lower() == "true"
+        # Allure CLI子进程超时时间（秒），超时后仅终止该子进程
+        self.ALLURE_CLI_TIMEOUT = int(os.getenv("ALLURE_CLI_TIMEOUT", "300"))
+
+        # 调度守护进程：各标记的执行时段/间隔配置文件、状态文件
+        self.SCHEDULE_FILE = os.getenv("SCHEDULE_FILE", os.path.join(self.BASE_DIR, "config", "schedule.yaml"))
+        self.SCHEDULE_STATUS_FILE = os.path.join(self.JSON_PATH, "scheduler_status.json")
+        # 压测配置（python -m util.load_generator）及压测结果
+        self.LOAD_PROFILE_FILE = os.getenv("LOAD_PROFILE_FILE", os.path.join(self.BASE_DIR, "config", "load_profile.yaml"))
+        self.LOAD_REPORT_FILE = os.path.join(self.JSON_PATH, "load_report.json")
+
+        # 选择执行：只执行新增/变更/上次失败的用例（也可用--changed-only开启）
+        self.SELECT_CHANGED_ONLY = os.getenv("SELECT_CHANGED_ONLY", "False").lower() == "true"
+        # 选择执行模式下，距上次全量运行超过该小时数时强制全量（如每晚一次）
+        self.FULL_RUN_INTERVAL_HOURS = float(os.getenv("FULL_RUN_INTERVAL_HOURS", "24"))
+
+        # 失败重跑：最多重跑次数、单次运行的重跑时间预算（秒）
+        self.RERUN_COUNT = int(os.getenv("RERUN_COUNT", "1"))
+        self.RERUN_BUDGET_SECONDS = float(os.getenv("RERUN_BUDGET_SECONDS", "300"))
+        # 历史判定为不稳定的用例进入隔离名单：照常执行，失败不通知测试群/开发群
+        self.QUARANTINE_FLAKY = os.getenv("QUARANTINE_FLAKY", "True").lower() == "true"
+
+        # 共享前缀执行：多条用例共有的前置步骤只执行一次，其余用例恢复浏览器状态检查点后从分叉点继续
+        self.PREFIX_CHECKPOINT = os.getenv("PREFIX_CHECKPOINT", "True").lower() == "true"
+
+        # 每个步骤结束后采集页面导航/资源耗时与首次交互时间（写入步骤记录）；YAML中的budget_ms按步骤实际耗时判定
+        self.STEP_TIMING = os.getenv("STEP_TIMING", "True").lower() == "true"
+
+        # 浏览器资源采样：每个步骤结束时记录Chromium进程树CPU/内存与页面JS堆大小（写入运行历史库）
+        self.BROWSER_TELEMETRY = os.getenv("BROWSER_TELEMETRY", "True").lower() == "true"
+        # 常驻浏览器泄漏判定：最近LEAK_WINDOW条用例结束时的内存呈上升趋势，且比第一条用例增长超过LEAK_THRESHOLD_MB
+        self.LEAK_WINDOW = int(os.getenv("LEAK_WINDOW", "5"))
+        self.LEAK_THRESHOLD_MB = float(os.getenv("LEAK_THRESHOLD_MB", "300"))
+        # 判定泄漏后自动回收常驻浏览器（下一条用例重新启动），False时只在报告中提示
+        self.RECYCLE_ON_LEAK = os.getenv("RECYCLE_ON_LEAK", "True").lower() == "true"
+
+        # 采样分析（--profile）的采样间隔（毫秒）
+        self.PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+        # 链路追踪（等同--trace-events）：运行/用例/步骤/浏览器等待/后台HTTP请求的时间线，写入logs/trace/运行ID.json
+        self.TRACE_EVENTS = os.getenv("TRACE_EVENTS", "False").lower() == "true"
+
+        # 产物库：用例失败时保存截图与DOM快照；运行结束后早于ARTIFACT_COMPACT_DAYS天的产物按天归档，
+        # 超过ARTIFACT_RETENTION_DAYS天或总大小超过ARTIFACT_MAX_MB时从最早的归档开始删除
+        self.FAILURE_ARTIFACTS = os.getenv("FAILURE_ARTIFACTS", "True").lower() == "true"
+        self.ARTIFACT_COMPACT_DAYS = float(os.getenv("ARTIFACT_COMPACT_DAYS", "1"))
+        self.ARTIFACT_RETENTION_DAYS = float(os.getenv("ARTIFACT_RETENTION_DAYS", "30"))
+        self.ARTIFACT_MAX_MB = float(os.getenv("ARTIFACT_MAX_MB", "2048"))
+
+        # 网络抓包：按用例记录请求明细（关联触发的YAML步骤），运行结束后在报告中附带最慢/最大接口排行（前N名）
+        self.NETWORK_CAPTURE = os.getenv("NETWORK_CAPTURE", "False").lower() == "true"
+        self.ENDPOINT_RANK_TOP = int(os.getenv("ENDPOINT_RANK_TOP", "10"))
+
+        # 定位符自愈：主定位符等满超时仍未命中时按指纹尝试备选定位符；已自愈的定位符先短时探测（秒）自愈结果
+        self.LOCATOR_HEALING = os.getenv("LOCATOR_HEALING", "True").lower() == "true"
+        self.HEAL_PROBE_TIMEOUT = float(os.getenv("HEAL_PROBE_TIMEOUT", "3"))
+        # 元素指纹刷新周期（小时），周期内定位成功不重复记录
+        self.HEAL_REFRESH_HOURS = float(os.getenv("HEAL_REFRESH_HOURS", "24"))
+
+        # 运行历史分析（不稳定用例/耗时回归检测）
+        # 统计窗口：最近N次运行
+        self.HISTORY_WINDOW = int(os.getenv("HISTORY_WINDOW", "20"))
+        # 无历史耗时的用例按该值（秒）预估，用于排序与worker分配
+        self.DEFAULT_CASE_ESTIMATE = float(os.getenv("DEFAULT_CASE_ESTIMATE", "60"))
+        # p95耗时较上一窗口上涨超过该百分比即判定为耗时回归
+        self.P95_REGRESSION_PCT = float(os.getenv("P95_REGRESSION_PCT", "30"))
+        # 计算p95所需的最少样本数（样本不足时不做判定）
+        self.P95_MIN_SAMPLES = int(os.getenv("P95_MIN_SAMPLES", "5"))
+
+    def pos_url(self, url: str):
+        """POS地址按流量模式改写：record/replay下线上域名替换为本地替身地址，配置了预发环境时替换为预发地址"""
+        if url and url.startswith(self.POS_ORIGIN):
+            return self.POS_BASE_URL + url[len(self.POS_ORIGIN):]
+        return url
+
+    def config_snapshot(self):
+        """
+        当前配置快照（供YAML用例${VAR}变量替换）：所有大写配置项
+        :return: {变量名: 字符串值}
+        """
+        snapshot = {"BASE_DIR": self.BASE_DIR}
+        for key, value in vars(self).items():
+            if key.isupper() and isinstance(value, (str, int, float, bool)):
+                snapshot[key] = str(value)
+        return snapshot
+
     # ---------------- 常用路径快捷访问 ----------------
     @property
     def log_file(self):
@@ -99,6 +223,10 @@ class ConfigManager(object):
         """HTML报告路径（report.html）"""
         return os.path.join(self.BASE_DIR, "report.html")
 
+    def json_dir(self):
+        """JSON数据目录（json/）"""
+        return self.JSON_PATH
+
     def json_file(self, filename):
         """生成JSON文件完整路径（如json/report.json）"""
         return os.path.join(self.JSON_PATH, filename)
@@ -7,15 +7,23 @@
 @Description: 
 """
 
+import allure
 import pytest
-from common.data_init import CashierDataInit
+from common.data_init import data_init  # 模块级单例：常驻进程内重新导入conftest时沿用同一会话与登录态
+from common.yaml_util import variant_id
 from page_case.keyword_driver import KeywordDriver
+from page_case.step_timing import SLOW_PROPERTY
 from config.conf import cm
+from util.history_store import history_store, case_id_of, CASE_ID_PROPERTY
 from util.logger import logger_instance  # 导入你的日志实例
 
+# 项目内pytest插件
+pytest_plugins = ["common.case_manifest", "common.case_selector", "common.case_balancer", "common.case_rerun",
+                  "common.case_prefix", "util.pos_replay", "page_case.page_backend", "util.profiler",
+                  "common.case_trace"]
+
 # 日志别名（使用你的Logger单例）
 logger = logger_instance
-data_init = CashierDataInit()
 
 
 # 全局数据初始化Fixture
@@ -23,6 +31,11 @@ data_init = CashierDataInit()
 def init_test_data():
     """全局数据初始化（所有用例执行前运行1次）"""
     # 替换 logger.info 为 logger.log("INFO", ...)
+    if cm.PAGE_BACKEND == "fake":
+        # 干跑不访问线上环境
+        logger.log("INFO", "干跑模式：跳过全局数据初始化")
+        yield
+        return
     logger.log("INFO", "=" * 50)
     logger.log("INFO", "开始全局数据初始化：清空订单、发送优惠券、初始化会员数据")
     data_init.clear_test_data()
@@ -32,10 +45,64 @@ def init_test_data():
     logger.log("INFO", "测试完成，执行后置清理")
 
 
+# YAML用例参数化：按用例清单生成（不在导入时扫描目录，常驻进程内多次运行也能发现新增用例）
+# 含matrix的用例在此展开为多个变体，测试ID如 xxx.yaml-app_id=10014-lang=English
+def pytest_generate_tests(metafunc):
+    if "yaml_file" not in metafunc.fixturenames:
+        return
+    from common.case_manifest import case_manifest  # 已作为插件加载，这里取其单例
+    is_main = metafunc.definition.get_closest_marker(cm.MAIN_CASE_MARK)
+    mark = cm.MAIN_CASE_MARK if is_main else cm.OTHER_CASE_MARK
+    if "case_variables" not in metafunc.fixturenames:
+        metafunc.parametrize("yaml_file", case_manifest.files(mark))
+        return
+    metafunc.parametrize(("yaml_file", "case_variables"), [
+        pytest.param(yaml_file, variables, id="-".join(filter(None, [yaml_file, variant_id(variables)])))
+        for yaml_file, variables in case_manifest.variants(mark)
+    ])
+
+
 # 关键字驱动Fixture
 @pytest.fixture(scope="function")
-def keyword_driver():
+def keyword_driver(request):
     """每个用例创建1个KeywordDriver实例，自动setup/teardown"""
+    allure.dynamic.label(CASE_ID_PROPERTY, case_id_of(request.node))  # 多机结果合并时按用例标识汇总
     driver = KeywordDriver()
     yield driver
-    driver.teardown()  # 用例结束后自动关闭浏览器
+    # 用例失败且即将重跑时保留浏览器（含登录态），否则用例结束后自动关闭浏览器
+    rep_call = getattr(request.node, "rep_call", None)
+    keep_browser = bool(rep_call and rep_call.failed and getattr(request.node, "rerun_allowed", False))
+    driver.teardown(keep_browser=keep_browser)
+
+
+# 用例标识写入user_properties：报告按用例（含矩阵变体）汇总结果，而不是按测试类
+def pytest_itemcollected(item):
+    item.user_properties.append((CASE_ID_PROPERTY, case_id_of(item)))
+
+
+# 运行历史记录：每次用例执行（含步骤明细）写入SQLite历史库
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_makereport(item, call):
+    outcome = yield
+    report = outcome.get_result()
+    setattr(item, f"rep_{report.when}", report)  # 供fixture拆除时判断用例结果
+    if report.when != "call" and not (report.when == "setup" and report.outcome != "passed"):
+        return
+    driver = item.funcargs.get("keyword_driver") if hasattr(item, "funcargs") else None
+    # 通过但超出性能预算的用例标记为slow（报告中单独列出）
+    breaches = getattr(driver, "budget_breaches", None)
+    if report.when == "call" and report.passed and breaches:
+        report.user_properties.append((SLOW_PROPERTY, "；".join(breaches)))
+        allure.dynamic.label(SLOW_PROPERTY, "；".join(breaches))
+    if report.failed and cm.FAILURE_ARTIFACTS and driver is not None:
+        driver.save_failure_artifacts(case_id_of(item))
+    try:
+        history_store.record_case(
+            case_id=case_id_of(item),
+            outcome=report.outcome,
+            duration=report.duration,
+            steps=getattr(driver, "step_records", None),
+            message=report.longreprtext if report.failed else ""
+        )
+    except Exception as e:
+        logger.log("ERROR", f"❌ 写入运行历史失败：{str(e)}")
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+@Author: XieLong
+@Date: 2026/10/19
+@File: browser_pool.py
+@Description: 浏览器池：常驻运行（调度守护进程）时复用已启动的浏览器，用例之间只开关标签页
+"""
+import threading
+
+from config.conf import cm
+from page_case.browser_telemetry import browser_telemetry
+from util.logger import logger_instance as logger
+
+
+class BrowserPool:
+    """浏览器池（单例）：KEEP_BROWSER_WARM开启时复用浏览器，否则每次新建、用完即关"""
+    _instance = None
+
+    def __new__(cls, *args, **kwargs):
+        if not cls._instance:
+            cls._instance = super(BrowserPool, cls).__new__(cls)
+            cls._instance._browser = None
+            cls._instance._parked = None  # 失败待重跑的用例保留的浏览器（含登录态）
+            cls._instance._lock = threading.Lock()
+        return cls._instance
+
+    @property
+    def warm(self):
+        return cm.KEEP_BROWSER_WARM
+
+    def _launch(self):
+        # 由页面后端启动（真实浏览器或干跑用的内存假页面）；page_backend同时是pytest插件，这里延迟导入
+        from page_case.page_backend import page_backend
+        return page_backend().launch()
+
+    def _alive(self, browser):
+        try:
+            return browser.states.is_alive
+        except Exception:
+            return False
+
+    def acquire(self):
+        """获取浏览器：优先使用重跑保留的浏览器，常驻模式下复用存活的浏览器"""
+        parked, self._parked = self._parked, None
+        if parked is not None and self._alive(parked):
+            logger.log("INFO", "♻️ 复用失败用例保留的浏览器（保持登录态）")
+            return parked
+        if not self.warm:
+            return self._launch()
+        with self._lock:
+            if self._browser is None or not self._alive(self._browser):
+                self._browser = self._launch()
+                logger.log("INFO", "✅ 已启动常驻浏览器")
+            return self._browser
+
+    def release(self, browser):
+        """归还浏览器：常驻模式下保留（跨用例内存持续增长时按配置回收），否则直接关闭"""
+        if self.warm and browser is self._browser:
+            if cm.BROWSER_TELEMETRY:
+                self._check_leak(browser)
+            return
+        browser_telemetry.forget(browser)
+        browser.quit()
+
+    def _check_leak(self, browser):
+        leak = browser_telemetry.check_leak(browser)
+        if not leak:
+            return
+        logger.log("WARNING", f"🧠 疑似浏览器内存泄漏：{leak}")
+        browser_telemetry.record_leak(leak, recycled=cm.RECYCLE_ON_LEAK)
+        if cm.RECYCLE_ON_LEAK:
+            self.recycle()
+
+    def park(self, browser):
+        """保留浏览器供失败用例重跑时复用（非常驻模式下也不关闭）"""
+        if browser is self._browser:
+            return
+        self.discard_parked()
+        self._parked = browser
+
+    def discard_parked(self):
+        """关闭未被重跑使用的保留浏览器"""
+        parked, self._parked = self._parked, None
+        if parked is not None:
+            try:
+                parked.quit()
+            except Exception as e:
+                logger.log("WARNING", f"关闭保留的浏览器失败：{str(e)}")
+
+    def recycle(self):
+        """关闭并丢弃常驻浏览器（下次acquire时重新启动）"""
+        with self._lock:
+            if self._browser is not None:
+                browser_telemetry.forget(self._browser)
+                try:
+                    self._browser.quit()
+                except Exception as e:
+                    logger.log("WARNING", f"关闭常驻浏览器失败：{str(e)}")
+                self._browser = None
+                logger.log("INFO", "✅ 常驻浏览器已关闭")
+
+
+# 全局唯一浏览器池
+browser_pool = BrowserPool()
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+@Author: XieLong
+@Date: 2026/10/19
+@File: browser_telemetry.py
+@Description: 浏览器资源采样：每个步骤结束时记录Chromium进程树的CPU/内存（RSS）及页面JS堆大小；常驻浏览器跨用例内存持续增长超过阈值时判定为泄漏
+"""
+import json
+import os
+import statistics
+import time
+
+from config.conf import cm
+from util.history_store import history_store
+from util.logger import logger_instance as logger
+
+try:
+    import psutil
+except ImportError:  # 未安装psutil时只采集JS堆大小
+    psutil = None
+
+MB = 1024 * 1024
+# json/browser_leaks.json保留的泄漏记录条数
+LEAK_RECORDS_KEPT = 200
+
+
+class BrowserTelemetry:
+    """浏览器资源采样与泄漏检测（单例）"""
+    _instance = None
+
+    def __new__(cls, *args, **kwargs):
+        if not cls._instance:
+            cls._instance = super(BrowserTelemetry, cls).__new__(cls)
+            cls._instance._cpu = {}       # 浏览器进程ID → (上次采样时间, 进程树累计CPU时间)
+            cls._instance._case_rss = {}  # 浏览器进程ID → 每条用例结束时的进程树RSS（MB）
+            cls._instance._warned = False
+        return cls._instance
+
+    @staticmethod
+    def _pid(browser):
+        return getattr(browser, "process_id", None)
+
+    def _process_tree(self, pid):
+        if psutil is None:
+            if not self._warned:
+                self._warned = True
+                logger.log("WARNING", "未安装psutil，浏览器进程CPU/内存不采集（pip install psutil）")
+            return []
+        try:
+            root = psutil.Process(pid)
+            return [root] + root.children(recursive=True)
+        except psutil.Error:
+            return []
+
+    def process_usage(self, browser):
+        """
+        Chromium进程树的资源占用
+        :return: {"rss_mb", "cpu_pct", "processes"}，无法获取进程时返回None
+        """
+        pid = self._pid(browser)
+        processes = self._process_tree(pid) if pid else []
+        rss, cpu_seconds = 0, 0.0
+        for process in processes:
+            try:
+                with process.oneshot():
+                    rss += process.memory_info().rss
+                    times = process.cpu_times()
+                    cpu_seconds += times.user + times.system
+            except psutil.Error:
+                continue  # 渲染进程随标签页开关随时退出
+        if not rss:
+            return None
+        now = time.perf_counter()
+        last = self._cpu.get(pid)
+        self._cpu[pid] = (now, cpu_seconds)
+        # CPU占用按两次采样间的进程树CPU时间增量计算（退出的进程会使累计值变小，此时记为0）
+        cpu_pct = max(cpu_seconds - last[1], 0) / (now - last[0]) * 100 if last and now > last[0] else None
+        return {"rss_mb": round(rss / MB, 1), "cpu_pct": round(cpu_pct, 1) if cpu_pct is not None else None,
+                "processes": len(processes)}
+
+    @staticmethod
+    def js_heap(page):
+        """页面JS堆已用大小（MB），页面不支持CDP时返回None"""
+        try:
+            return round(page.run_cdp("Runtime.getHeapUsage")["usedSize"] / MB, 1)
+        except Exception:
+            return None
+
+    def sample(self, browser, page):
+        """步骤边界采样：{"rss_mb", "cpu_pct", "processes", "js_heap_mb"}，都无法获取时返回None"""
+        usage = self.process_usage(browser) if browser else None
+        heap = self.js_heap(page) if page else None
+        if usage is None and heap is None:
+            return None
+        return dict(usage or {}, js_heap_mb=heap)
+
+    def check_leak(self, browser):
+        """
+        用例结束时记录浏览器进程树RSS，判断是否泄漏：最近LEAK_WINDOW条用例的RSS呈上升趋势，
+        且比该浏览器第一条用例结束时增长超过LEAK_THRESHOLD_MB
+        :return: 泄漏时返回说明，否则返回None
+        """
+        pid = self._pid(browser)
+        usage = self.process_usage(browser) if pid else None
+        if usage is None:
+            return None
+        history = self._case_rss.setdefault(pid, [])
+        history.append(usage["rss_mb"])
+        window = history[-cm.LEAK_WINDOW:]
+        if len(window) < cm.LEAK_WINDOW:
+            return None
+        growth = window[-1] - history[0]
+        slope = statistics.linear_regression(range(len(window)), window).slope
+        if slope <= 0 or growth <= cm.LEAK_THRESHOLD_MB:
+            return None
+        return (f"浏览器（进程{pid}）已执行{len(history)}条用例，内存{history[0]:g}MB → {window[-1]:g}MB"
+                f"（+{growth:.0f}MB，最近{len(window)}条用例平均每条+{slope:.1f}MB）")
+
+    def forget(self, browser):
+        """浏览器关闭后清除其采样状态"""
+        pid = self._pid(browser)
+        self._cpu.pop(pid, None)
+        self._case_rss.pop(pid, None)
+
+    @staticmethod
+    def record_leak(message: str, recycled: bool):
+        """记录泄漏（json/browser_leaks.json，报告中附带本次运行的记录）"""
+        leak_file = cm.json_file("browser_leaks.json")
+        try:
+            with open(leak_file, "r", encoding="utf-8") as f:
+                leaks = json.load(f)
+        except (OSError, ValueError):
+            leaks = []
+        leaks.append({"run_id": history_store.run_id, "message": message, "recycled": recycled,
+                      "at": time.strftime("%Y-%m-%d %H:%M:%S")})
+        leaks = leaks[-LEAK_RECORDS_KEPT:]
+        os.makedirs(os.path.dirname(leak_file), exist_ok=True)
+        with open(leak_file, "w", encoding="utf-8") as f:
+            json.dump(leaks, f, ensure_ascii=False, indent=2)
+
+
+# 全局唯一浏览器资源采样
+browser_telemetry = BrowserTelemetry()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+@Author: XieLong
+@Date: 2026/10/19
+@File: checkpoint.py
+@Description: 共享前缀检查点：对所选用例建立步骤前缀树，共享前缀只执行一次，在分叉点保存浏览器状态（cookies/storage/URL）供其他用例恢复；
+只有按历史耗时衡量确有收益（前缀耗时 > 恢复耗时）的前缀才会规划
+"""
+import hashlib
+import json
+import os
+from collections import Counter
+
+from common.yaml_util import variant_id
+from util.history_store import history_store
+
+# 前缀中不能包含的步骤（执行后浏览器状态不可复用）
+CHECKPOINT_BLOCKERS = {"teardown"}
+# 尚未实测恢复耗时时的估算：恢复 = setup + 打开快照URL + 刷新，约为3次setup页面加载
+RESTORE_PAGE_LOADS = 3
+# 实测恢复耗时（滑动平均）在运行历史meta中的键
+RESTORE_SECONDS_KEY = "checkpoint_restore_seconds"
+
+
+def step_key(step: dict):
+    """步骤的规范化标识（忽略desc描述文字与budget_ms性能预算）"""
+    return json.dumps({k: v for k, v in step.items() if k not in ("desc", "budget_ms")}, sort_keys=True, ensure_ascii=False, default=str)
+
+
+def build_prefix_plan(cases: dict, step_seconds: dict, restore_seconds: float = None):
+    """
+    建立前缀树，找出每条用例与其他用例共享的最长前缀（分叉点）
+    前缀须以setup开头、不止setup一步（只有setup时恢复比直接执行更慢）、不含teardown，且至少两条用例共享；
+    前缀各步骤都要有历史耗时，且前缀耗时大于恢复耗时（实测值，未实测时按setup耗时估算）
+    :param cases: {用例标识: 步骤列表}
+    :param step_seconds: {用例标识: {步骤序号: 历史平均耗时}}
+    :param restore_seconds: 实测的检查点恢复耗时，None表示尚未实测
+    :return: {用例标识: (前缀步数, 前缀哈希)}
+    """
+    root = {"count": 0, "children": {}}
+    keys = {}
+    for case_id, steps in cases.items():
+        keys[case_id] = [step_key(s) for s in steps]
+        node = root
+        for key in keys[case_id]:
+            node = node["children"].setdefault(key, {"count": 0, "children": {}})
+            node["count"] += 1
+
+    plan = {}
+    for case_id, steps in cases.items():
+        if not steps or steps[0].get("action") != "setup":
+            continue
+        node, depth = root, 0
+        for index, (step, key) in enumerate(zip(steps, keys[case_id])):
+            node = node["children"][key]
+            if node["count"] < 2 or step.get("action") in CHECKPOINT_BLOCKERS:
+                break
+            depth = index + 1
+        # 前缀覆盖整条用例时无需检查点（两条完全相同的用例）
+        if not 1 < depth < len(steps):
+            continue
+        durations = step_seconds.get(case_id) or {}
+        if any(index not in durations for index in range(1, depth + 1)):
+            continue  # 没有历史耗时，收益无法衡量
+        prefix_seconds = sum(durations[index] for index in range(1, depth + 1))
+        restore = restore_seconds if restore_seconds is not None else RESTORE_PAGE_LOADS * durations[1]
+        if prefix_seconds <= restore:
+            continue
+        digest = hashlib.sha1("\n".join(keys[case_id][:depth]).encode("utf-8")).hexdigest()
+        plan[case_id] = (depth, digest)
+    # 同一前缀至少两条用例入选（一条执行并保存，其余恢复）
+    counts = Counter(digest for _, digest in plan.values())
+    return {case_id: entry for case_id, entry in plan.items() if counts[entry[1]] >= 2}
+
+
+def saving_text(saved_seconds: float):
+    """复用节省的耗时（恢复比执行前缀更慢时如实显示为多耗时）"""
+    if saved_seconds < 0:
+        return f"比完整执行多耗时约{-saved_seconds:g}s"
+    return f"节省步骤耗时约{saved_seconds:g}s"
+
+
+class CheckpointStore:
+    """检查点存储（单例，进程内）：{前缀哈希: 浏览器状态快照}"""
+    _instance = None
+
+    def __new__(cls, *args, **kwargs):
+        if not cls._instance:
+            cls._instance = super(CheckpointStore, cls).__new__(cls)
+            cls._instance.reset()
+        return cls._instance
+
+    def reset(self):
+        self.plan = {}  # {(YAML绝对路径, 矩阵变体标识): (前缀步数, 前缀哈希)}
+        self.snapshots = {}
+        self.reused = 0
+        self.saved_seconds = 0.0
+
+    @staticmethod
+    def case_key(yaml_path: str, variables: dict = None):
+        """用例在前缀计划中的标识（同一YAML的不同矩阵变体步骤不同，分别规划）"""
+        return os.path.abspath(yaml_path), variant_id(variables or {})
+
+    def set_plan(self, plan: dict):
+        self.plan = plan
+
+    def prefix_for(self, yaml_path: str, variables: dict = None):
+        return self.plan.get(self.case_key(yaml_path, variables))
+
+    def get(self, prefix_hash: str):
+        return self.snapshots.get(prefix_hash)
+
+    def save(self, prefix_hash: str, snapshot: dict):
+        self.snapshots[prefix_hash] = snapshot
+
+    def record_reuse(self, snapshot: dict, restore_seconds: float):
+        """记录一次复用及节省的步骤耗时（前缀原耗时 - 恢复耗时，恢复更慢时为负），并更新实测恢复耗时"""
+        self.reused += 1
+        self.saved_seconds += snapshot["prefix_seconds"] - restore_seconds
+        measured = self.measured_restore_seconds()
+        average = restore_seconds if measured is None else measured * 0.7 + restore_seconds * 0.3
+        history_store.set_meta(RESTORE_SECONDS_KEY, round(average, 3))
+
+    @staticmethod
+    def measured_restore_seconds():
+        """实测的检查点恢复耗时（滑动平均），尚未恢复过时为None"""
+        value = history_store.get_meta(RESTORE_SECONDS_KEY)
+        return float(value) if value is not None else None
+
+    def summary(self):
+        return {
+            "prefixes": len(set(h for _, h in self.plan.values())),
+            "planned_cases": len(self.plan),
+            "reused": self.reused,
+            "saved_seconds": round(self.saved_seconds, 1)
+        }
+
+
+# 全局唯一检查点存储
+checkpoint_store = CheckpointStore()
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+@Author: XieLong
+@Date: 2026/10/19
+@File: fake_page.py
+@Description: 内存假页面（干跑/引擎基准用）：按脚本文件模拟元素是否存在、元素文本、操作延迟及接口响应，接口与DrissionPage页面对象一致
+"""
+import json
+import re
+import time
+from types import SimpleNamespace
+
+import yaml
+
+from config.conf import cm
+from page_case.page_script import script_name
+
+# 未在脚本中指定文本时，从定位符中的文本条件推断（如 contains(text(), "折扣已应用")）
+TEXT_IN_LOCATOR = re.compile(r"""(?:text\(\)|normalize-space\(\.?\))\s*,?\s*=?\s*["']([^"']+)["']""")
+
+
+def normalize_locator(locator):
+    """定位符规范化为 xpath:... / css:...（脚本中的定位符与执行时的定位符按同一形式匹配）"""
+    if isinstance(locator, (list, tuple)):
+        by, selector = str(locator[0]).lower(), str(locator[1])
+    elif ":" in locator and not locator.startswith(("/", "(")):
+        by, selector = locator.split(":", 1)
+        by = by.lower()
+    else:
+        by, selector = "xpath", locator
+    if by in ("x", "xpath"):
+        return f"xpath:{selector}"
+    if by in ("c", "css", "css selector"):
+        return f"css:{selector}"
+    return f"{by}:{selector}"
+
+
+class FakeElementNotFoundError(Exception):
+    """假页面中元素不存在（对应DrissionPage的ElementNotFoundError）"""
+
+
+class FakeUnsupportedScriptError(Exception):
+    """假页面不支持的页内脚本（未以PageScript命名，或名称没有对应的模拟钩子）"""
+
+
+class FakeScript:
+    """假页面脚本（YAML）：default默认行为，elements按定位符覆盖，responses按URL片段指定接口响应"""
+
+    def __init__(self, script_file: str):
+        try:
+            with open(script_file, "r", encoding="utf-8") as f:
+                script = yaml.safe_load(f) or {}
+        except FileNotFoundError:
+            script = {}
+        self.default = {"present": True, "latency_ms": 0, "response": {"status": 200, "body": {"code": 1}}}
+        self.default.update(script.get("default") or {})
+        self.elements = {normalize_locator(k): v or {} for k, v in (script.get("elements") or {}).items()}
+        self.responses = script.get("responses") or {}
+
+    def element(self, locator):
+        """定位符对应的元素设定：present/text/latency_ms"""
+        key = normalize_locator(locator)
+        spec = dict(self.default)
+        spec.update(self.elements.get(key, {}))
+        if "text" not in spec:
+            match = TEXT_IN_LOCATOR.search(key)
+            spec["text"] = match.group(1) if match else ""
+        return spec
+
+    def response(self, url_part: str):
+        for pattern, response in self.responses.items():
+            if pattern in url_part or url_part in pattern:
+                return response
+        return self.default["response"]
+
+
+def _sleep_ms(latency_ms):
+    if latency_ms:
+        time.sleep(float(latency_ms) / 1000)
+
+
+def _dispatch_script(target, hooks: dict, script, *args):
+    """按PageScript名称调用模拟钩子；不比对JS源码，无名称或名称未知时抛出FakeUnsupportedScriptError"""
+    hook = hooks.get(script_name(script))
+    if hook is None:
+        source = " ".join(str(script).split())[:60]
+        raise FakeUnsupportedScriptError(
+            f"{type(target).__name__}不支持该页内脚本（名称：{script_name(script)}，脚本：{source}...），"
+            f"请以PageScript声明并在SCRIPT_HOOKS中添加模拟钩子")
+    return hook(target, *args)
+
+
+class FakeNoneElement:
+    """元素不存在（为假值，任何操作都抛出未找到异常，与DrissionPage的NoneElement一致）"""
+
+    def __init__(self, locator):
+        self.locator = locator
+
+    def __bool__(self):
+        return False
+
+    def __getattr__(self, name):
+        raise FakeElementNotFoundError(f"元素不存在：{self.locator}")
+
+
+class FakeElement:
+    def __init__(self, locator, spec: dict):
+        self.locator = locator
+        self.text = str(spec["text"])
+        self.latency_ms = spec["latency_ms"]
+        self.tag = spec.get("tag", "div")
+        self.attrs = spec.get("attrs", {})
+
+    def click(self):
+        _sleep_ms(self.latency_ms)
+        return True
+
+    def clear(self):
+        self.text = ""
+        return self
+
+    def input(self, text):
+        _sleep_ms(self.latency_ms)
+        self.text = str(text)
+        return self
+
+    def run_js(self, script, *args, **kwargs):
+        """按页内脚本名称分派到对应的模拟钩子，未知脚本直接报错"""
+        return _dispatch_script(self, self.SCRIPT_HOOKS, script, *args)
+
+    def _fingerprint(self):
+        return json.dumps({"tag": self.tag, "text": self.text, "attrs": self.attrs, "path": ""})
+
+    # 元素上支持的脚本：{PageScript名称: 模拟钩子}
+    SCRIPT_HOOKS = {"element_fingerprint": _fingerprint}
+
+
+class FakeListener:
+    def __init__(self, page):
+        self.page = page
+        self.target = None
+
+    def start(self, targets=None, **kwargs):
+        self.target = targets if isinstance(targets, str) else ""
+
+    def wait(self, timeout=None, **kwargs):
+        response = self.page.script.response(self.target)
+        _sleep_ms(response.get("latency_ms", 0))
+        url = self.page.url.split("#")[0].rstrip("/") + "/" + self.target.lstrip("/")
+        return SimpleNamespace(url=url, method=response.get("method", "POST"),
+                               response=SimpleNamespace(status=response.get("status", 200), body=response.get("body")))
+
+    def stop(self):
+        self.target = None
+
+
+class FakePage:
+    """假页面（标签页）"""
+
+    def __init__(self, script: FakeScript):
+        self.script = script
+        self.url = "about:blank"
+        self._cookies = []
+        self._storage = {"local": "{}", "session": "{}"}
+        self.listen = FakeListener(self)
+        self.scroll = SimpleNamespace(to_bottom=lambda: None)
+        self.set = SimpleNamespace(cookies=self._set_cookies)
+
+    def get(self, url, **kwargs):
+        _sleep_ms(self.script.default["latency_ms"])
+        self.url = url
+        return True
+
+    def refresh(self):
+        _sleep_ms(self.script.default["latency_ms"])
+
+    def close(self):
+        pass
+
+    @property
+    def html(self):
+        return f"<html><body data-url=\"{self.url}\"></body></html>"
+
+    def get_screenshot(self, path=None, name=None, as_bytes=None, **kwargs):
+        """假截图：同一URL内容相同（产物库按内容去重）"""
+        return b"\x89PNG\r\n\x1a\n" + self.url.encode("utf-8")
+
+    def cookies(self, all_domains=False, all_info=False):
+        return list(self._cookies)
+
+    def _set_cookies(self, cookies):
+        self._cookies = list(cookies)
+
+    def ele(self, locator, timeout=None):
+        spec = self.script.element(locator)
+        _sleep_ms(spec["latency_ms"])
+        return FakeElement(locator, spec) if spec["present"] else FakeNoneElement(locator)
+
+    def eles(self, locator, timeout=None):
+        element = self.ele(locator, timeout)
+        return [element] if element else []
+
+    def run_js(self, script, *args, **kwargs):
+        """按页内脚本名称（PageScript.name）分派到对应的模拟钩子，未知脚本直接报错"""
+        return _dispatch_script(self, self.SCRIPT_HOOKS, script, *args)
+
+    def _multi_text(self, spec_json, *args):
+        texts = []
+        for spec in json.loads(spec_json):
+            element = self.ele(f"{'xpath' if spec['kind'] == 'xpath' else 'css'}:{spec['selector']}")
+            texts.append(element.text if element else None)
+        return json.dumps(texts, ensure_ascii=False)
+
+    def _perf_timing(self, *args):
+        # 假页面没有真实的导航/资源请求
+        return json.dumps({"navigation": None, "resources": {"count": 0, "transfer_kb": 0, "slowest": []},
+                           "first_input": None})
+
+    def _local_storage(self):
+        return self._storage["local"]
+
+    def _session_storage(self):
+        return self._storage["session"]
+
+    def _restore_storage(self, local, session):
+        self._storage = {"local": local, "session": session}
+
+    # 页面上支持的脚本：{PageScript名称: 模拟钩子}
+    SCRIPT_HOOKS = {
+        "multi_text": _multi_text,
+        "perf_timing": _perf_timing,
+        "local_storage": _local_storage,
+        "session_storage": _session_storage,
+        "restore_storage": _restore_storage,
+    }
+
+
+class FakeBrowser:
+    """假浏览器：new_tab()返回假页面"""
+
+    def __init__(self):
+        self.script = FakeScript(cm.FAKE_PAGE_SCRIPT)
+        self.states = SimpleNamespace(is_alive=True)
+
+    def new_tab(self):
+        return FakePage(self.script)
+
+    def quit(self):
+        self.states.is_alive = False
@@ -6,10 +6,62 @@
 @File: keyword_driver.py
 @Description: 关键字驱动核心类（修复KeyError+元素定位，区分shop/cashier登录）
 """
-from DrissionPage import Chromium, ChromiumOptions
-from common.yaml_util import YamlUtil
+import json
+import time
+import allure
+from common.yaml_util import YamlUtil, split_case, variant_id
+from page_case.browser_pool import browser_pool
+from page_case.browser_telemetry import browser_telemetry
+from page_case.checkpoint import checkpoint_store
+from page_case.locator_healer import locator_healer, locator_key, candidate_locators, LOOSE_STRATEGIES
+from page_case.network_capture import NetworkCapture
+from page_case.page_script import PageScript
+from page_case.step_timing import collect_step_timing, check_budget
 from config.conf import cm
+from util.artifact_store import artifact_store
+from util.history_store import history_store
 from util.logger import logger_instance as logger
+from util.tracer import tracer
+
+# 多项文本断言的页内脚本：一次调用内轮询所有定位符，全部匹配或超时后返回各项实际文本（未找到为null）
+MULTI_TEXT_JS = PageScript("multi_text", """
+function (specJson, timeoutMs) {
+    var specs = JSON.parse(specJson);
+    function find(spec) {
+        if (spec.kind === "xpath") {
+            return document.evaluate(spec.selector, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+        }
+        return document.querySelector(spec.selector);
+    }
+    function collect() {
+        return specs.map(function (spec) {
+            var el = find(spec);
+            return el ? (el.innerText || el.textContent || "").trim() : null;
+        });
+    }
+    var deadline = Date.now() + timeoutMs;
+    return new Promise(function (resolve) {
+        (function poll() {
+            var actual = collect();
+            var done = actual.every(function (text, i) { return text === specs[i].expected; });
+            if (done || Date.now() >= deadline) {
+                resolve(JSON.stringify(actual));
+            } else {
+                setTimeout(poll, 100);
+            }
+        })();
+    });
+}
+""")
+
+# 共享前缀检查点：读取/恢复页面存储
+LOCAL_STORAGE_JS = PageScript("local_storage", "return JSON.stringify(Object.assign({}, window.localStorage));")
+SESSION_STORAGE_JS = PageScript("session_storage", "return JSON.stringify(Object.assign({}, window.sessionStorage));")
+RESTORE_STORAGE_JS = PageScript("restore_storage", """
+    var local = JSON.parse(arguments[0]), session = JSON.parse(arguments[1]);
+    Object.keys(local).forEach(function (k) { window.localStorage.setItem(k, local[k]); });
+    Object.keys(session).forEach(function (k) { window.sessionStorage.setItem(k, session[k]); });
+""")
 
 
 class KeywordDriver:
@@ -17,39 +69,106 @@ class KeywordDriver:
         self.browser = None  # 浏览器实例
         self.page = None     # 页面实例
         self.yaml_util = YamlUtil()
+        self.step_records = []  # 最近一次run_yaml_case的步骤执行记录（写入运行历史库）
+        self.budget_breaches = []  # 最近一次run_yaml_case中超出性能预算（budget_ms）的步骤/用例
+        self.capture = None  # 网络抓包（NETWORK_CAPTURE开启时在run_yaml_case期间存在）
 
     def setup(self, url: str = None):
         """初始化浏览器和页面（适配版本，确保兼容）"""
         try:
-            co = ChromiumOptions()
-            if cm.HEADLESS_MODE:
-                co = co.headless()  # 无头模式配置（从.env读取）
-            self.browser = Chromium(co)
+            # 浏览器由浏览器池提供（常驻模式下复用已启动的浏览器）
+            self.browser = browser_pool.acquire()
             self.page = self.browser.new_tab()  # 适配DrissionPage 4.1.1.2版本
+            if self.capture:
+                self._attach_capture()
 
             target_url = url or cm.TEST_URL
             if not target_url:
                 raise ValueError("测试地址未配置，请检查.env的TEST_URL")
-            self.page.get(target_url)
+            self.open_url(target_url)
             logger.log("INFO", f"✅ 已打开页面：{target_url}")
         except Exception as e:
             logger.log("ERROR", f"❌ 浏览器初始化失败：{str(e)}")
             raise
 
-    def teardown(self):
-        """关闭浏览器和页面，释放资源"""
-        if self.page:
-            self.page.close()
+    def teardown(self, keep_browser: bool = False):
+        """
+        关闭浏览器和页面，释放资源
+        :param keep_browser: 保留浏览器（含登录态）供失败重跑复用
+        """
+        try:
+            locator_healer.flush()
+        except Exception as e:
+            logger.log("WARNING", f"写入元素指纹库失败：{str(e)}")
+        # 释放后置空，YAML中的teardown步骤与fixture拆除不会重复关闭
+        if self.capture:
+            self.capture.detach()
+        page, self.page = self.page, None
+        browser, self.browser = self.browser, None
+        if page:
+            page.close()
             logger.log("INFO", "✅ 页面已关闭")
-        if self.browser:
-            self.browser.quit()
-            logger.log("INFO", "✅ 浏览器已关闭")
+        if browser:
+            if keep_browser:
+                browser_pool.park(browser)
+                return
+            browser_pool.release(browser)
+            if not browser_pool.warm:
+                logger.log("INFO", "✅ 浏览器已关闭")
+
+    def open_url(self, url: str):
+        """打开页面（等待页面加载，链路追踪中记为浏览器等待）"""
+        with tracer.span("页面加载", "browser", url=url):
+            self.page.get(url)
+
+    def find(self, locator, desc: str, timeout: int = 20, loose: bool = False):
+        """
+        定位元素（带自愈）：主定位符按正常超时等待，仍未命中时才按指纹生成的备选定位符尝试（唯一命中即采用）；
+        本进程内已自愈的定位符先短时探测自愈结果；定位成功时记录/刷新元素指纹
+        :param locator: 字符串定位符，或YAML中的列表形式 ["xpath", "..."]
+        :param loose: 是否允许宽松的备选策略（class、绝对路径），只用于读取类操作，点击/输入不使用
+        :return: 元素（未找到时为DrissionPage的NoneElement，后续操作会抛出未找到异常）
+        """
+        with tracer.span(f"等待元素：{desc}", "browser", locator=str(locator)) as args:
+            ele = self._find(locator, desc, timeout, loose)
+            args["found"] = bool(ele)
+            return ele
+
+    def _find(self, locator, desc: str, timeout: int, loose: bool):
+        loc = tuple(locator) if isinstance(locator, list) else locator
+        if not cm.LOCATOR_HEALING:
+            return self.page.ele(loc, timeout=timeout)
+
+        start = time.perf_counter()
+        healed = locator_healer.healed.get(locator_key(locator))
+        if healed and (loose or healed[1] not in LOOSE_STRATEGIES):
+            ele = self.page.ele(healed[0], timeout=min(timeout, cm.HEAL_PROBE_TIMEOUT))
+            if ele:
+                return ele
+
+        # 主定位符等满正常超时：页面正确但加载慢时不会误用备选定位符
+        remaining = max(timeout - (time.perf_counter() - start), 0)
+        ele = self.page.ele(loc, timeout=remaining)
+        if ele:
+            if locator_healer.needs_refresh(locator):
+                locator_healer.record(locator, ele)
+            return ele
+        fingerprint = locator_healer.get(locator)
+        if not fingerprint:
+            return ele
+
+        for strategy, candidate in candidate_locators(fingerprint, loose):
+            matches = self.page.eles(candidate, timeout=0)
+            if len(matches) == 1:
+                locator_healer.record_heal(locator, candidate, strategy, desc)
+                return matches[0]
+        return ele
 
     def click(self, locator: str, desc: str, timeout: int = 20):
         """点击操作（支持超时等待，定位符为字符串XPath）"""
         try:
             # 增加超时等待，适配页面加载慢的场景；多定位符用逗号分隔（版本兼容）
-            self.page.ele(locator, timeout=timeout).click()
+            self.find(locator, desc, timeout).click()
             logger.log("INFO", f"✅ 点击完成：{desc}")
         except Exception as e:
             logger.log("ERROR", f"❌ 点击失败（{desc}）：{str(e)}")
@@ -59,7 +178,7 @@ class KeywordDriver:
         """输入操作（支持超时等待，对齐demo的ele(xpath).clear().input()）"""
         try:
             # 增加超时等待，多定位符用逗号分隔（修复竖线不兼容问题）
-            self.page.ele(locator, timeout=timeout).clear().input(text)
+            self.find(locator, desc, timeout).clear().input(text)
             logger.log("INFO", f"✅ 输入完成：{desc}（内容：{text}）")
         except Exception as e:
             logger.log("ERROR", f"❌ 输入失败（{desc}）：{str(e)}")
@@ -68,7 +187,7 @@ class KeywordDriver:
     def assert_text(self, locator: str, expected_text: str, desc: str, timeout: int = 20):
         """文本断言（支持超时等待，按定位符获取文本）"""
         try:
-            actual_text = self.page.ele(locator, timeout=timeout).text
+            actual_text = self.find(locator, desc, timeout, loose=True).text
             assert actual_text == expected_text, \
                 f"断言失败：实际[{actual_text}] != 预期[{expected_text}]"
             logger.log("INFO", f"✅ 断言完成：{desc}")
@@ -79,13 +198,137 @@ class KeywordDriver:
             logger.log("ERROR", f"❌ 断言异常（{desc}）：{str(e)}")
             raise
 
+    @staticmethod
+    def _js_locator(locator):
+        """把定位符转换为页内脚本可用的 (类型, 选择器)，只支持XPath和CSS"""
+        if isinstance(locator, (list, tuple)) and len(locator) == 2:
+            by, selector = str(locator[0]).lower(), locator[1]
+        elif isinstance(locator, str) and ":" in locator and not locator.startswith(("/", "(")):
+            by, selector = locator.split(":", 1)
+            by = by.lower()
+        elif isinstance(locator, str):
+            by, selector = "xpath", locator
+        else:
+            raise ValueError(f"不支持的定位符：{locator}")
+        if by in ("xpath", "x"):
+            return "xpath", selector
+        if by in ("css", "c", "css selector"):
+            return "css", selector
+        raise ValueError(f"多项断言只支持xpath/css定位符：{locator}")
+
+    def assert_texts(self, expected, desc: str, timeout: int = 20):
+        """
+        多项文本断言：一次页内脚本取回全部定位符的文本（统一等待最慢的一项），所有不符项一起报告
+        :param expected: {定位符: 预期文本}，或 [{"locator": 定位符, "expected": 预期文本}]（定位符为列表时使用）
+        """
+        try:
+            if isinstance(expected, dict):
+                pairs = list(expected.items())
+            else:
+                pairs = [(item["locator"], item["expected"]) for item in expected]
+            if not pairs:
+                raise ValueError("多项断言缺少expected")
+            specs = []
+            for locator, expected_text in pairs:
+                kind, selector = self._js_locator(locator)
+                specs.append({"kind": kind, "selector": selector, "expected": str(expected_text).strip()})
+
+            with tracer.span(f"等待文本：{desc}", "browser", count=len(specs)):
+                actual = json.loads(self.page.run_js(MULTI_TEXT_JS, json.dumps(specs, ensure_ascii=False),
+                                                     timeout * 1000, timeout=timeout + 5))
+            mismatches = []
+            for (locator, _), spec, actual_text in zip(pairs, specs, actual):
+                if actual_text is None:
+                    mismatches.append(f"{locator}：未找到元素（预期[{spec['expected']}]）")
+                elif actual_text != spec["expected"]:
+                    mismatches.append(f"{locator}：实际[{actual_text}] != 预期[{spec['expected']}]")
+            assert not mismatches, f"断言失败（{len(mismatches)}/{len(specs)}项不符）：\n" + "\n".join(mismatches)
+            logger.log("INFO", f"✅ 断言完成：{desc}（{len(specs)}项）")
+        except AssertionError as ae:
+            logger.log("ERROR", f"❌ 断言失败（{desc}）：{str(ae)}")
+            raise
+        except Exception as e:
+            logger.log("ERROR", f"❌ 断言异常（{desc}）：{str(e)}")
+            raise
+
+    @staticmethod
+    def _json_field(body, path: str):
+        """按点分路径取JSON字段（列表用下标），如 data.items.0.price"""
+        value = body
+        for key in str(path).split("."):
+            if isinstance(value, list):
+                value = value[int(key)]
+            elif isinstance(value, dict):
+                value = value[key]
+            else:
+                raise KeyError(path)
+        return value
+
+    @staticmethod
+    def _values_equal(actual, expected):
+        """接口字段比较：值相等，或字符串形式相等，或同为数值且相等（"9.00" 与 9.0）"""
+        if actual == expected or str(actual) == str(expected):
+            return True
+        if isinstance(actual, bool) or isinstance(expected, bool):
+            return False
+        try:
+            return float(actual) == float(expected)
+        except (TypeError, ValueError):
+            return False
+
+    def expect_response(self, url: str, steps, expect: dict, desc: str, case_name: str, method=None,
+                        regex: bool = False, status: int = None, timeout: int = 20):
+        """
+        接口响应断言：先开启网络监听，再执行触发操作，等待匹配URL的XHR/Fetch响应并断言JSON字段
+        监听只保留匹配URL的XHR/Fetch数据包，其余流量不缓存，内存占用有界
+        :param url: 接口URL片段（regex为True时为正则）
+        :param steps: 触发请求的步骤（单个步骤或步骤列表，与YAML步骤格式相同）
+        :param expect: {JSON字段路径: 预期值}，如 {"code": 1, "data.total": "9.00"}
+        """
+        try:
+            self.page.listen.start(targets=url, is_regex=regex, method=method or ("GET", "POST"),
+                                   res_type=("XHR", "Fetch"))
+            try:
+                for step in (steps if isinstance(steps, list) else [steps]):
+                    action = step.get("action")
+                    self._run_step(step, action, step.get("desc", f"执行{action}操作"), case_name)
+                with tracer.span(f"等待接口响应：{url}", "browser") as args:
+                    packet = self.page.listen.wait(timeout=timeout, raise_err=False)
+                    args["captured"] = bool(packet)
+            finally:
+                self.page.listen.stop()
+            assert packet, f"断言失败：{timeout}s内未捕获到接口响应[{url}]"
+
+            response = packet.response
+            mismatches = []
+            if status is not None and response.status != status:
+                mismatches.append(f"HTTP状态：实际[{response.status}] != 预期[{status}]")
+            body = response.body
+            assert isinstance(body, (dict, list)), f"断言失败：接口响应不是JSON（{packet.url}）：{str(body)[:200]}"
+            for path, expected_value in (expect or {}).items():
+                try:
+                    actual_value = self._json_field(body, path)
+                except (KeyError, IndexError, ValueError):
+                    mismatches.append(f"{path}：字段不存在（预期[{expected_value}]）")
+                    continue
+                if not self._values_equal(actual_value, expected_value):
+                    mismatches.append(f"{path}：实际[{actual_value}] != 预期[{expected_value}]")
+            assert not mismatches, f"断言失败（{packet.method} {packet.url}）：\n" + "\n".join(mismatches)
+            logger.log("INFO", f"✅ 接口断言完成：{desc}（{packet.url}）")
+        except AssertionError as ae:
+            logger.log("ERROR", f"❌ 接口断言失败（{desc}）：{str(ae)}")
+            raise
+        except Exception as e:
+            logger.log("ERROR", f"❌ 接口断言异常（{desc}）：{str(e)}")
+            raise
+
     # -------------------------- Shop端登录（统一账密+版本兼容定位）--------------------------
     def login_shop(self, app_id: str, desc: str):
         """Shop端登录（按demo定位，统一账密echo0726@{app_id}/xl0120XL@@）"""
         try:
             # Shop登录页URL（按用户提供的demo）
-            shop_login_url = "https://pos.amfuture.sg/shop/#/login"
-            self.page.get(shop_login_url)
+            shop_login_url = cm.pos_url("https://pos.amfuture.sg/shop/#/login")
+            self.open_url(shop_login_url)
             logger.log("INFO", f"✅ 已打开Shop登录页：{shop_login_url}")
 
             # 统一账密（按用户要求，动态拼接app_id）
@@ -127,7 +370,7 @@ class KeywordDriver:
         """Cashier端登录（修复多定位符格式，统一账密）"""
         try:
             # Cashier登录页URL（从配置读取，确保灵活）
-            self.page.get(cm.TEST_URL)
+            self.open_url(cm.TEST_URL)
             logger.log("INFO", f"✅ 已打开Cashier登录页：{cm.TEST_URL}")
 
             # 统一账密（按用户要求，动态拼接app_id）
@@ -167,45 +410,175 @@ class KeywordDriver:
             logger.log("ERROR", f"❌ PIN码输入失败（{desc}）：{str(e)}")
             raise
 
-    def run_yaml_case(self, yaml_path: str):
-        """执行YAML用例（修复KeyError：app_id加默认值，支持shop/cashier登录）"""
+    def run_yaml_case(self, yaml_path: str, variables: dict = None):
+        """
+        执行YAML用例（修复KeyError：app_id加默认值，支持shop/cashier登录）
+        :param variables: 矩阵变体的变量（如{"app_id": 10014, "lang": "English"}），替换步骤中的${参数名}
+        """
         try:
-            case_data = self.yaml_util.read_yaml(yaml_path)
-            case_name = list(case_data.keys())[0]
-            steps = case_data[case_name]
+            case_data = self.yaml_util.read_yaml(yaml_path, variables)
+            case_name, steps, meta = split_case(case_data)
+            if variables:
+                case_name = f"{case_name}[{variant_id(variables)}]"
             logger.log("INFO", f"📢 开始执行用例：{case_name}")
+            if cm.NETWORK_CAPTURE:
+                self.capture = NetworkCapture(case_name)
+                if self.page:
+                    self._attach_capture()
+
+            # 共享前缀：已有检查点时恢复浏览器状态并跳过前缀步骤，否则执行到分叉点后保存检查点
+            prefix = checkpoint_store.prefix_for(yaml_path, variables) if cm.PREFIX_CHECKPOINT else None
+            restored = bool(prefix) and self._restore_checkpoint(prefix[1])
 
-            for step in steps:
+            self.step_records = []
+            self.budget_breaches = []
+            case_start = time.perf_counter()
+            for index, step in enumerate(steps, start=1):
                 action = step.get("action")
                 desc = step.get("desc", f"执行{action}操作")
-                locator = step.get("locator")  # 定位符为字符串XPath（多定位符逗号分隔）
-
-                # 步骤映射：修复app_id缺失问题（加默认值"test_app"）
-                if action == "click":
-                    self.click(locator, desc)
-                elif action == "input_text":
-                    self.input_text(locator, step["text"], desc)
-                elif action == "assert_text":
-                    self.assert_text(locator, step["expected"], desc)
-                elif action == "login_shop":
-                    # 安全获取app_id：YAML缺失时用默认值"test_app"，避免KeyError
-                    app_id = step.get("app_id", "test_app")
-                    self.login_shop(app_id, desc)
-                elif action == "login_cashier":
-                    # 安全获取app_id：同上，兼容YAML配置缺失场景
-                    app_id = step.get("app_id", "test_app")
-                    self.login_cashier(app_id, desc)
-                elif action == "input_pin":
-                    self.input_pin(step["num"], step["choose_num"], desc, step.get("status", 0))
-                elif action == "setup":
-                    self.setup(step.get("url"))
-                elif action == "scroll_to_bottom":
-                    self.page.scroll.to_bottom()
-                    logger.log("INFO", f"✅ 滚动完成：{desc}")
-                else:
-                    raise ValueError(f"不支持的操作：{action}（用例：{case_name}）")
+                if restored and index <= prefix[0]:
+                    self.step_records.append({"index": index, "action": action, "desc": desc,
+                                              "outcome": "reused", "duration": 0.0})
+                    continue
+                record = {"index": index, "action": action, "desc": desc, "outcome": "failed"}
+                self.step_records.append(record)
+                if self.capture:
+                    self.capture.step = (index, desc)
+                started_at, start = time.time(), time.perf_counter()
+                try:
+                    with tracer.span(f"步骤{index}：{desc}", "step", action=action, case=case_name):
+                        self._run_step(step, action, desc, case_name)
+                    record["outcome"] = "passed"
+                finally:
+                    record["duration"] = round(time.perf_counter() - start, 3)
+                if cm.STEP_TIMING:
+                    record["timing"] = collect_step_timing(self.page, started_at)
+                if cm.BROWSER_TELEMETRY:
+                    record["telemetry"] = browser_telemetry.sample(self.browser, self.page)
+                breach = check_budget(record["duration"], step.get("budget_ms"), f"步骤{index}（{desc}）")
+                if breach:
+                    record["outcome"] = "slow"
+                    self.budget_breaches.append(breach)
+                    logger.log("WARNING", f"🐢 超出性能预算：{breach}")
+                if prefix and not restored and index == prefix[0]:
+                    self._save_checkpoint(prefix[1], time.perf_counter() - case_start)
 
+            # 用例预算按本次实际执行的步骤计（复用的共享前缀不计）
+            executed = sum(r["duration"] for r in self.step_records if r["outcome"] != "reused")
+            breach = check_budget(executed, meta.get("budget_ms"), f"用例{case_name}")
+            if breach:
+                self.budget_breaches.append(breach)
+                logger.log("WARNING", f"🐢 超出性能预算：{breach}")
             logger.log("INFO", f"🎉 用例执行完成：{case_name}")
         except Exception as e:
             logger.log("ERROR", f"❌ 用例执行失败：{str(e)}")
-            raise
\ No newline at end of file
+            raise
+        finally:
+            if self.capture:
+                self.capture.close()
+                self.capture = None
+
+    def save_failure_artifacts(self, case_id: str):
+        """用例失败时保存页面截图与DOM快照到产物库（相同截图只存一份），同时附到Allure报告；采集失败不影响用例结果"""
+        if self.page is None:
+            return
+        for kind, ext, attachment_type, grab in (
+                ("screenshot", ".png", allure.attachment_type.PNG, lambda: self.page.get_screenshot(as_bytes="png")),
+                ("dom", ".html", allure.attachment_type.HTML, lambda: self.page.html)):
+            try:
+                data = grab()
+                sha256 = artifact_store.put(data, kind, f"{kind}{ext}", ext, history_store.run_id, case_id)
+                allure.attach(data, name=f"失败{kind}", attachment_type=attachment_type)
+                logger.log("INFO", f"📸 已保存失败{kind}：{sha256[:12]}（{case_id}）")
+            except Exception as e:
+                logger.log("WARNING", f"保存失败{kind}失败：{str(e)}")
+
+    def _attach_capture(self):
+        """网络抓包开始监听当前页面（失败时只记录警告，不影响用例执行）"""
+        try:
+            self.capture.attach(self.page)
+        except Exception as e:
+            logger.log("WARNING", f"网络抓包启动失败，本页面不抓包：{str(e)}")
+
+    # -------------------------- 共享前缀检查点 --------------------------
+    def snapshot_state(self):
+        """保存当前浏览器状态：cookies、localStorage、sessionStorage、URL"""
+        return {
+            "url": self.page.url,
+            "cookies": list(self.page.cookies(all_domains=True, all_info=True)),
+            "local_storage": self.page.run_js(LOCAL_STORAGE_JS),
+            "session_storage": self.page.run_js(SESSION_STORAGE_JS),
+        }
+
+    def restore_state(self, snapshot: dict):
+        """恢复浏览器状态：打开快照URL → 写入cookies/storage → 重新加载使页面按恢复的状态初始化"""
+        self.setup(snapshot["url"])
+        self.page.set.cookies(snapshot["cookies"])
+        self.page.run_js(RESTORE_STORAGE_JS, snapshot["local_storage"], snapshot["session_storage"])
+        self.open_url(snapshot["url"])
+        self.page.refresh()
+
+    def _save_checkpoint(self, prefix_hash: str, prefix_seconds: float):
+        try:
+            snapshot = self.snapshot_state()
+            snapshot["prefix_seconds"] = prefix_seconds
+            checkpoint_store.save(prefix_hash, snapshot)
+            logger.log("INFO", f"📌 已保存共享前缀检查点（前缀耗时{prefix_seconds:.1f}s）：{snapshot['url']}")
+        except Exception as e:
+            logger.log("WARNING", f"保存共享前缀检查点失败，不影响用例执行：{str(e)}")
+
+    def _restore_checkpoint(self, prefix_hash: str):
+        """恢复检查点，成功返回True；失败时关闭页面并返回False（改为完整执行前缀）"""
+        snapshot = checkpoint_store.get(prefix_hash)
+        if not snapshot:
+            return False
+        start = time.perf_counter()
+        try:
+            self.restore_state(snapshot)
+        except Exception as e:
+            logger.log("WARNING", f"恢复共享前缀检查点失败，改为完整执行：{str(e)}")
+            if self.page:
+                self.page.close()
+                self.page = None
+            return False
+        restore_seconds = time.perf_counter() - start
+        checkpoint_store.record_reuse(snapshot, restore_seconds)
+        logger.log("INFO", f"⏩ 已恢复共享前缀检查点（用时{restore_seconds:.1f}s，原前缀耗时{snapshot['prefix_seconds']:.1f}s）")
+        return True
+
+    def _run_step(self, step: dict, action: str, desc: str, case_name: str):
+        """执行单个YAML步骤（按action分发到对应关键字）"""
+        locator = step.get("locator")  # 定位符为字符串XPath（多定位符逗号分隔）
+
+        # 步骤映射：修复app_id缺失问题（加默认值"test_app"）
+        if action == "click":
+            self.click(locator, desc)
+        elif action == "input_text":
+            self.input_text(locator, step["text"], desc)
+        elif action == "assert_text":
+            self.assert_text(locator, step["expected"], desc)
+        elif action in ("assert_texts", "assert_snapshot"):
+            self.assert_texts(step["expected"], desc, step.get("timeout", 20))
+        elif action == "expect_response":
+            self.expect_response(step["url"], step.get("do", []), step.get("expect"), desc, case_name,
+                                 method=step.get("method"), regex=step.get("regex", False),
+                                 status=step.get("status"), timeout=step.get("timeout", 20))
+        elif action == "login_shop":
+            # 安全获取app_id：YAML缺失时用默认值"test_app"，避免KeyError
+            app_id = step.get("app_id", "test_app")
+            self.login_shop(app_id, desc)
+        elif action == "login_cashier":
+            # 安全获取app_id：同上，兼容YAML配置缺失场景
+            app_id = step.get("app_id", "test_app")
+            self.login_cashier(app_id, desc)
+        elif action == "input_pin":
+            self.input_pin(step["num"], step["choose_num"], desc, step.get("status", 0))
+        elif action == "setup":
+            self.setup(step.get("url"))
+        elif action == "teardown":
+            self.teardown()
+        elif action == "scroll_to_bottom":
+            self.page.scroll.to_bottom()
+            logger.log("INFO", f"✅ 滚动完成：{desc}")
+        else:
+            raise ValueError(f"不支持的操作：{action}（用例：{case_name}）")
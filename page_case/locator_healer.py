@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+@Author: XieLong
+@Date: 2026/10/19
+@File: locator_healer.py
+@Description: 定位符自愈：记录每个定位成功元素的指纹（标签/文本/属性/位置），主定位符等满超时仍未命中时按指纹生成的备选定位符依次尝试，自愈结果写入复核文件
+"""
+import json
+import os
+import re
+import threading
+import time
+
+from config.conf import cm
+from page_case.page_script import PageScript
+from util.logger import logger_instance as logger
+
+# 在元素上执行：一次调用取回指纹（标签、文本、属性、绝对路径）
+FINGERPRINT_JS = PageScript("element_fingerprint", """
+var el = this, attrs = {};
+for (var i = 0; i < el.attributes.length; i++) {
+    attrs[el.attributes[i].name] = el.attributes[i].value;
+}
+var parts = [];
+for (var node = el; node && node.nodeType === 1; node = node.parentNode) {
+    var index = 1;
+    for (var sib = node.previousElementSibling; sib; sib = sib.previousElementSibling) {
+        if (sib.tagName === node.tagName) { index++; }
+    }
+    parts.unshift(node.tagName.toLowerCase() + "[" + index + "]");
+}
+return JSON.stringify({
+    tag: el.tagName.toLowerCase(),
+    text: (el.innerText || el.textContent || "").trim().slice(0, 100),
+    attrs: attrs,
+    path: "/" + parts.join("/")
+});
+""")
+
+# 参与生成备选定位符的属性（按稳定性从高到低）
+STABLE_ATTRS = ("id", "data-testid", "name", "placeholder", "aria-label", "title", "type")
+# 状态类class（随交互变化，不用于定位）
+STATE_CLASS = re.compile(r"(^|-)(is-|active|hover|focus|disabled|selected|checked|loading)")
+# 宽松策略：同类元素多、页面结构变化时容易命中其他元素，只用于读取（断言），不用于点击/输入
+LOOSE_STRATEGIES = {"class", "path"}
+
+
+def xpath_literal(value: str):
+    """XPath字符串字面量（同时含单双引号时用concat拼接）"""
+    if '"' not in value:
+        return f'"{value}"'
+    if "'" not in value:
+        return f"'{value}'"
+    return "concat(" + ", '\"', ".join(f'"{part}"' for part in value.split('"')) + ")"
+
+
+def locator_key(locator):
+    """定位符的存储标识（列表形式的定位符转为JSON字符串）"""
+    return locator if isinstance(locator, str) else json.dumps(list(locator), ensure_ascii=False)
+
+
+def candidate_locators(fingerprint: dict, loose: bool = True):
+    """
+    按指纹生成备选定位符（排序即优先级）：稳定属性 → 文本 → class → 绝对路径
+    :param loose: 是否包含宽松策略（class、绝对路径）
+    :return: [(策略, XPath定位符)]
+    """
+    tag, text, attrs = fingerprint["tag"], fingerprint.get("text", ""), fingerprint.get("attrs", {})
+    candidates = []
+    for name in STABLE_ATTRS:
+        if attrs.get(name):
+            candidates.append((f"@{name}", f"xpath://{tag}[@{name}={xpath_literal(attrs[name])}]"))
+    if text and "\n" not in text:
+        candidates.append(("text", f"xpath://{tag}[normalize-space(.)={xpath_literal(text)}]"))
+        candidates.append(("contains_text", f"xpath://{tag}[contains(normalize-space(.), {xpath_literal(text)})]"))
+    classes = [c for c in attrs.get("class", "").split() if not STATE_CLASS.search(c)]
+    if not loose:
+        return candidates
+    if classes:
+        condition = " and ".join(f"contains(concat(' ', normalize-space(@class), ' '), {xpath_literal(' ' + c + ' ')})"
+                                 for c in classes)
+        candidates.append(("class", f"xpath://{tag}[{condition}]"))
+    if fingerprint.get("path"):
+        candidates.append(("path", f"xpath:{fingerprint['path']}"))
+    return candidates
+
+
+class LocatorHealer:
+    """定位符自愈（单例）：指纹库 data/locator_fingerprints.json，复核文件 json/healed_locators.json"""
+    _instance = None
+
+    def __new__(cls, *args, **kwargs):
+        if not cls._instance:
+            cls._instance = super(LocatorHealer, cls).__new__(cls)
+            cls._instance._lock = threading.Lock()
+            cls._instance._fingerprints = None
+            cls._instance._dirty = False
+            cls._instance.healed = {}  # 本进程内已自愈的定位符：{定位符标识: (自愈定位符, 策略)}
+        return cls._instance
+
+    @property
+    def fingerprints(self):
+        if self._fingerprints is None:
+            try:
+                with open(cm.LOCATOR_FINGERPRINT_FILE, "r", encoding="utf-8") as f:
+                    self._fingerprints = json.load(f)
+            except (OSError, ValueError):
+                self._fingerprints = {}
+        return self._fingerprints
+
+    def get(self, locator):
+        return self.fingerprints.get(locator_key(locator))
+
+    def needs_refresh(self, locator):
+        """指纹不存在或超过刷新周期时重新记录（避免每次定位都多一次页面调用）"""
+        fingerprint = self.get(locator)
+        return not fingerprint or time.time() - fingerprint.get("updated_at", 0) >= cm.HEAL_REFRESH_HOURS * 3600
+
+    def record(self, locator, element):
+        """记录定位成功元素的指纹（失败只记日志，不影响用例）"""
+        try:
+            fingerprint = json.loads(element.run_js(FINGERPRINT_JS))
+        except Exception as e:
+            logger.log("WARNING", f"记录元素指纹失败（{locator}）：{str(e)}")
+            return
+        fingerprint["updated_at"] = time.time()
+        with self._lock:
+            self.fingerprints[locator_key(locator)] = fingerprint
+            self._dirty = True
+
+    def record_heal(self, locator, healed_locator: str, strategy: str, desc: str):
+        """记录自愈结果到复核文件（累计命中次数，供人工确认后改YAML）"""
+        key = locator_key(locator)
+        self.healed[key] = (healed_locator, strategy)
+        review_file = cm.json_file("healed_locators.json")
+        with self._lock:
+            try:
+                with open(review_file, "r", encoding="utf-8") as f:
+                    review = json.load(f)
+            except (OSError, ValueError):
+                review = {}
+            entry = review.setdefault(key, {"count": 0})
+            entry.update({
+                "healed": healed_locator,
+                "strategy": strategy,
+                "desc": desc,
+                "count": entry["count"] + 1,
+                "run_id": os.environ.get("RUN_ID", ""),
+                "last_at": time.strftime("%Y-%m-%d %H:%M:%S")
+            })
+            with open(review_file, "w", encoding="utf-8") as f:
+                json.dump(review, f, ensure_ascii=False, indent=2)
+        logger.log("WARNING", f"🩹 定位符已自愈（{desc}）：{locator} → {healed_locator}（策略：{strategy}），请复核json/healed_locators.json")
+
+    def flush(self):
+        """指纹有更新时写回文件"""
+        with self._lock:
+            if not self._dirty:
+                return
+            tmp_file = cm.LOCATOR_FINGERPRINT_FILE + ".tmp"
+            with open(tmp_file, "w", encoding="utf-8") as f:
+                json.dump(self.fingerprints, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_file, cm.LOCATOR_FINGERPRINT_FILE)
+            self._dirty = False
+
+
+# 全局唯一定位符自愈实例
+locator_healer = LocatorHealer()
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+@Author: XieLong
+@Date: 2026/10/19
+@File: network_capture.py
+@Description: 网络抓包（NETWORK_CAPTURE）：按用例记录类HAR的请求明细（关联触发请求的YAML步骤），逐条写入磁盘；运行结束后汇总最慢/最大的接口排行
+"""
+import json
+import os
+import re
+import threading
+from datetime import datetime, timezone
+from urllib.parse import urlsplit
+
+from config.conf import cm
+from util.history_store import history_store, percentile
+from util.logger import logger_instance as logger
+
+# 参与接口排行的资源类型（后端调用；图片/脚本等静态资源不计）
+ENDPOINT_TYPES = {"XHR", "Fetch", "Document"}
+# 独立CDP连接依赖的DrissionPage内部接口（按requirements.txt中固定的4.1.1.4版本），升级时在cdp_driver中统一适配
+DRISSION_PRIVATE_ATTRS = (("page", "_target_id"), ("browser", "_ws_address"))
+
+
+def har_file_name(case_name: str):
+    """用例名转换为抓包文件名（去掉路径等不能用于文件名的字符）"""
+    return re.sub(r"[^\w.=\-\[\]]+", "_", case_name) + ".har.jsonl"
+
+
+def run_har_dir(run_id: str = None):
+    """一次运行的抓包目录：HAR_PATH/运行ID"""
+    return os.path.join(cm.HAR_PATH, run_id or history_store.run_id)
+
+
+def har_timings(timing: dict, total_ms: float):
+    """CDP ResourceTiming（相对requestTime的毫秒数）转换为HAR timings，不适用的阶段为-1"""
+    if not timing:
+        return {"blocked": -1, "dns": -1, "connect": -1, "ssl": -1, "send": 0, "wait": round(total_ms, 1), "receive": 0}
+
+    def span(start, end):
+        return round(timing[end] - timing[start], 1) if timing.get(start, -1) >= 0 else -1
+
+    first = next((timing[k] for k in ("dnsStart", "connectStart", "sendStart") if timing.get(k, -1) >= 0), 0)
+    return {
+        "blocked": round(first, 1),
+        "dns": span("dnsStart", "dnsEnd"),
+        "connect": span("connectStart", "connectEnd"),
+        "ssl": span("sslStart", "sslEnd"),
+        "send": span("sendStart", "sendEnd"),
+        "wait": round(timing["receiveHeadersEnd"] - timing["sendEnd"], 1),
+        "receive": round(max(total_ms - timing["receiveHeadersEnd"], 0), 1),
+    }
+
+
+def cdp_driver(page):
+    """
+    为页面建立独立的CDP连接（与DrissionPage监听器相同的方式，不占用page.listen）；
+    用到的DrissionPage内部接口集中在这里，版本不兼容时抛出明确的错误
+    """
+    try:
+        from DrissionPage._base.driver import Driver
+    except ImportError as e:
+        raise RuntimeError(f"当前DrissionPage版本不支持网络抓包（缺少内部Driver）：{str(e)}")
+    owners = {"page": page, "browser": getattr(page, "browser", None)}
+    missing = [f"{owner}.{attr}" for owner, attr in DRISSION_PRIVATE_ATTRS if not hasattr(owners[owner], attr)]
+    if missing:
+        raise RuntimeError(f"当前DrissionPage版本不支持网络抓包（缺少内部属性：{', '.join(missing)}）")
+    driver = Driver(page._target_id, page.browser._ws_address)
+    driver.session_id = driver.run("Target.attachToTarget", targetId=page._target_id, flatten=True)["sessionId"]
+    return driver
+
+
+class NetworkCapture:
+    """
+    单条用例的网络抓包：通过独立的CDP连接监听页面的Network事件（不获取响应体），
+    请求完成即写入一行类HAR的entry，内存中只保留进行中的请求
+    """
+
+    def __init__(self, case_name: str):
+        self.case_name = case_name
+        self.har_file = os.path.join(run_har_dir(), har_file_name(case_name))
+        os.makedirs(os.path.dirname(self.har_file), exist_ok=True)
+        self._file = open(self.har_file, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+        self._driver = None
+        self._pending = {}  # requestId → 进行中的请求
+        self.step = (0, "")  # 当前执行的步骤（序号, 描述），请求按发出时的步骤关联
+        self.entries = 0
+
+    def attach(self, page):
+        """开始监听页面（独立CDP连接，见cdp_driver）"""
+        self.detach()
+        driver = cdp_driver(page)
+        driver.set_callback("Network.requestWillBeSent", self._request_will_be_sent)
+        driver.set_callback("Network.responseReceived", self._response_received)
+        driver.set_callback("Network.loadingFinished", self._loading_finished)
+        driver.set_callback("Network.loadingFailed", self._loading_failed)
+        driver.run("Network.enable")
+        self._driver = driver
+
+    def detach(self):
+        """停止监听（页面关闭前调用）；未完成的请求记为未完成"""
+        if self._driver is None:
+            return
+        driver, self._driver = self._driver, None
+        try:
+            driver.stop()
+        except Exception as e:
+            logger.log("WARNING", f"停止网络抓包连接失败：{str(e)}")
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        for request in pending.values():
+            self._write(request, request["timestamp"], error="unfinished")
+
+    def close(self):
+        self.detach()
+        with self._lock:
+            self._file.close()
+        logger.log("INFO", f"✅ 网络抓包已保存（{self.entries}条请求）：{self.har_file}")
+
+    # ---------------- CDP事件（在连接的事件线程中执行；_pending在锁内读写，与detach互斥，写文件在锁外） ----------------
+    def _request_will_be_sent(self, **kwargs):
+        request_id = kwargs["requestId"]
+        request = kwargs["request"]
+        with self._lock:
+            # 重定向沿用同一requestId：先结束上一跳
+            previous = self._pending.pop(request_id, None) if kwargs.get("redirectResponse") else None
+            self._pending[request_id] = {
+                "method": request["method"], "url": request["url"], "type": kwargs.get("type", ""),
+                "body_size": len(request.get("postData") or ""), "wall_time": kwargs.get("wallTime"),
+                "timestamp": kwargs["timestamp"], "step": self.step, "response": None,
+            }
+        if previous:
+            previous["response"] = kwargs["redirectResponse"]
+            self._write(previous, kwargs["timestamp"])
+
+    def _response_received(self, **kwargs):
+        with self._lock:
+            request = self._pending.get(kwargs["requestId"])
+            if request:
+                request["response"] = kwargs["response"]
+
+    def _loading_finished(self, **kwargs):
+        with self._lock:
+            request = self._pending.pop(kwargs["requestId"], None)
+        if request:
+            self._write(request, kwargs["timestamp"], size=kwargs.get("encodedDataLength", -1))
+
+    def _loading_failed(self, **kwargs):
+        with self._lock:
+            request = self._pending.pop(kwargs["requestId"], None)
+        if request:
+            self._write(request, kwargs["timestamp"], error=kwargs.get("errorText", "failed"))
+
+    def _write(self, request: dict, end_timestamp: float, size: int = -1, error: str = None):
+        response = request["response"] or {}
+        total_ms = max((end_timestamp - request["timestamp"]) * 1000, 0)
+        started = datetime.fromtimestamp(request["wall_time"], timezone.utc).isoformat() if request["wall_time"] else None
+        entry = {
+            "startedDateTime": started,
+            "time": round(total_ms, 1),
+            "request": {"method": request["method"], "url": request["url"], "bodySize": request["body_size"]},
+            "response": {
+                "status": response.get("status", 0), "statusText": response.get("statusText", ""),
+                "content": {"mimeType": response.get("mimeType", ""), "size": size}, "bodySize": size,
+            },
+            "timings": har_timings(response.get("timing"), total_ms),
+            "_resourceType": request["type"],
+            "_case": self.case_name,
+            "_step": request["step"][0],
+            "_stepDesc": request["step"][1],
+        }
+        if error:
+            entry["_error"] = error
+        with self._lock:
+            if self._file.closed:
+                return
+            self._file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            self.entries += 1
+
+
+def endpoint_of(entry: dict):
+    """接口标识：方法 + 去掉查询串的地址"""
+    url = urlsplit(entry["request"]["url"])
+    return f"{entry['request']['method']} {url.scheme}://{url.netloc}{url.path}"
+
+
+def rank_endpoints(run_id: str = None, top: int = None):
+    """
+    汇总一次运行的全部抓包文件（逐行读取），按p95耗时与最大响应体排出接口排行，写入json/endpoint_ranking.json
+    :return: {"slowest": [...], "largest": [...]}，没有抓包数据时返回None
+    """
+    har_dir = run_har_dir(run_id)
+    if not os.path.isdir(har_dir):
+        return None
+    top = top or cm.ENDPOINT_RANK_TOP
+    stats = {}
+    for name in sorted(os.listdir(har_dir)):
+        with open(os.path.join(har_dir, name), "r", encoding="utf-8") as f:
+            for line in f:
+                entry = json.loads(line)
+                if entry["_resourceType"] not in ENDPOINT_TYPES:
+                    continue
+                stat = stats.setdefault(endpoint_of(entry), {"times": [], "sizes": [], "slowest": None})
+                stat["times"].append(entry["time"])
+                stat["sizes"].append(max(entry["response"]["bodySize"], 0))
+                if stat["slowest"] is None or entry["time"] > stat["slowest"]["time"]:
+                    stat["slowest"] = {"time": entry["time"], "case": entry["_case"],
+                                       "step": entry["_step"], "desc": entry["_stepDesc"]}
+    if not stats:
+        return None
+
+    rows = [{
+        "endpoint": endpoint, "count": len(s["times"]),
+        "p95_ms": round(percentile(s["times"], 95), 1), "max_ms": max(s["times"]),
+        "max_kb": round(max(s["sizes"]) / 1024, 1), "total_kb": round(sum(s["sizes"]) / 1024, 1),
+        "slowest_at": s["slowest"],
+    } for endpoint, s in stats.items()]
+    ranking = {
+        "run_id": run_id or history_store.run_id,
+        "slowest": sorted(rows, key=lambda r: -r["p95_ms"])[:top],
+        "largest": sorted(rows, key=lambda r: -r["max_kb"])[:top],
+    }
+    with open(cm.json_file("endpoint_ranking.json"), "w", encoding="utf-8") as f:
+        json.dump(ranking, f, ensure_ascii=False, indent=2)
+    return ranking
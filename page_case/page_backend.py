@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+@Author: XieLong
+@Date: 2026/10/19
+@File: page_backend.py
+@Description: 页面后端：浏览器池通过后端启动浏览器（chromium=真实浏览器，fake=内存假页面）；--dry-run切换到假页面，不启动浏览器即可跑通全部用例的控制流程
+"""
+from abc import ABC, abstractmethod
+
+from config.conf import cm
+from util.logger import logger_instance as logger
+
+
+class PageBackend(ABC):
+    """
+    页面后端接口：launch()返回浏览器对象，需提供
+    new_tab() → 页面（get/ele/eles/run_js/cookies/set.cookies/refresh/url/listen/scroll/close）、quit()、states.is_alive；
+    页面与元素的run_js只会收到page_script.PageScript具名脚本，后端按名称实现（不依赖JS源码）
+    """
+    name = ""
+
+    @abstractmethod
+    def launch(self):
+        """启动并返回浏览器对象"""
+
+
+class ChromiumBackend(PageBackend):
+    """真实浏览器（DrissionPage Chromium）"""
+    name = "chromium"
+
+    def launch(self):
+        from DrissionPage import Chromium, ChromiumOptions
+        co = ChromiumOptions()
+        if cm.HEADLESS_MODE:
+            co = co.headless()  # 无头模式配置（从.env读取）
+        return Chromium(co)
+
+
+class FakeBackend(PageBackend):
+    """内存假页面（按脚本模拟元素存在/文本/延迟）"""
+    name = "fake"
+
+    def launch(self):
+        from page_case.fake_page import FakeBrowser
+        return FakeBrowser()
+
+
+BACKENDS = {backend.name: backend for backend in (ChromiumBackend, FakeBackend)}
+
+
+def page_backend():
+    """当前页面后端（由PAGE_BACKEND配置，--dry-run时为fake）"""
+    if cm.PAGE_BACKEND not in BACKENDS:
+        raise ValueError(f"不支持的页面后端：{cm.PAGE_BACKEND}（可选：{', '.join(BACKENDS)}）")
+    return BACKENDS[cm.PAGE_BACKEND]()
+
+
+def enable_dry_run():
+    """
+    切换到干跑：假页面后端、关闭定位符自愈（不写指纹库）、运行历史写入单独的库（不影响真实运行的耗时/不稳定分析）
+    """
+    from util.history_store import history_store
+    cm.PAGE_BACKEND = FakeBackend.name
+    cm.LOCATOR_HEALING = False
+    history_store.use_db(cm.DRY_RUN_HISTORY_DB_FILE)
+    logger.log("INFO", f"🧪 干跑模式：使用内存假页面（脚本：{cm.FAKE_PAGE_SCRIPT}），运行历史写入{cm.DRY_RUN_HISTORY_DB_FILE}")
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("page_backend", "页面后端")
+    group.addoption("--dry-run", action="store_true", default=False,
+                    help="干跑：使用内存假页面代替浏览器，跳过线上数据初始化，只验证关键字引擎/YAML/报告流程")
+
+
+def pytest_configure(config):
+    if config.getoption("dry_run") and cm.PAGE_BACKEND != FakeBackend.name:
+        enable_dry_run()
@@ -0,0 +1,23 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+@Author: XieLong
+@Date: 2026/10/19
+@File: page_script.py
+@Description: 具名页内脚本：关键字引擎在页面/元素上执行的JS都以PageScript声明，页面后端按名称识别（假页面按名称模拟返回值，
+不比对脚本源码，修改JS不会使假页面失效）
+"""
+
+
+class PageScript(str):
+    """具名页内脚本：本身即JS源码字符串（可直接传给DrissionPage的run_js），name为后端识别用的名称"""
+
+    def __new__(cls, name: str, source: str):
+        script = super(PageScript, cls).__new__(cls, source)
+        script.name = name
+        return script
+
+
+def script_name(script):
+    """脚本名称（非PageScript的临时脚本为None）"""
+    return getattr(script, "name", None)
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+@Author: XieLong
+@Date: 2026/10/19
+@File: step_timing.py
+@Description: 步骤性能预算：每个步骤结束后从收银台页面采集导航/资源耗时及首次交互时间，步骤或用例耗时超出budget_ms时判定为slow
+"""
+import json
+
+from page_case.page_script import PageScript
+from util.logger import logger_instance as logger
+
+# 超出性能预算的用例在报告中的标记（写入user_properties，值为超出明细）
+SLOW_PROPERTY = "slow"
+# 每个步骤记录的最慢资源条数
+SLOWEST_RESOURCES = 3
+
+# 页面耗时采集脚本：参数为步骤开始时间（毫秒时间戳），只统计步骤期间发生的导航与资源请求
+PERF_TIMING_JS = PageScript("perf_timing", """
+var since = arguments[0], origin = performance.timeOrigin;
+var timing = {first_input: null, navigation: null, resources: {count: 0, transfer_kb: 0, slowest: []}};
+var nav = performance.getEntriesByType("navigation")[0];
+if (nav && origin >= since) {
+    timing.navigation = {
+        url: nav.name, ttfb_ms: Math.round(nav.responseStart), dom_content_loaded_ms: Math.round(nav.domContentLoadedEventEnd),
+        load_ms: Math.round(nav.loadEventEnd), transfer_kb: Math.round(nav.transferSize / 1024)
+    };
+}
+var resources = performance.getEntriesByType("resource").filter(function (r) { return origin + r.startTime >= since; });
+timing.resources.count = resources.length;
+timing.resources.transfer_kb = Math.round(resources.reduce(function (s, r) { return s + (r.transferSize || 0); }, 0) / 1024);
+timing.resources.slowest = resources.sort(function (a, b) { return b.duration - a.duration; }).slice(0, arguments[1])
+    .map(function (r) { return {url: r.name, type: r.initiatorType, duration_ms: Math.round(r.duration)}; });
+var input = performance.getEntriesByType("first-input")[0];
+if (input) {
+    timing.first_input = {at_ms: Math.round(input.startTime), delay_ms: Math.round(input.processingStart - input.startTime)};
+}
+return JSON.stringify(timing);
+""")
+
+
+def collect_step_timing(page, since: float):
+    """
+    采集步骤期间的页面耗时（采集失败不影响用例执行）
+    :param since: 步骤开始时间（time.time()秒）
+    :return: {"navigation", "resources", "first_input"}，页面不可用时返回None
+    """
+    if page is None:
+        return None
+    try:
+        result = page.run_js(PERF_TIMING_JS, since * 1000, SLOWEST_RESOURCES)
+        return json.loads(result) if result else None
+    except Exception as e:
+        logger.log("WARNING", f"采集页面耗时失败：{str(e)}")
+        return None
+
+
+def check_budget(duration: float, budget_ms, desc: str):
+    """
+    耗时是否超出预算
+    :param duration: 实际耗时（秒）
+    :param budget_ms: 预算（毫秒），未配置时不检查
+    :return: 超出时返回说明，否则返回None
+    """
+    if not budget_ms:
+        return None
+    elapsed_ms = duration * 1000
+    if elapsed_ms <= float(budget_ms):
+        return None
+    return f"{desc}：{elapsed_ms:.0f}ms > 预算{float(budget_ms):g}ms"
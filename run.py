@@ -7,6 +7,7 @@
 @Description: 
 """
 
+import argparse
 import os
 import subprocess
 import sys
@@ -15,11 +16,18 @@ from util.feishu_dev import fsdev
 from util.feishu_myself import fsm
 from util.feishu_talk import fst
 from config.conf import cm
-from util.logger import logger_instance  # 导入你的日志单例
+from page_case.checkpoint import saving_text
+from page_case.network_capture import rank_endpoints
+from page_case.step_timing import SLOW_PROPERTY
+from util.allure_report import generate_report, iter_allure_results
+from util.artifact_store import artifact_store
+from util.history_store import history_store, CASE_ID_PROPERTY, QUARANTINE_PROPERTY, REUSED_REASON
+from util.logger import logger_instance, log_file_path  # 导入你的日志单例
+from util.result_collector import run_in_process
+from util.scheduler import Scheduler
 
 # 日志别名（简化调用）
 logger = logger_instance
-WIN = sys.platform.startswith('win')
 
 # 定义Allure相关路径（基于你的cm.BASE_DIR）
 ALLURE_RESULTS_DIR = os.path.join(cm.BASE_DIR, "allure-results")
@@ -38,8 +46,29 @@ def delete_report_file():
     except Exception as e:
         logger.log("ERROR", f"删除报告文件时发生错误: {e}")
 
-def execute_test_steps(test_file=None, case_mark=None):
-    """执行测试步骤（使用cm和正确的Allure路径）"""
+def build_pytest_args(test_file=None, case_mark=None, extra_args=None):
+    """构建pytest参数（使用上面定义的Allure路径）"""
+    args = ["--alluredir", ALLURE_RESULTS_DIR, "--clean-alluredir"]
+    if case_mark:
+        args += ["-m", case_mark]
+    args += extra_args or []
+    if test_file:
+        args.append(test_file)
+    return args
+
+def check_exit_code(exit_code):
+    """pytest退出码：0全部通过、1有用例失败属于正常结束；其余为执行异常"""
+    if exit_code == 5:
+        logger.log("WARNING", "未收集到任何用例")
+    elif exit_code not in (0, 1):
+        raise Exception(f"pytest执行异常，退出码: {exit_code}")
+
+def execute_test_steps(test_file=None, case_mark=None, isolated=False, extra_args=None):
+    """
+    执行测试步骤并生成报告
+    默认进程内执行pytest，直接返回结构化结果；isolated=True时以子进程执行（结果写入json/report.json）
+    :return: 进程内执行时返回结果dict，子进程执行时返回None（需read_test_report读取）
+    """
     # 发送通知
     if test_file:
         fsm.sendTextmessage(f'开始运行脚本:\t{test_file}')
@@ -47,36 +76,24 @@ def execute_test_steps(test_file=None, case_mark=None):
         case_type = "主流程" if case_mark == "main" else "非主流程"  # 直接用标记字符串（你的cm中未定义，可在cm中补充）
         fsm.sendTextmessage(f'开始运行{case_type}用例（标记：{case_mark}）')
 
-    # 构建Pytest命令（使用上面定义的Allure路径）
-    pytest_cmd = f"pytest --alluredir {ALLURE_RESULTS_DIR} --clean-alluredir"
-    if case_mark:
-        pytest_cmd += f" -m {case_mark}"
-    if test_file:
-        pytest_cmd += f" {test_file}"
-
-    # 生成Allure报告
-    allure_cmd = f"allure generate {ALLURE_RESULTS_DIR} -c -o {ALLURE_REPORT_DIR}"
-    steps = [pytest_cmd, allure_cmd]
-
-    # 执行命令
-    for step in steps:
-        command = f"call {step}" if WIN else step
-        try:
-            subprocess.run(command, shell=True, check=True)
-            logger.log("INFO", f"执行命令成功: {step}")
-        except subprocess.CalledProcessError as e:
-            logger.log("ERROR", f"执行命令失败: {step}, 错误: {e}")
-            raise
-
-def terminate_java_process():
+    pytest_args = build_pytest_args(test_file, case_mark, extra_args)
+    results = None
     try:
-        if WIN:
-            os.popen('taskkill /F /im java.exe')
+        if isolated:
+            command = [sys.executable, "-m", "pytest", "-p", "util.result_collector"] + pytest_args
+            exit_code = subprocess.run(command, cwd=cm.BASE_DIR).returncode
         else:
-            subprocess.run(['pkill', '-9', '-f', 'java'], check=True)
-        logger.log("INFO", "Java进程已终止")
-    except Exception as e:
-        logger.log("ERROR", f"终止Java进程时发生错误: {e}")
+            exit_code, results = run_in_process(pytest_args)
+        logger.log("INFO", f"pytest执行结束（{'子进程' if isolated else '进程内'}），退出码: {exit_code}")
+        check_exit_code(exit_code)
+    finally:
+        # 生成报告（纯Python生成，无需启动JVM；Allure CLI按需开启并只终止自身子进程）
+        # 报告生成失败只记录，不掩盖pytest执行本身的异常
+        try:
+            generate_report(ALLURE_RESULTS_DIR, ALLURE_REPORT_DIR)
+        except Exception as e:
+            logger.log("ERROR", f"❌ 报告生成失败：{str(e)}")
+    return results
 
 def read_test_report():
     try:
@@ -91,48 +108,236 @@ def read_test_report():
         logger.log("ERROR", f"JSON文件解析错误: {e}")
         return None
 
-def classify_test_results(results):
-    # 保持原有逻辑
-    temp_list1 = [(res["name"], res["outcome"], res.get("call", {}).get("stdout", "")) for res in
-                  results['report']["tests"]]
-    temp_list2 = [(i[0].split('::')[1], i[1], i[2]) for i in temp_list1 if i[1] != 'skipped']
-
+def aggregate_outcomes(records):
+    """
+    按用例聚合多次执行结果：任一次通过即视为通过，否则任一次slow（通过但超出性能预算）即视为slow（跳过的不计）
+    :param records: 可迭代的 (用例名, 状态, 报错信息/超出预算说明)，逐条消费，不要求一次性载入
+    :return: (通过用例, 失败用例, 失败报错, slow用例及超出预算说明)
+    """
     pass_status = {}
     failed_details = {}
-    for testcase, status, error_message in temp_list2:
-        if status != "passed":
+    slow_details = {}
+    for testcase, status, error_message in records:
+        if status == 'skipped':
+            continue
+        if status == "slow":
+            slow_details[testcase] = error_message
+        elif status != "passed":
             failed_details[testcase] = error_message
         pass_status.setdefault(testcase, set()).add(status)
 
     passed_tests = [k for k, v in pass_status.items() if 'passed' in v]
-    failed_tests = [k for k, v in pass_status.items() if 'passed' not in v]
-    return passed_tests, failed_tests, failed_details
+    slow_details = {k: slow_details[k] for k, v in pass_status.items() if 'passed' not in v and 'slow' in v}
+    failed_tests = [k for k, v in pass_status.items() if 'passed' not in v and 'slow' not in v]
+    return passed_tests, failed_tests, failed_details, slow_details
+
+def _outcome_of(res):
+    """通过但带有超出性能预算标记的记录按slow统计"""
+    if res["outcome"] == "passed":
+        props = dict(tuple(p) for p in res.get("user_properties", []))
+        if SLOW_PROPERTY in props:
+            return "slow", props[SLOW_PROPERTY]
+    return res["outcome"], res.get("call", {}).get("stdout", "")
+
+def _case_key(res):
+    """报告中的用例名：收集时写入的用例标识（YAML用例为 标记/文件名[变体]），没有时取完整nodeid"""
+    props = dict(tuple(p) for p in res.get("user_properties", []))
+    return props.get(CASE_ID_PROPERTY) or res["name"]
+
+def classify_test_results(results):
+    # 按用例汇总（通过但超出性能预算的记录为slow）
+    temp_list1 = [(_case_key(res),) + _outcome_of(res) for res in results['report']["tests"]]
+    temp_list2 = [i for i in temp_list1 if i[1] != 'skipped']
+    return aggregate_outcomes(temp_list2)
+
+def quarantined_test_results(results):
+    """失败记录全部来自隔离中不稳定用例的用例（与classify_test_results使用相同的用例名）"""
+    status = {}
+    for res in results['report']["tests"]:
+        if res["outcome"] in ("passed", "skipped"):
+            continue
+        name = _case_key(res)
+        props = dict(tuple(p) for p in res.get("user_properties", []))
+        status[name] = status.get(name, True) and QUARANTINE_PROPERTY in props
+    return [name for name, quarantined in status.items() if quarantined]
+
+def reused_test_results(results):
+    """选择执行时复用上次结果（被跳过）的用例（与classify_test_results使用相同的用例名）"""
+    return [_case_key(res) for res in results['report']["tests"]
+            if res["outcome"] == "skipped" and res.get("reason", "").endswith(REUSED_REASON)]
+
+def format_reused_message(reused_tests):
+    if not reused_tests:
+        return ""
+    return f"♻️ 复用结果（未变更且上次通过，本次未执行）{len(reused_tests)}条:\n" + \
+        "\n".join(f"  - {name}" for name in reused_tests)
+
+def format_report_timing_message():
+    """报告生成耗时（纯Python，开启ALLURE_CLI时附Allure CLI耗时对比；由报告生成写入allure-report/summary.json）"""
+    try:
+        with open(os.path.join(ALLURE_REPORT_DIR, "summary.json"), "r", encoding="utf-8") as f:
+            summary = json.load(f)
+    except (OSError, ValueError):
+        return ""
+    if "generate_seconds" not in summary:
+        return ""
+    message = f"📝 报告生成耗时：纯Python {summary['generate_seconds']:g}s"
+    if "allure_cli_seconds" in summary:
+        message += f" / Allure CLI {summary['allure_cli_seconds']:g}s"
+    return message
+
+def format_checkpoint_message():
+    """共享前缀复用统计（由common.case_prefix在会话结束时写入json/checkpoint_summary.json）"""
+    try:
+        with open(os.path.join(cm.json_dir(), "checkpoint_summary.json"), "r", encoding="utf-8") as f:
+            summary = json.load(f)
+    except (OSError, ValueError):
+        return ""
+    if not summary.get("reused"):
+        return ""
+    return f"⏩ 共享前缀复用{summary['reused']}次，{saving_text(summary['saved_seconds'])}"
+
+def format_healed_message():
+    """本次运行自愈的定位符（由定位符自愈写入json/healed_locators.json，需人工复核后更新YAML）"""
+    try:
+        with open(os.path.join(cm.json_dir(), "healed_locators.json"), "r", encoding="utf-8") as f:
+            review = json.load(f)
+    except (OSError, ValueError):
+        return ""
+    healed = [(locator, entry) for locator, entry in review.items() if entry.get("run_id") == history_store.run_id]
+    if not healed:
+        return ""
+    return f"🩹 定位符自愈{len(healed)}条（请复核json/healed_locators.json后更新YAML）:\n" + \
+        "\n".join(f"  - {entry['desc']}：{locator} → {entry['healed']}" for locator, entry in healed)
+
+def format_leak_message():
+    """本次运行判定为内存泄漏的常驻浏览器（由浏览器池写入json/browser_leaks.json）"""
+    try:
+        with open(os.path.join(cm.json_dir(), "browser_leaks.json"), "r", encoding="utf-8") as f:
+            leaks = [leak for leak in json.load(f) if leak.get("run_id") == history_store.run_id]
+    except (OSError, ValueError):
+        return ""
+    if not leaks:
+        return ""
+    return f"🧠 疑似浏览器内存泄漏{len(leaks)}次:\n" + \
+        "\n".join(f"  - {leak['message']}{'（已回收）' if leak['recycled'] else ''}" for leak in leaks)
+
+def format_endpoint_message():
+    """网络抓包的接口排行（NETWORK_CAPTURE开启时，汇总本次运行全部用例的抓包，明细见json/endpoint_ranking.json）"""
+    if not cm.NETWORK_CAPTURE:
+        return ""
+    try:
+        ranking = rank_endpoints()
+    except (OSError, ValueError) as e:
+        logger.log("ERROR", f"❌ 汇总接口排行失败: {e}")
+        return ""
+    if not ranking:
+        return ""
+    slowest = [f"  - {r['endpoint']}：p95 {r['p95_ms']:g}ms，最大{r['max_ms']:g}ms（{r['count']}次，最慢于"
+               f"{r['slowest_at']['case']} 步骤{r['slowest_at']['step']} {r['slowest_at']['desc']}）"
+               for r in ranking["slowest"]]
+    largest = [f"  - {r['endpoint']}：最大{r['max_kb']:g}KB，合计{r['total_kb']:g}KB（{r['count']}次）"
+               for r in ranking["largest"]]
+    return "\n".join([f"🌐 最慢接口（p95耗时）前{len(slowest)}名:"] + slowest +
+                     [f"📦 最大接口响应前{len(largest)}名:"] + largest)
+
+def iter_merge_records(sources):
+    """
+    逐条读取多台机器的执行结果，输出 (用例名, 状态, 报错信息/超出预算说明)；通过但带slow标记的结果状态为slow
+    :param sources: allure-results目录，或每行一条Allure结果JSON的结果流文件（.jsonl，"-"表示标准输入）
+    """
+    for source in sources:
+        if os.path.isdir(source):
+            results = iter_allure_results(source)
+        elif source == "-" or os.path.isfile(source):
+            results = _iter_result_stream(source)
+        else:
+            logger.log("WARNING", f"合并来源不存在，已跳过: {source}")
+            continue
+        for result in results:
+            labels = {label.get("name"): label.get("value") for label in result.get("labels", [])}
+            name = labels.get(CASE_ID_PROPERTY) or result.get("name") or result.get("fullName", "")
+            status = result.get("status", "unknown")
+            if status == "passed" and SLOW_PROPERTY in labels:
+                yield name, "slow", labels[SLOW_PROPERTY]
+                continue
+            yield name, status, (result.get("statusDetails") or {}).get("message", "")
+
+def _iter_result_stream(path):
+    """逐行读取结果流（JSON Lines）"""
+    stream = sys.stdin if path == "-" else open(path, "r", encoding="utf-8")
+    try:
+        for line_no, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                logger.log("WARNING", f"结果流第{line_no}行解析失败（{path}）: {e}")
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
 
-def send_test_report(passed_tests, failed_tests, temp_dict, temp_dict_en, failed_details, status=1):
-    # 保持原有逻辑
-    def format_message(tests, is_passed, use_en=False):
+def merge_results(sources, status=1):
+    """合并多台机器的结果（重试去重：任一次通过即通过）并发送一条汇总通知"""
+    logger.log("INFO", f"开始合并{len(sources)}份执行结果: {sources}")
+    passed, failed, failed_details, slow_details = aggregate_outcomes(iter_merge_records(sources))
+    logger.log("INFO", f"合并完成：通过{len(passed)}条，超出性能预算{len(slow_details)}条，失败{len(failed)}条")
+    send_test_report(passed, failed, {}, {}, failed_details, status, slow_details=slow_details)
+    return passed, failed, failed_details, slow_details
+
+def format_test_report(passed_tests, failed_tests, temp_dict, failed_details, extra_msg="", quarantined=None,
+                       slow_details=None):
+    """
+    生成报告文本（通过/超出性能预算/失败用例、隔离说明、附加统计）
+    :param quarantined: 失败用例中处于隔离的用例（为空时不输出隔离说明）
+    :param slow_details: 通过但超出性能预算的用例 {用例名: 超出说明}
+    """
+    def format_message(tests, is_passed):
         if not tests:
             return ""
         symbol = '✅' if is_passed else '❌'
         messages = []
         for test in tests:
-            desc = temp_dict_en.get(test, test) if use_en else temp_dict.get(test, test)
-            msg = f"{symbol} {desc}"
+            msg = f"{symbol} {temp_dict.get(test, test)}"
             if not is_passed and test in failed_details:
                 msg += f"\n报错: {str(failed_details[test])[:200]}"
             messages.append(msg + "\n" + "-"*50)
         return "\n".join(messages)
 
     pass_msgs = format_message(passed_tests, is_passed=True)
+    slow_msgs = "\n".join(f"🐢 {temp_dict.get(test, test)}\n超出性能预算: {str(detail)[:200]}\n" + "-"*50
+                          for test, detail in (slow_details or {}).items())
     error_msgs = format_message(failed_tests, is_passed=False)
-    final_msg = f"{pass_msgs}\n{error_msgs}\n测试文档链接:https://nt2mf25usb.feishu.cn/wiki/TcHWwg3Tgiqotqkp7u4clnMLn5e\n--From Test-Server"
+    quarantine_msgs = ""
+    if quarantined:
+        quarantine_msgs = "🔒 其中以下失败用例处于隔离中（历史不稳定，不通知测试群/开发群）:\n" + \
+            "\n".join(f"  - {temp_dict.get(t, t)}" for t in quarantined) + "\n"
+    history_msg = f"{extra_msg}\n" if extra_msg else ""
+    slow_msgs = f"{slow_msgs}\n" if slow_msgs else ""
+    return f"{pass_msgs}\n{slow_msgs}{error_msgs}\n{quarantine_msgs}{history_msg}测试文档链接:https://nt2mf25usb.feishu.cn/wiki/TcHWwg3Tgiqotqkp7u4clnMLn5e\n--From Test-Server"
+
+def send_test_report(passed_tests, failed_tests, temp_dict, temp_dict_en, failed_details, status=1, extra_msg="",
+                     quarantined_tests=None, slow_details=None):
+    def build_message(failed):
+        # 完整报告附带隔离说明；发群的报告已去掉隔离用例，不再附带
+        return format_test_report(passed_tests, failed, temp_dict, failed_details, extra_msg,
+                                  quarantined if failed is failed_tests else None, slow_details)
+
+    # 隔离中的不稳定用例照常执行，但其失败不通知测试群/开发群
+    quarantined_set = set(quarantined_tests or [])
+    quarantined = [t for t in failed_tests if t in quarantined_set]
+    final_msg = build_message(failed_tests)
 
     if final_msg.strip():
         if status == 1:
             fsm.sendTextmessage(final_msg)
         elif status == 2:
-            fst.sendTextmessage(final_msg)
-            fsdev.sendTextmessage(final_msg)
+            group_msg = build_message([t for t in failed_tests if t not in quarantined_set]) if quarantined else final_msg
+            fst.sendTextmessage(group_msg)
+            fsdev.sendTextmessage(group_msg)
+            if quarantined:
+                fsm.sendTextmessage(final_msg)
 
     # 保存报告到文件（使用cm.json_dir()）
     report_txt_path = os.path.join(cm.json_dir(), "report.txt")
@@ -140,45 +345,148 @@ def send_test_report(passed_tests, failed_tests, temp_dict, temp_dict_en, failed
         f.write(final_msg)
     logger.log("INFO", f"报告已保存到: {report_txt_path}")
 
+def run_and_report(status=1, test_file=None, case_mark=None, isolated=False, extra_args=None):
+    """执行一次完整运行：执行用例 → 分类结果 → 发送报告；返回通过/失败数量"""
+    history_store.start_run(case_mark)
+    delete_report_file()
+    results = execute_test_steps(test_file, case_mark, isolated=isolated, extra_args=extra_args)
+
+    # 报告处理
+    temp_dict = {
+        'test_main_case': '主流程：OFF折扣支付验证',
+        'test_other_case': '非主流程：会员充值验证'
+    }
+    temp_dict_en = {
+        'test_main_case': 'Main: OFF Discount Payment',
+        'test_other_case': 'Other: Member Recharge'
+    }
+
+    if results is None:
+        results = read_test_report()
+    if not results:
+        logger.log("WARNING", "未读取到测试报告，跳过报告发送")
+        return None
+    passed, failed, failed_details, slow_details = classify_test_results(results)
+    history_store.finish_run(len(passed) + len(slow_details), len(failed))
+    extra_msg = "\n".join(filter(None, [
+        format_reused_message(reused_test_results(results)),
+        format_report_timing_message(),
+        format_checkpoint_message(),
+        format_healed_message(),
+        format_endpoint_message(),
+        format_leak_message(),
+        history_store.build_report_section()
+    ]))
+    send_test_report(passed, failed, temp_dict, temp_dict_en, failed_details, status, extra_msg=extra_msg,
+                     quarantined_tests=quarantined_test_results(results), slow_details=slow_details)
+    fsm.sendTextmessage("测试报告已发送")
+    archive_artifacts()
+    return {"passed": len(passed), "slow": len(slow_details), "failed": len(failed)}
+
+def archive_artifacts():
+    """本次运行的日志收入产物库，并按天归档旧运行的产物、按天数/大小清理（失败只记录，不影响运行结果）"""
+    try:
+        artifact_store.put_file(log_file_path, "log", run_id=history_store.run_id)
+        artifact_store.maintain(current_log=log_file_path)
+    except Exception as e:
+        logger.log("WARNING", f"产物库维护失败：{str(e)}")
+
+def run_daemon(status=1):
+    """常驻调度：按config/schedule.yaml的时段与间隔执行main/other，浏览器与后台会话在运行之间保持"""
+    from page_case.browser_pool import browser_pool
+
+    cm.KEEP_BROWSER_WARM = True
+
+    def run_mark(case_mark):
+        # 每次运行使用新的运行ID
+        os.environ.pop("RUN_ID", None)
+        return run_and_report(status, case_mark=case_mark)
+
+    try:
+        Scheduler(run_mark).run_forever()
+    finally:
+        browser_pool.recycle()
+
+def parse_args(argv=None):
+    """
+    解析命令行参数：
+    python run.py [status] [main|other|用例文件] [--isolated]
+    python run.py [status] merge <结果目录/结果流...>
+    python run.py [status] daemon
+    """
+    parser = argparse.ArgumentParser(description="收银台自动化测试入口")
+    parser.add_argument("status", nargs="?", type=int, default=1, help="通知方式：1=仅发给自己，2=测试群+开发群")
+    parser.add_argument("target", nargs="?", help="用例标记（main/other）、用例文件、merge或daemon")
+    parser.add_argument("sources", nargs="*", help="merge时的allure-results目录或结果流文件")
+    parser.add_argument("--isolated", action="store_true", help="以子进程方式执行pytest（不共享run.py进程状态）")
+    parser.add_argument("--tags", help="按标签筛选用例（逗号分隔），如 payment,discount")
+    parser.add_argument("--changed-only", action="store_true", help="只执行新增/变更/上次失败的用例")
+    parser.add_argument("--reruns", type=int, help="失败用例最多重跑次数（默认取RERUN_COUNT）")
+    parser.add_argument("--workers", type=int, help="按历史耗时分配用例的worker数量（多机分片时为机器数）")
+    parser.add_argument("--worker-index", type=int, help="分片模式：本机执行的worker序号（从0开始）")
+    parser.add_argument("--dry-run", action="store_true", help="干跑：使用内存假页面代替浏览器，报告只发给自己")
+    parser.add_argument("--profile", action="store_true", help="采样分析pytest会话，火焰图文件写入logs/profile/运行ID")
+    parser.add_argument("--trace-events", action="store_true",
+                        help="记录运行/用例/步骤/浏览器等待/HTTP请求的时间线，写入logs/trace/运行ID.json（Chrome trace-event格式）")
+    args = parser.parse_args(argv)
+    if args.worker_index is not None:
+        if not args.workers:
+            parser.error("--worker-index 需要同时指定 --workers")
+        if not 0 <= args.worker_index < args.workers:
+            parser.error(f"--worker-index 应为0到{args.workers - 1}（--workers={args.workers}）")
+    return args
+
+def build_extra_args(args):
+    """命令行选项转换为透传给pytest的参数"""
+    extra_args = []
+    if args.tags:
+        extra_args += ["--tags", args.tags]
+    if args.changed_only:
+        extra_args.append("--changed-only")
+    if args.reruns is not None:
+        extra_args += ["--reruns", str(args.reruns)]
+    if args.workers:
+        extra_args += ["--workers", str(args.workers)]
+    if args.worker_index is not None:
+        extra_args += ["--worker-index", str(args.worker_index)]
+    if args.dry_run:
+        extra_args.append("--dry-run")
+    if args.profile:
+        extra_args.append("--profile")
+    if args.trace_events:
+        extra_args.append("--trace-events")
+    return extra_args
+
 def main():
     try:
-        status = 1
+        args = parse_args()
+        status = args.status
         test_file = None
         case_mark = None
+        if args.dry_run:
+            # 干跑：run.py自身的运行登记也写入干跑历史库，报告只发给自己（page_backend同时是pytest插件，这里延迟导入）
+            from page_case.page_backend import enable_dry_run
+            enable_dry_run()
+            status = 1
 
-        # 解析命令行参数
-        if len(sys.argv) > 1:
-            status = int(sys.argv[1])
-        if len(sys.argv) > 2:
-            arg2 = sys.argv[2]
+        if args.target == "merge":
+            # 多机结果合并：python run.py <status> merge <结果目录/结果流...>
+            merge_results(args.sources, status)
+            fsm.sendTextmessage("合并测试报告已发送")
+            return
+        if args.target == "daemon":
+            # 常驻调度：python run.py <status> daemon
+            run_daemon(status)
+            return
+        if args.target:
             # 用例标记直接判断字符串（如果需要在cm中统一管理，可在ConfigManager中添加）
-            if arg2 in ["main", "other"]:
-                case_mark = arg2
+            if args.target in ["main", "other"]:
+                case_mark = args.target
             else:
-                test_file = arg2
+                test_file = args.target
 
         # 执行流程
-        delete_report_file()
-        execute_test_steps(test_file, case_mark)
-        terminate_java_process()
-
-        # 报告处理
-        temp_dict = {
-            'test_main_case': '主流程：OFF折扣支付验证',
-            'test_other_case': '非主流程：会员充值验证'
-        }
-        temp_dict_en = {
-            'test_main_case': 'Main: OFF Discount Payment',
-            'test_other_case': 'Other: Member Recharge'
-        }
-
-        results = read_test_report()
-        if results:
-            passed, failed, failed_details = classify_test_results(results)
-            send_test_report(passed, failed, temp_dict, temp_dict_en, failed_details, status)
-            fsm.sendTextmessage("测试报告已发送")
-        else:
-            logger.log("WARNING", "未读取到测试报告，跳过报告发送")
+        run_and_report(status, test_file, case_mark, isolated=args.isolated, extra_args=build_extra_args(args))
 
     except Exception as e:
         error_msg = f"测试执行失败: {str(e)}"
@@ -186,4 +494,4 @@ def main():
         fsm.sendTextmessage(error_msg)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
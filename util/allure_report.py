@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+@Author: XieLong
+@Date: 2026/10/19
+@File: allure_report.py
+@Description: 纯Python报告生成（逐个读取allure-results生成HTML/JSON汇总），Allure CLI改为可选的受控子进程
+"""
+
+import html
+import json
+import os
+import subprocess
+import sys
+import time
+
+from config.conf import cm
+from util.logger import logger_instance as logger
+from util.times import dt_strftime
+
+WIN = sys.platform.startswith('win')
+# 状态展示顺序及图标
+STATUS_ORDER = ["passed", "failed", "broken", "skipped", "unknown"]
+STATUS_ICON = {"passed": "✅", "failed": "❌", "broken": "💥", "skipped": "⏭️", "unknown": "❔"}
+
+
+def iter_allure_results(results_dir: str):
+    """
+    逐个读取allure-results中的 *-result.json（每次只解析一个文件，内存占用与用例数量无关）
+    :yield: 单条Allure结果dict
+    """
+    if not os.path.isdir(results_dir):
+        logger.log("WARNING", f"Allure结果目录不存在：{results_dir}")
+        return
+    with os.scandir(results_dir) as entries:
+        for entry in entries:
+            if not entry.name.endswith("-result.json"):
+                continue
+            try:
+                with open(entry.path, "r", encoding="utf-8") as f:
+                    yield json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                logger.log("WARNING", f"跳过无法解析的Allure结果文件（{entry.name}）：{str(e)}")
+
+
+def summarize_result(result: dict):
+    """提取单条Allure结果的报告字段"""
+    start, stop = result.get("start"), result.get("stop")
+    details = result.get("statusDetails") or {}
+    return {
+        "name": result.get("name", ""),
+        "full_name": result.get("fullName", ""),
+        "history_id": result.get("historyId", ""),
+        "status": result.get("status", "unknown"),
+        "duration": round((stop - start) / 1000, 3) if start and stop else 0,
+        "start": start,
+        "steps": len(result.get("steps") or []),
+        "message": (details.get("message") or "")[:500]
+    }
+
+
+class NativeReportGenerator:
+    """纯Python报告生成器：不依赖Java，输出 summary.json + index.html"""
+
+    def __init__(self, results_dir: str = None, report_dir: str = None):
+        self.results_dir = results_dir or cm.ALLURE_RESULTS_PATH
+        self.report_dir = report_dir or cm.ALLURE_REPORT_PATH
+
+    def build_summary(self):
+        """流式汇总结果（只保留精简字段）"""
+        counts = {status: 0 for status in STATUS_ORDER}
+        cases = []
+        first_start, last_stop = None, None
+        for result in iter_allure_results(self.results_dir):
+            case = summarize_result(result)
+            counts[case["status"] if case["status"] in counts else "unknown"] += 1
+            cases.append(case)
+            if result.get("start"):
+                first_start = min(first_start or result["start"], result["start"])
+            if result.get("stop"):
+                last_stop = max(last_stop or result["stop"], result["stop"])
+        cases.sort(key=lambda c: (STATUS_ORDER.index(c["status"]) if c["status"] in STATUS_ORDER else 99,
+                                  c["start"] or 0))
+        return {
+            "generated_at": dt_strftime("%Y-%m-%d %H:%M:%S"),
+            "total": len(cases),
+            "counts": counts,
+            "wall_time": round((last_stop - first_start) / 1000, 3) if first_start and last_stop else 0,
+            "cases": cases
+        }
+
+    def render_html(self, summary: dict):
+        """渲染静态HTML汇总页"""
+        rows = "\n".join(
+            f"<tr class='{c['status']}'><td>{STATUS_ICON.get(c['status'], '')} {html.escape(c['status'])}</td>"
+            f"<td>{html.escape(c['name'])}</td><td>{c['duration']}s</td><td>{c['steps']}</td>"
+            f"<td><pre>{html.escape(c['message'])}</pre></td></tr>"
+            for c in summary["cases"]
+        )
+        counts = " ".join(f"<span class='{k}'>{k}: {v}</span>" for k, v in summary["counts"].items() if v)
+        return f"""<!DOCTYPE html>
+<html lang="zh-CN"><head><meta charset="utf-8"><title>收银台自动化测试报告</title>
+<style>
+body{{font-family:sans-serif;margin:24px}} table{{border-collapse:collapse;width:100%}}
+td,th{{border:1px solid #ddd;padding:6px;vertical-align:top}} pre{{margin:0;white-space:pre-wrap}}
+.passed{{color:#2e7d32}} .failed{{color:#c62828}} .broken{{color:#ef6c00}} .skipped{{color:#757575}}
+span{{margin-right:16px}}
+</style></head><body>
+<h2>收银台自动化测试报告</h2>
+<p>生成时间：{summary['generated_at']}　用例总数：{summary['total']}　执行耗时：{summary['wall_time']}s</p>
+<p>{counts}</p>
+<table><tr><th>状态</th><th>用例</th><th>耗时</th><th>步骤数</th><th>错误信息</th></tr>
+{rows}
+</table></body></html>
+"""
+
+    def write_summary(self, summary: dict):
+        """写入summary.json（Allure CLI执行后带上其耗时重写）"""
+        with open(os.path.join(self.report_dir, "summary.json"), "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+
+    def generate(self):
+        """生成报告，返回汇总dict"""
+        start = time.perf_counter()
+        summary = self.build_summary()
+        os.makedirs(self.report_dir, exist_ok=True)
+        with open(os.path.join(self.report_dir, "index.html"), "w", encoding="utf-8") as f:
+            f.write(self.render_html(summary))
+        summary["generate_seconds"] = round(time.perf_counter() - start, 3)
+        self.write_summary(summary)
+        logger.log("INFO", f"✅ 报告已生成（纯Python，用时{summary['generate_seconds']}s）：{self.report_dir}")
+        return summary
+
+
+class AllureCli:
+    """可选的Allure CLI（按需开启），以受控子进程运行，只终止自己拉起的进程"""
+
+    def __init__(self, results_dir: str = None, report_dir: str = None):
+        self.results_dir = results_dir or cm.ALLURE_RESULTS_PATH
+        self.report_dir = os.path.join(report_dir or cm.ALLURE_REPORT_PATH, "allure")
+        self.process = None
+
+    def generate(self, timeout: int = None):
+        """执行allure generate，返回耗时（秒）；超时则终止该子进程"""
+        cmd = ["allure", "generate", self.results_dir, "-c", "-o", self.report_dir]
+        start = time.perf_counter()
+        self.process = subprocess.Popen(
+            cmd, shell=WIN,
+            # 独立进程组，终止时连同其JVM一并结束
+            start_new_session=not WIN,
+            creationflags=subprocess.CREATE_NEW_PROCESS_GROUP if WIN else 0
+        )
+        try:
+            code = self.process.wait(timeout=timeout or cm.ALLURE_CLI_TIMEOUT)
+        except subprocess.TimeoutExpired:
+            logger.log("ERROR", f"❌ Allure CLI执行超时，终止子进程（pid={self.process.pid}）")
+            self.terminate()
+            raise
+        if code != 0:
+            raise subprocess.CalledProcessError(code, " ".join(cmd))
+        elapsed = round(time.perf_counter() - start, 3)
+        logger.log("INFO", f"✅ Allure CLI报告已生成（用时{elapsed}s）：{self.report_dir}")
+        return elapsed
+
+    def terminate(self):
+        """终止本实例拉起的Allure进程（不影响主机上其他Java进程）"""
+        if not self.process or self.process.poll() is not None:
+            return
+        try:
+            if WIN:
+                subprocess.run(["taskkill", "/F", "/T", "/PID", str(self.process.pid)], check=False)
+            else:
+                os.killpg(self.process.pid, 9)
+            self.process.wait(timeout=10)
+            logger.log("INFO", f"Allure子进程已终止（pid={self.process.pid}）")
+        except Exception as e:
+            logger.log("ERROR", f"终止Allure子进程时发生错误: {e}")
+
+
+def generate_report(results_dir: str = None, report_dir: str = None):
+    """
+    生成测试报告：默认纯Python生成；ALLURE_CLI=true时额外调用Allure CLI，并记录两者耗时对比
+    :return: 汇总dict（含generate_seconds，开启CLI时含allure_cli_seconds，两者都写入summary.json）
+    """
+    generator = NativeReportGenerator(results_dir, report_dir)
+    summary = generator.generate()
+    if cm.ALLURE_CLI:
+        cli = AllureCli(results_dir, report_dir)
+        try:
+            summary["allure_cli_seconds"] = cli.generate()
+            generator.write_summary(summary)
+            logger.log("INFO", f"报告生成耗时对比：纯Python {summary['generate_seconds']}s / "
+                               f"Allure CLI {summary['allure_cli_seconds']}s")
+        except Exception as e:
+            logger.log("ERROR", f"❌ Allure CLI报告生成失败：{str(e)}")
+        finally:
+            cli.terminate()
+    return summary
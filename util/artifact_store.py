@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+@Author: XieLong
+@Date: 2026/10/19
+@File: artifact_store.py
+@Description: 产物库：截图/DOM快照/日志等按内容哈希（SHA-256）存储，相同内容只存一份；索引（SQLite）记录运行与产物的对应关系；
+旧运行的产物按天压缩归档，并按保留天数与总大小清理
+
+目录 data/artifacts/：
+    objects/ab/<哈希>.<扩展名>   未归档的产物（按哈希前两位分目录）
+    archives/<日期>.zip         按天归档的产物（成员名为 <哈希>.<扩展名>）
+    index.db                    索引：objects（内容）与 artifacts（运行/用例 → 内容）
+
+用法：
+    python -m util.artifact_store                 # 执行归档与清理
+    python -m util.artifact_store --run RUN_ID    # 列出某次运行的产物
+"""
+import argparse
+import hashlib
+import os
+import shutil
+import sqlite3
+import time
+import zipfile
+from contextlib import contextmanager
+
+from config.conf import cm
+from util.logger import logger_instance as logger
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS objects (
+    sha256      TEXT PRIMARY KEY,
+    ext         TEXT NOT NULL,
+    size        INTEGER NOT NULL,
+    archive     TEXT,
+    created_at  REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_objects_archive ON objects(archive);
+CREATE TABLE IF NOT EXISTS artifacts (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id      TEXT,
+    case_id     TEXT,
+    kind        TEXT NOT NULL,
+    name        TEXT NOT NULL,
+    sha256      TEXT NOT NULL,
+    created_at  REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_artifacts_run ON artifacts(run_id);
+CREATE INDEX IF NOT EXISTS idx_artifacts_sha ON artifacts(sha256);
+CREATE INDEX IF NOT EXISTS idx_artifacts_time ON artifacts(created_at);
+"""
+DAY = 86400
+
+
+def day_of(timestamp: float):
+    """时间戳所在日期（本地时间），即归档文件名"""
+    return time.strftime("%Y-%m-%d", time.localtime(timestamp))
+
+
+def runtime_dirs():
+    """
+    运行期按运行ID生成的目录/文件，超过归档期限后收入产物库并删除原文件
+    :return: [(目录, 产物类型)]；目录下的子目录名或文件名（去扩展名）即运行ID
+    """
+    return [
+        (cm.HAR_PATH, "har"),
+        (os.path.join(cm.LOG_PATH, "profile"), "profile"),
+        (os.path.join(cm.LOG_PATH, "trace"), "trace"),
+    ]
+
+
+class ArtifactStore:
+    """内容寻址产物库（单例）"""
+    _instance = None
+
+    def __new__(cls, *args, **kwargs):
+        if not cls._instance:
+            cls._instance = super(ArtifactStore, cls).__new__(cls)
+        return cls._instance
+
+    def __init__(self, root: str = None):
+        self.root = root or cm.ARTIFACT_PATH
+        self.index_file = os.path.join(self.root, "index.db")
+        self._schema_ready = False
+
+    @contextmanager
+    def _connect(self):
+        os.makedirs(self.root, exist_ok=True)
+        conn = sqlite3.connect(self.index_file, timeout=30)
+        try:
+            if not self._schema_ready:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.executescript(SCHEMA)
+                self._schema_ready = True
+            yield conn
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _object_path(self, sha256: str, ext: str):
+        return os.path.join(self.root, "objects", sha256[:2], f"{sha256}{ext}")
+
+    def _archive_path(self, archive: str):
+        return os.path.join(self.root, "archives", archive)
+
+    # ---------------- 写入 ----------------
+    def put(self, data, kind: str, name: str, ext: str = "", run_id: str = None, case_id: str = None,
+            created_at: float = None):
+        """
+        保存一个产物：内容已存在时只新增索引记录（内容已归档时重新写回未归档目录，随本次运行再归档，避免随旧归档被删除）
+        :param data: bytes或str（str按UTF-8编码）
+        :param ext: 扩展名（如 .png），打开归档/解压后便于识别类型
+        :return: 内容哈希
+        """
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        sha256 = hashlib.sha256(data).hexdigest()
+        created_at = created_at or time.time()
+        with self._connect() as conn:
+            row = conn.execute("SELECT ext, archive FROM objects WHERE sha256 = ?", (sha256,)).fetchone()
+            if row is None or row[1] is not None:
+                ext = row[0] if row else ext
+                path = self._object_path(sha256, ext)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp_path = f"{path}.{os.getpid()}.tmp"
+                with open(tmp_path, "wb") as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+                conn.execute("INSERT OR REPLACE INTO objects (sha256, ext, size, archive, created_at) VALUES (?, ?, ?, NULL, ?)",
+                             (sha256, ext, len(data), created_at))
+            conn.execute("INSERT INTO artifacts (run_id, case_id, kind, name, sha256, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                         (run_id, case_id, kind, name, sha256, created_at))
+        return sha256
+
+    def put_file(self, path: str, kind: str, run_id: str = None, case_id: str = None, name: str = None,
+                 created_at: float = None):
+        """保存一个文件（产物名默认取文件名）"""
+        with open(path, "rb") as f:
+            data = f.read()
+        return self.put(data, kind, name or os.path.basename(path), os.path.splitext(path)[1], run_id, case_id,
+                        created_at)
+
+    # ---------------- 读取 ----------------
+    def read(self, sha256: str):
+        """按哈希读取产物内容（未归档的直接读文件，已归档的从当天的zip中读取）"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT ext, archive FROM objects WHERE sha256 = ?", (sha256,)).fetchone()
+        if not row:
+            raise ValueError(f"产物不存在：{sha256}")
+        ext, archive = row
+        if archive is None:
+            with open(self._object_path(sha256, ext), "rb") as f:
+                return f.read()
+        with zipfile.ZipFile(self._archive_path(archive)) as zf:
+            return zf.read(f"{sha256}{ext}")
+
+    def artifacts_of(self, run_id: str):
+        """某次运行的产物：[{"case_id", "kind", "name", "sha256", "size", "archive"}]"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT a.case_id, a.kind, a.name, a.sha256, o.size, o.archive FROM artifacts a "
+                "JOIN objects o ON o.sha256 = a.sha256 WHERE a.run_id = ? ORDER BY a.id", (run_id,)
+            ).fetchall()
+        keys = ("case_id", "kind", "name", "sha256", "size", "archive")
+        return [dict(zip(keys, row)) for row in rows]
+
+    # ---------------- 归档与清理 ----------------
+    def ingest_runtime_files(self, cutoff: float, current_log: str = None):
+        """
+        收入早于cutoff的运行期文件并删除原文件：各运行的抓包/采样分析/链路追踪目录、历史日志、截图目录下的文件
+        :return: 收入的文件数
+        """
+        count = 0
+        for base_dir, kind in runtime_dirs():
+            if not os.path.isdir(base_dir):
+                continue
+            for entry in sorted(os.listdir(base_dir)):
+                path = os.path.join(base_dir, entry)
+                if os.path.getmtime(path) >= cutoff:
+                    continue
+                run_id = entry if os.path.isdir(path) else os.path.splitext(entry)[0]
+                files = [os.path.join(d, f) for d, _, names in os.walk(path) for f in names] \
+                    if os.path.isdir(path) else [path]
+                for file_path in files:
+                    self.put_file(file_path, kind, run_id=run_id, name=os.path.relpath(file_path, base_dir),
+                                  created_at=os.path.getmtime(file_path))
+                    count += 1
+                if os.path.isdir(path):
+                    shutil.rmtree(path)
+                else:
+                    os.remove(path)
+        for base_dir, kind, suffix in ((cm.LOG_PATH, "log", ".log"), (cm.SCREENSHOT_PATH, "screenshot", "")):
+            if not os.path.isdir(base_dir):
+                continue
+            for entry in sorted(os.listdir(base_dir)):
+                path = os.path.join(base_dir, entry)
+                if (not os.path.isfile(path) or not entry.endswith(suffix) or os.path.getmtime(path) >= cutoff
+                        or (current_log and os.path.abspath(path) == os.path.abspath(current_log))):
+                    continue
+                self.put_file(path, kind, created_at=os.path.getmtime(path))
+                os.remove(path)
+                count += 1
+        return count
+
+    def compact(self, cutoff: float):
+        """
+        按天归档：全部引用都早于cutoff的未归档内容，写入其最后一次引用当天的zip并删除原文件；无引用的内容删除
+        （同一内容只存在于一处：未归档目录或某一天的归档）
+        :return: 归档的内容数
+        """
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT o.sha256, o.ext, MAX(a.created_at) FROM objects o LEFT JOIN artifacts a ON a.sha256 = o.sha256 "
+                "WHERE o.archive IS NULL GROUP BY o.sha256"
+            ).fetchall()
+        by_day = {}
+        for sha256, ext, last_used in rows:
+            if last_used is not None and last_used < cutoff:
+                by_day.setdefault(day_of(last_used), []).append((sha256, ext))
+
+        os.makedirs(os.path.join(self.root, "archives"), exist_ok=True)
+        for day, objects in sorted(by_day.items()):
+            archive = f"{day}.zip"
+            with zipfile.ZipFile(self._archive_path(archive), "a", zipfile.ZIP_DEFLATED) as zf:
+                existing = set(zf.namelist())
+                for sha256, ext in objects:
+                    if f"{sha256}{ext}" not in existing:
+                        zf.write(self._object_path(sha256, ext), f"{sha256}{ext}")
+            with self._connect() as conn:
+                conn.executemany("UPDATE objects SET archive = ? WHERE sha256 = ?",
+                                 [(archive, sha256) for sha256, _ in objects])
+            for sha256, ext in objects:
+                os.remove(self._object_path(sha256, ext))
+        self._drop_unreferenced()
+        return sum(len(objects) for objects in by_day.values())
+
+    def _drop_unreferenced(self):
+        """删除已无引用的内容（未归档的删除文件；已归档的只删索引，归档文件在其全部内容都删除后清理）"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT o.sha256, o.ext, o.archive FROM objects o LEFT JOIN artifacts a ON a.sha256 = o.sha256 "
+                "WHERE a.sha256 IS NULL"
+            ).fetchall()
+            conn.executemany("DELETE FROM objects WHERE sha256 = ?", [(r[0],) for r in rows])
+        for sha256, ext, archive in rows:
+            path = self._object_path(sha256, ext)
+            if archive is None and os.path.exists(path):
+                os.remove(path)
+
+    def _drop_archive(self, archive: str):
+        """删除一天的归档及其中内容的全部引用"""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM artifacts WHERE sha256 IN (SELECT sha256 FROM objects WHERE archive = ?)",
+                         (archive,))
+            conn.execute("DELETE FROM objects WHERE archive = ?", (archive,))
+        path = self._archive_path(archive)
+        if os.path.exists(path):
+            os.remove(path)
+
+    def total_size(self):
+        """产物库占用（未归档内容 + 归档文件，字节）"""
+        with self._connect() as conn:
+            loose = conn.execute("SELECT COALESCE(SUM(size), 0) FROM objects WHERE archive IS NULL").fetchone()[0]
+        archive_dir = os.path.join(self.root, "archives")
+        archived = sum(os.path.getsize(os.path.join(archive_dir, name)) for name in os.listdir(archive_dir)) \
+            if os.path.isdir(archive_dir) else 0
+        return loose + archived
+
+    def enforce_retention(self, max_age_days: float, max_mb: float):
+        """
+        清理：删除超过保留天数的索引记录及不再被引用的内容/归档；总大小仍超过max_mb时从最早的归档开始删除（未归档的近期产物不删）
+        :return: 删除的归档文件名列表
+        """
+        with self._connect() as conn:
+            conn.execute("DELETE FROM artifacts WHERE created_at < ?", (time.time() - max_age_days * DAY,))
+        self._drop_unreferenced()
+        with self._connect() as conn:
+            live = {r[0] for r in conn.execute("SELECT DISTINCT archive FROM objects WHERE archive IS NOT NULL")}
+        archive_dir = os.path.join(self.root, "archives")
+        dropped = []
+        for archive in sorted(os.listdir(archive_dir)) if os.path.isdir(archive_dir) else []:
+            if archive not in live or self.total_size() > max_mb * 1024 * 1024:
+                self._drop_archive(archive)
+                dropped.append(archive)
+        if self.total_size() > max_mb * 1024 * 1024:
+            logger.log("WARNING", f"产物库仍超过{max_mb:g}MB（均为未归档的近期产物），请调大ARTIFACT_MAX_MB或缩短ARTIFACT_COMPACT_DAYS")
+        return dropped
+
+    def maintain(self, current_log: str = None):
+        """运行结束后维护：收入旧的运行期文件 → 按天归档 → 按天数/大小清理"""
+        cutoff = time.time() - cm.ARTIFACT_COMPACT_DAYS * DAY
+        ingested = self.ingest_runtime_files(cutoff, current_log)
+        archived = self.compact(cutoff)
+        dropped = self.enforce_retention(cm.ARTIFACT_RETENTION_DAYS, cm.ARTIFACT_MAX_MB)
+        logger.log("INFO", f"🗄️ 产物库维护完成：收入{ingested}个文件，归档{archived}个内容，删除归档{len(dropped)}个，"
+                           f"当前占用{self.total_size() / 1024 / 1024:.1f}MB")
+        return {"ingested": ingested, "archived": archived, "dropped": dropped}
+
+
+# 全局唯一产物库
+artifact_store = ArtifactStore()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="产物库：归档与清理，或列出某次运行的产物")
+    parser.add_argument("--run", help="列出该运行ID的产物")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.run:
+        for artifact in artifact_store.artifacts_of(args.run):
+            print(f"{artifact['kind']:<11}{artifact['size']:>10}  {artifact['sha256'][:12]}  "
+                  f"{artifact['archive'] or '-':<15}{artifact['case_id'] or ''}  {artifact['name']}")
+    else:
+        artifact_store.maintain()
@@ -0,0 +1,375 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+@Author: XieLong
+@Date: 2026/10/19
+@File: history_store.py
+@Description: 运行历史库（SQLite）：记录每次运行的用例/步骤结果与耗时，支持不稳定用例与耗时回归分析
+"""
+
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+
+from common.yaml_util import variant_id
+from config.conf import cm
+from util.logger import logger_instance as logger
+from util.times import dt_strftime
+
+# 表结构（用例结果按 用例/运行/时间 建索引）
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id      TEXT PRIMARY KEY,
+    case_mark   TEXT,
+    started_at  REAL,
+    finished_at REAL,
+    passed      INTEGER,
+    failed      INTEGER
+);
+CREATE TABLE IF NOT EXISTS case_results (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id      TEXT NOT NULL,
+    case_id     TEXT NOT NULL,
+    attempt     INTEGER NOT NULL DEFAULT 1,
+    outcome     TEXT NOT NULL,
+    duration    REAL NOT NULL,
+    message     TEXT,
+    created_at  REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_case_results_case ON case_results(case_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_case_results_run ON case_results(run_id);
+CREATE INDEX IF NOT EXISTS idx_case_results_time ON case_results(created_at);
+CREATE TABLE IF NOT EXISTS step_results (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    result_id   INTEGER NOT NULL,
+    run_id      TEXT NOT NULL,
+    case_id     TEXT NOT NULL,
+    step_index  INTEGER NOT NULL,
+    action      TEXT,
+    step_desc   TEXT,
+    outcome     TEXT NOT NULL,
+    duration    REAL NOT NULL,
+    created_at  REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_step_results_case ON step_results(case_id, step_index);
+CREATE INDEX IF NOT EXISTS idx_step_results_run ON step_results(run_id);
+CREATE TABLE IF NOT EXISTS resource_samples (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    result_id   INTEGER NOT NULL,
+    run_id      TEXT NOT NULL,
+    case_id     TEXT NOT NULL,
+    step_index  INTEGER NOT NULL,
+    rss_mb      REAL,
+    cpu_pct     REAL,
+    processes   INTEGER,
+    js_heap_mb  REAL,
+    created_at  REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_resource_samples_run ON resource_samples(run_id);
+CREATE TABLE IF NOT EXISTS case_fingerprints (
+    case_id      TEXT PRIMARY KEY,
+    fingerprint  TEXT NOT NULL,
+    last_outcome TEXT NOT NULL,
+    last_run_id  TEXT,
+    updated_at   REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def percentile(values, pct):
+    """最近秩法计算百分位（values无需有序）"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * pct // 100))  # 向上取整
+    return ordered[int(rank) - 1]
+
+
+class HistoryStore:
+    """运行历史库（单例，run.py与pytest进程共用同一个库文件）"""
+    _instance = None
+
+    def __new__(cls, *args, **kwargs):
+        if not cls._instance:
+            cls._instance = super(HistoryStore, cls).__new__(cls)
+        return cls._instance
+
+    def __init__(self, db_path: str = None):
+        self.db_path = db_path or cm.HISTORY_DB_FILE
+        self._schema_ready = False
+
+    def use_db(self, db_path: str):
+        """切换历史库文件（如干跑时写入单独的库）"""
+        self.db_path = db_path
+        self._schema_ready = False
+
+    @property
+    def run_id(self):
+        """本次运行ID（写入环境变量，保证run.py与其拉起的pytest子进程一致）"""
+        return os.environ.setdefault("RUN_ID", f"{dt_strftime()}-{os.getpid()}")
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            if not self._schema_ready:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.executescript(SCHEMA)
+                self._schema_ready = True
+            yield conn
+            conn.commit()
+        finally:
+            conn.close()
+
+    # ---------------- 写入 ----------------
+    def start_run(self, case_mark: str = None):
+        """登记一次运行的开始"""
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO runs (run_id, case_mark, started_at) VALUES (?, ?, ?)",
+                (self.run_id, case_mark, time.time())
+            )
+
+    def finish_run(self, passed: int, failed: int):
+        """登记一次运行的结束及汇总"""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE runs SET finished_at = ?, passed = ?, failed = ? WHERE run_id = ?",
+                (time.time(), passed, failed, self.run_id)
+            )
+
+    def record_case(self, case_id: str, outcome: str, duration: float, steps=None, message: str = ""):
+        """
+        记录一次用例执行（含步骤明细）；同一运行内重复执行时attempt自动递增
+        :param steps: 步骤记录列表 [{"index", "action", "desc", "outcome", "duration"}]，outcome为passed/failed/reused/slow；
+                      带telemetry（浏览器资源采样）的步骤同时写入resource_samples
+        """
+        now = time.time()
+        with self._connect() as conn:
+            attempt = conn.execute(
+                "SELECT COUNT(*) FROM case_results WHERE run_id = ? AND case_id = ?",
+                (self.run_id, case_id)
+            ).fetchone()[0] + 1
+            cur = conn.execute(
+                "INSERT INTO case_results (run_id, case_id, attempt, outcome, duration, message, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (self.run_id, case_id, attempt, outcome, duration, (message or "")[:2000], now)
+            )
+            conn.executemany(
+                "INSERT INTO step_results (result_id, run_id, case_id, step_index, action, step_desc, "
+                "outcome, duration, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(cur.lastrowid, self.run_id, case_id, s["index"], s.get("action"), s.get("desc"),
+                  s["outcome"], s["duration"], now) for s in (steps or [])]
+            )
+            conn.executemany(
+                "INSERT INTO resource_samples (result_id, run_id, case_id, step_index, rss_mb, cpu_pct, processes, "
+                "js_heap_mb, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(cur.lastrowid, self.run_id, case_id, s["index"], s["telemetry"].get("rss_mb"),
+                  s["telemetry"].get("cpu_pct"), s["telemetry"].get("processes"), s["telemetry"].get("js_heap_mb"), now)
+                 for s in (steps or []) if s.get("telemetry")]
+            )
+
+    def save_fingerprint(self, case_id: str, fingerprint: str, outcome: str):
+        """记录用例指纹（内容哈希+引擎版本）及最近一次执行结果"""
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO case_fingerprints (case_id, fingerprint, last_outcome, last_run_id, updated_at) "
+                "VALUES (?, ?, ?, ?, ?)", (case_id, fingerprint, outcome, self.run_id, time.time())
+            )
+
+    def fingerprints(self):
+        """{case_id: (指纹, 最近结果)}"""
+        with self._connect() as conn:
+            rows = conn.execute("SELECT case_id, fingerprint, last_outcome FROM case_fingerprints").fetchall()
+        return {r[0]: (r[1], r[2]) for r in rows}
+
+    def get_meta(self, key: str, default=None):
+        with self._connect() as conn:
+            row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def set_meta(self, key: str, value):
+        with self._connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value)))
+
+    # ---------------- 查询 ----------------
+    def _recent_runs(self, conn, window: int):
+        rows = conn.execute(
+            "SELECT run_id, MIN(created_at) AS t FROM case_results GROUP BY run_id "
+            "ORDER BY t DESC LIMIT ?", (window,)
+        ).fetchall()
+        return [r[0] for r in rows]
+
+    def flaky_cases(self, window: int = None):
+        """
+        不稳定用例：最近window次运行中
+        1) 同一次运行内先失败、重试后才通过；或
+        2) 按运行汇总（任一次通过即通过）的结果在通过/失败之间来回切换
+        :return: [{"case_id", "reason", "runs", "flips"}]
+        """
+        window = window or cm.HISTORY_WINDOW
+        with self._connect() as conn:
+            run_ids = self._recent_runs(conn, window)
+            if not run_ids:
+                return []
+            marks = ",".join("?" * len(run_ids))
+            rows = conn.execute(
+                f"SELECT case_id, run_id, outcome, MIN(created_at) FROM case_results "
+                f"WHERE run_id IN ({marks}) AND outcome != 'skipped' "
+                f"GROUP BY case_id, run_id, outcome", run_ids
+            ).fetchall()
+
+        per_case = {}
+        for case_id, run_id, outcome, created_at in rows:
+            run = per_case.setdefault(case_id, {}).setdefault(run_id, [created_at, set()])
+            run[0] = min(run[0], created_at)
+            run[1].add(outcome)
+
+        flaky = []
+        for case_id, runs in per_case.items():
+            ordered = [outcomes for _, outcomes in sorted(runs.values(), key=lambda r: r[0])]
+            retried = sum(1 for o in ordered if "passed" in o and len(o) > 1)
+            summary = ["passed" in o for o in ordered]
+            flips = sum(1 for a, b in zip(summary, summary[1:]) if a != b)
+            if retried:
+                flaky.append({"case_id": case_id, "reason": f"重试后通过{retried}次", "runs": len(ordered), "flips": flips})
+            elif flips >= 2:
+                flaky.append({"case_id": case_id, "reason": f"通过/失败交替{flips}次", "runs": len(ordered), "flips": flips})
+        return sorted(flaky, key=lambda f: -f["flips"])
+
+    def case_durations(self, case_id: str, limit: int):
+        """某用例最近limit次通过的耗时（按时间正序）"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT duration FROM case_results WHERE case_id = ? AND outcome = 'passed' "
+                "ORDER BY created_at DESC LIMIT ?", (case_id, limit)
+            ).fetchall()
+        return [r[0] for r in reversed(rows)]
+
+    def estimated_durations(self, case_ids, window: int = None):
+        """
+        按历史预估用例耗时：最近window次通过耗时的平均值（无历史的用例不返回）
+        :return: {case_id: 秒}
+        """
+        window = window or cm.HISTORY_WINDOW
+        case_ids = list(case_ids)
+        if not case_ids:
+            return {}
+        samples = {}
+        with self._connect() as conn:
+            marks = ",".join("?" * len(case_ids))
+            rows = conn.execute(
+                f"SELECT case_id, duration FROM case_results WHERE outcome = 'passed' "
+                f"AND case_id IN ({marks}) ORDER BY created_at DESC", case_ids
+            )
+            for case_id, duration in rows:
+                values = samples.setdefault(case_id, [])
+                if len(values) < window:
+                    values.append(duration)
+        return {case_id: sum(v) / len(v) for case_id, v in samples.items()}
+
+    def step_durations(self, case_ids, window: int = None):
+        """
+        按历史预估各步骤耗时：最近window次实际执行（复用共享前缀而跳过的不计）的平均值
+        :return: {case_id: {步骤序号: 秒}}
+        """
+        window = window or cm.HISTORY_WINDOW
+        case_ids = list(case_ids)
+        if not case_ids:
+            return {}
+        samples = {}
+        with self._connect() as conn:
+            marks = ",".join("?" * len(case_ids))
+            rows = conn.execute(
+                f"SELECT case_id, step_index, duration FROM step_results WHERE outcome IN ('passed', 'slow') "
+                f"AND case_id IN ({marks}) ORDER BY created_at DESC", case_ids
+            )
+            for case_id, step_index, duration in rows:
+                values = samples.setdefault(case_id, {}).setdefault(step_index, [])
+                if len(values) < window:
+                    values.append(duration)
+        return {case_id: {index: sum(v) / len(v) for index, v in steps.items()} for case_id, steps in samples.items()}
+
+    def duration_regressions(self, window: int = None, threshold_pct: float = None):
+        """
+        耗时回归：最近window次通过耗时的p95，相比再往前window次的p95上涨超过threshold_pct%
+        :return: [{"case_id", "baseline_p95", "current_p95", "increase_pct"}]
+        """
+        window = window or cm.HISTORY_WINDOW
+        threshold_pct = cm.P95_REGRESSION_PCT if threshold_pct is None else threshold_pct
+        with self._connect() as conn:
+            case_ids = [r[0] for r in conn.execute("SELECT DISTINCT case_id FROM case_results").fetchall()]
+
+        regressions = []
+        for case_id in case_ids:
+            durations = self.case_durations(case_id, window * 2)
+            current, baseline = durations[-window:], durations[:-window]
+            if len(current) < cm.P95_MIN_SAMPLES or len(baseline) < cm.P95_MIN_SAMPLES:
+                continue
+            current_p95, baseline_p95 = percentile(current, 95), percentile(baseline, 95)
+            if baseline_p95 <= 0:
+                continue
+            increase = (current_p95 - baseline_p95) / baseline_p95 * 100
+            if increase > threshold_pct:
+                regressions.append({
+                    "case_id": case_id,
+                    "baseline_p95": round(baseline_p95, 2),
+                    "current_p95": round(current_p95, 2),
+                    "increase_pct": round(increase, 1)
+                })
+        return sorted(regressions, key=lambda r: -r["increase_pct"])
+
+    def build_report_section(self):
+        """生成追加到测试报告的历史分析段落（无异常时返回空字符串）"""
+        try:
+            flaky = self.flaky_cases()
+            regressions = self.duration_regressions()
+        except sqlite3.Error as e:
+            logger.log("ERROR", f"❌ 读取运行历史失败：{str(e)}")
+            return ""
+
+        lines = []
+        if flaky:
+            lines.append(f"⚠️ 不稳定用例（最近{cm.HISTORY_WINDOW}次运行）:")
+            lines += [f"  - {f['case_id']}：{f['reason']}" for f in flaky]
+        if regressions:
+            lines.append(f"🐢 耗时回归（p95上涨超过{cm.P95_REGRESSION_PCT:g}%）:")
+            lines += [f"  - {r['case_id']}：{r['baseline_p95']}s → {r['current_p95']}s（+{r['increase_pct']}%）"
+                      for r in regressions]
+        return "\n".join(lines)
+
+
+# 用例标识在报告中的标记（收集时写入user_properties，Allure结果中为同名label），报告按此汇总结果
+CASE_ID_PROPERTY = "case_id"
+# 隔离用例在报告中的标记（写入user_properties）
+QUARANTINE_PROPERTY = "quarantined"
+# 跳过用例的原因（报告中展示为“复用结果”）
+REUSED_REASON = "reused result"
+
+
+def case_file_of(item):
+    """参数化YAML用例对应的用例文件 标记/文件名（如main/xxx.yaml），非YAML用例返回None"""
+    callspec = getattr(item, "callspec", None)
+    yaml_file = callspec.params.get("yaml_file") if callspec else None
+    if not yaml_file:
+        return None
+    mark = cm.MAIN_CASE_MARK if item.get_closest_marker(cm.MAIN_CASE_MARK) else cm.OTHER_CASE_MARK
+    return f"{mark}/{yaml_file}"
+
+
+def case_id_of(item):
+    """pytest用例的历史标识：YAML用例取 标记/文件名，矩阵变体追加[变体标识]（如main/xxx.yaml[app_id=10014]），其余取nodeid"""
+    case_file = case_file_of(item)
+    if not case_file:
+        return item.nodeid
+    variables = item.callspec.params.get("case_variables")
+    return f"{case_file}[{variant_id(variables)}]" if variables else case_file
+
+
+# 全局唯一历史库实例
+history_store = HistoryStore()
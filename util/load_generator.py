@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+@Author: XieLong
+@Date: 2026/10/19
+@File: load_generator.py
+@Description: 高峰压测：多个虚拟收银员并发，按目标速率和操作比例调用收银台登录/购物车/挂单/优惠券接口，输出吞吐量与延迟百分位
+
+用法：
+    POS_TRAFFIC_MODE=replay python -m util.load_generator                  # 对本地替身压测
+    POS_STAGING_URL=https://staging.xxx python -m util.load_generator     # 对预发环境压测
+    python -m util.load_generator --cashiers 50 --rate 40 --duration 120  # 覆盖config/load_profile.yaml
+"""
+import argparse
+import json
+import random
+import socket
+import threading
+import time
+
+import requests
+import yaml
+
+from common.data_init import CashierDataInit, TEST_CONSTANTS
+from config.conf import cm
+from util.history_store import percentile
+from util.logger import logger_instance as logger
+
+# 支持的压测操作（config/load_profile.yaml的mix中使用）
+OPERATIONS = ("login", "cart", "stay_order", "coupon")
+
+
+def check_target():
+    """
+    压测目标检查：只允许本地替身回放或预发环境
+    :return: 压测目标地址
+    :raise: ValueError - 目标为线上环境（含record模式：替身会转发到线上）
+    """
+    if cm.POS_TRAFFIC_MODE == "record":
+        raise ValueError("record模式下本地替身会转发到线上，禁止压测；请使用POS_TRAFFIC_MODE=replay或配置POS_STAGING_URL")
+    if cm.POS_TRAFFIC_MODE == "live" and not cm.POS_STAGING_URL:
+        raise ValueError(f"禁止对线上环境压测（{cm.POS_ORIGIN}）；请使用POS_TRAFFIC_MODE=replay或配置POS_STAGING_URL")
+    return cm.POS_BASE_URL
+
+
+class VirtualCashier:
+    """虚拟收银员：独立会话，复用CashierDataInit的收银台登录与接口地址"""
+
+    def __init__(self, index: int):
+        self.index = index
+        self.data_init = CashierDataInit()
+        self.cart_no = None  # 最近一次查询到的挂单cart_no（删除购物车时使用）
+
+    def _post(self, url: str, **kwargs):
+        if not self.data_init.cashier_headers:
+            self.login()
+        resp = self.data_init.session.post(url, headers=self.data_init.cashier_headers,
+                                           timeout=self.data_init.request_timeout, **kwargs)
+        resp.raise_for_status()
+        return resp
+
+    def login(self):
+        """重新登录（新会话）"""
+        self.data_init.session = requests.Session()
+        self.data_init.cashier_headers = None
+        self.data_init.login_cashier_backend()
+
+    def cart(self):
+        self._post(TEST_CONSTANTS["DEL_STAY_ORDER_URL"], json={"cart_no": self.cart_no or ""})
+        self.cart_no = None
+
+    def stay_order(self):
+        product_list = (self._post(TEST_CONSTANTS["GET_STAY_ORDER_URL"]).json().get("data") or {}).get("productList") or []
+        self.cart_no = product_list[0].get("cart_no") if product_list else None
+
+    def coupon(self):
+        self._post(TEST_CONSTANTS["CASHIER_COUPON_URL"])
+
+
+class LoadGenerator:
+    """
+    开环压测：第i个请求的计划发出时间为 开始时间 + i/rate，空闲的虚拟收银员领取下一个计划请求；
+    延迟从计划发出时间算起（收银员全忙导致的排队计入延迟，避免高估系统能力），同时记录服务耗时
+    """
+
+    def __init__(self, cashiers: int, rate: float, duration: float, mix: dict):
+        unknown = set(mix) - set(OPERATIONS)
+        if unknown:
+            raise ValueError(f"不支持的压测操作：{', '.join(sorted(unknown))}（可选：{', '.join(OPERATIONS)}）")
+        if cashiers <= 0 or rate <= 0 or duration <= 0:
+            raise ValueError(f"cashiers/rate/duration必须大于0：{cashiers}/{rate}/{duration}")
+        self.cashiers = cashiers
+        self.rate = rate
+        self.duration = duration
+        self.operations = [op for op, weight in mix.items() if weight > 0]
+        self.weights = [mix[op] for op in self.operations]
+        self.samples = []  # (操作, 计划发出时间, 开始时间, 结束时间, 报错)
+        self._next = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_profile(cls, profile_file: str = None, **overrides):
+        with open(profile_file or cm.LOAD_PROFILE_FILE, "r", encoding="utf-8") as f:
+            profile = yaml.safe_load(f) or {}
+        profile.update({k: v for k, v in overrides.items() if v is not None})
+        return cls(int(profile["cashiers"]), float(profile["rate"]), float(profile["duration"]), profile["mix"])
+
+    def _worker(self, cashier: VirtualCashier, start: float):
+        end = start + self.duration
+        rng = random.Random(cashier.index)
+        while True:
+            with self._lock:
+                scheduled = start + self._next / self.rate
+                self._next += 1
+            if scheduled >= end:
+                return
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            operation = rng.choices(self.operations, self.weights)[0]
+            begin = time.perf_counter()
+            error = None
+            try:
+                getattr(cashier, operation)()
+            except Exception as e:
+                error = type(e).__name__ if not str(e) else str(e)[:120]
+            self.samples.append((operation, scheduled, begin, time.perf_counter(), error))
+
+    def run(self):
+        target = check_target()
+        stand_in = self._ensure_stand_in()
+        logger.log("INFO", f"📢 开始压测：{target}，{self.cashiers}个虚拟收银员，目标{self.rate:g}次/秒，持续{self.duration:g}s")
+        cashiers = [VirtualCashier(i) for i in range(self.cashiers)]
+        for cashier in cashiers:
+            cashier.login()  # 预热登录不计入结果
+        start = time.perf_counter()
+        threads = [threading.Thread(target=self._worker, args=(c, start), name=f"cashier-{c.index}", daemon=True)
+                   for c in cashiers]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        if stand_in:
+            stand_in.stop()
+        report = self.summarize(elapsed, target)
+        with open(cm.LOAD_REPORT_FILE, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        logger.log("INFO", f"🎉 压测完成，结果已写入{cm.LOAD_REPORT_FILE}\n{format_load_report(report)}")
+        return report
+
+    @staticmethod
+    def _ensure_stand_in():
+        """
+        回放模式下本地替身未单独启动时，在本进程内启动（与压测线程争用GIL，延迟会偏高）
+        :return: 本进程启动的替身（压测结束后停止），否则为None
+        """
+        if cm.POS_TRAFFIC_MODE != "replay":
+            return None
+        with socket.socket() as sock:
+            if sock.connect_ex(("127.0.0.1", cm.REPLAY_PORT)) == 0:
+                return None
+        from util.pos_replay import pos_stand_in
+        logger.log("WARNING", "本地替身未启动，改为在压测进程内启动（建议另开进程：python -m util.pos_replay）")
+        pos_stand_in.start()
+        return pos_stand_in
+
+    def summarize(self, elapsed: float, target: str):
+        """按操作汇总：次数、失败数、吞吐量、延迟（含排队）与服务耗时的p50/p90/p99/最大值（毫秒）"""
+        def stats(samples):
+            latency = [(end - scheduled) * 1000 for _, scheduled, _, end, _ in samples]
+            service = [(end - begin) * 1000 for _, _, begin, end, _ in samples]
+            errors = {}
+            for sample in samples:
+                if sample[4]:
+                    errors[sample[4]] = errors.get(sample[4], 0) + 1
+            return {
+                "count": len(samples),
+                "failed": sum(errors.values()),
+                "throughput": round(len(samples) / elapsed, 2),
+                "latency_ms": {f"p{p}": round(percentile(latency, p), 1) for p in (50, 90, 99)} | {"max": round(max(latency), 1)},
+                "service_ms": {f"p{p}": round(percentile(service, p), 1) for p in (50, 90, 99)} | {"max": round(max(service), 1)},
+                "errors": errors,
+            }
+
+        by_operation = {}
+        for sample in self.samples:
+            by_operation.setdefault(sample[0], []).append(sample)
+        return {
+            "target": target,
+            "cashiers": self.cashiers,
+            "target_rate": self.rate,
+            "duration": round(elapsed, 1),
+            "total": stats(self.samples) if self.samples else None,
+            "operations": {op: stats(samples) for op, samples in sorted(by_operation.items())},
+        }
+
+
+def format_load_report(report: dict):
+    """压测结果文本（总体及各操作：吞吐量、失败数、延迟百分位）"""
+    if not report["total"]:
+        return "未发出任何请求"
+
+    def line(name, s):
+        latency = s["latency_ms"]
+        return (f"{name:<12}{s['count']:>7}次 失败{s['failed']:>5}  {s['throughput']:>7g}次/秒  "
+                f"延迟p50/p90/p99/max {latency['p50']:g}/{latency['p90']:g}/{latency['p99']:g}/{latency['max']:g}ms  "
+                f"服务耗时p99 {s['service_ms']['p99']:g}ms")
+
+    lines = [f"压测目标：{report['target']}，{report['cashiers']}个虚拟收银员，"
+             f"目标{report['target_rate']:g}次/秒，实际{report['total']['throughput']:g}次/秒（{report['duration']:g}s）",
+             line("总计", report["total"])]
+    lines += [line(op, s) for op, s in report["operations"].items()]
+    return "\n".join(lines)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="收银台接口高峰压测（仅限本地替身/预发环境）")
+    parser.add_argument("--profile", help="压测配置文件（默认config/load_profile.yaml）")
+    parser.add_argument("--cashiers", type=int, help="并发虚拟收银员数")
+    parser.add_argument("--rate", type=float, help="目标总请求速率（次/秒）")
+    parser.add_argument("--duration", type=float, help="持续时间（秒）")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    try:
+        LoadGenerator.from_profile(args.profile, cashiers=args.cashiers, rate=args.rate, duration=args.duration).run()
+    except Exception as e:
+        logger.log("ERROR", f"❌ 压测失败：{str(e)}")
+        raise SystemExit(1)
@@ -1,6 +1,7 @@
 import inspect
 from loguru import logger
 from config.conf import cm
+from util.tracer import tracer
 
 
 class Logger:
@@ -23,6 +24,8 @@ class Logger:
             level.upper(),
             message  # 这里只传消息，没有其他参数！
         )
+        # 3. 开启链路追踪时，日志同时记为时间线上的瞬时事件（与所在用例/步骤/HTTP区间对齐）
+        tracer.instant(str(message)[:80], "log", level=level.upper(), message=str(message))
 
 
 def custom_formatter(record):
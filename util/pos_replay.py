@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+@Author: XieLong
+@Date: 2026/10/19
+@File: pos_replay.py
+@Description: pos.amfuture.sg 本地替身：record模式转发到线上并录制全部HTTP交互（数据初始化接口+浏览器），replay模式按录制归档在本机回放（可配置延迟）
+"""
+import base64
+import gzip
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from http.cookiejar import DefaultCookiePolicy
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+import requests
+
+from config.conf import cm
+from util.logger import logger_instance as logger
+
+# 不转发/不录制的逐跳响应头（长度和编码由替身重新计算）
+HOP_HEADERS = {"connection", "keep-alive", "transfer-encoding", "content-encoding", "content-length",
+               "proxy-authenticate", "proxy-authorization", "te", "trailer", "upgrade"}
+# 需要把线上域名替换为替身地址的文本类型
+TEXT_TYPES = ("text/", "application/json", "application/javascript", "application/x-javascript", "application/xml")
+# Set-Cookie中绑定线上域名/HTTPS的属性（替身为http://127.0.0.1，需去掉才能写入）
+COOKIE_ATTRS = re.compile(r";\s*(domain=[^;]*|secure|samesite=none)(?=;|$)", re.IGNORECASE)
+
+
+def body_digest(body: bytes):
+    return hashlib.sha1(body or b"").hexdigest()
+
+
+class TrafficArchive:
+    """
+    录制归档（gzip压缩的JSON Lines）：
+    - {"type": "body", "sha1": ..., "data": base64} 响应体按内容去重，只存一份
+    - {"type": "exchange", "method", "path", "req_sha1", "status", "headers", "body_sha1", "elapsed"} 一次请求/响应
+
+    record模式在已有归档上增量录制：本次录到的请求（方法+路径+请求体）替换归档中的旧记录，其余旧记录保留
+    """
+
+    def __init__(self, archive_file: str):
+        self.archive_file = archive_file
+        self.bodies = {}
+        self.exchanges = []
+        self.recorded = []  # 本次录制的请求/响应（保存时合并进已有记录）
+        self._lock = threading.Lock()
+        self._cursor = {}  # 回放时同一请求按录制顺序依次返回
+
+    def load(self):
+        with gzip.open(self.archive_file, "rt", encoding="utf-8") as f:
+            for line in f:
+                record = json.loads(line)
+                if record["type"] == "body":
+                    self.bodies[record["sha1"]] = base64.b64decode(record["data"])
+                else:
+                    self.exchanges.append(record)
+        self._index()
+        logger.log("INFO", f"✅ 已加载录制归档：{len(self.exchanges)}次请求，{len(self.bodies)}个响应体（{self.archive_file}）")
+        return self
+
+    def _index(self):
+        """三级匹配索引：方法+路径+请求体 → 方法+路径 → 方法+去掉查询串的路径"""
+        self.index = {}
+        for exchange in self.exchanges:
+            method, path = exchange["method"], exchange["path"]
+            for key in ((method, path, exchange["req_sha1"]), (method, path), (method, urlsplit(path).path)):
+                self.index.setdefault(key, []).append(exchange)
+
+    def add(self, method: str, path: str, request_body: bytes, status: int, headers: list, body: bytes, elapsed: float):
+        with self._lock:
+            body_sha1 = body_digest(body)
+            self.bodies.setdefault(body_sha1, body)
+            self.recorded.append({
+                "type": "exchange", "method": method, "path": path, "req_sha1": body_digest(request_body),
+                "status": status, "headers": headers, "body_sha1": body_sha1, "elapsed": round(elapsed, 3)
+            })
+
+    def match(self, method: str, path: str, request_body: bytes):
+        for key in ((method, path, body_digest(request_body)), (method, path), (method, urlsplit(path).path)):
+            candidates = self.index.get(key)
+            if candidates:
+                with self._lock:
+                    position = self._cursor.get(key, 0)
+                    self._cursor[key] = position + 1
+                return candidates[min(position, len(candidates) - 1)]
+        return None
+
+    @staticmethod
+    def _request_key(exchange: dict):
+        return exchange["method"], exchange["path"], exchange["req_sha1"]
+
+    def merge(self):
+        """本次录制合并进已有记录：重新录到的请求去掉旧记录，不再被引用的响应体一并清理；返回(新增/更新, 保留)次数"""
+        with self._lock:
+            recorded_keys = {self._request_key(exchange) for exchange in self.recorded}
+            kept = [exchange for exchange in self.exchanges if self._request_key(exchange) not in recorded_keys]
+            self.exchanges, recorded, self.recorded = kept + self.recorded, len(self.recorded), []
+            referenced = {exchange["body_sha1"] for exchange in self.exchanges}
+            self.bodies = {sha1: data for sha1, data in self.bodies.items() if sha1 in referenced}
+        self._index()
+        return recorded, len(kept)
+
+    def save(self):
+        """合并本次录制后写入归档（先写临时文件再替换，录制中断时不破坏已有归档）"""
+        recorded, kept = self.merge()
+        os.makedirs(os.path.dirname(self.archive_file), exist_ok=True)
+        tmp_file = self.archive_file + ".tmp"
+        with self._lock, gzip.open(tmp_file, "wt", encoding="utf-8") as f:
+            for sha1, data in self.bodies.items():
+                f.write(json.dumps({"type": "body", "sha1": sha1, "data": base64.b64encode(data).decode("ascii")}) + "\n")
+            for exchange in self.exchanges:
+                f.write(json.dumps(exchange, ensure_ascii=False) + "\n")
+        os.replace(tmp_file, self.archive_file)
+        logger.log("INFO", f"✅ 录制归档已保存：本次录制{recorded}次请求，保留原有{kept}次，"
+                           f"共{len(self.exchanges)}次请求，{len(self.bodies)}个响应体（{self.archive_file}）")
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """替身请求处理：record转发+录制，replay按归档回放"""
+    protocol_version = "HTTP/1.1"
+    stand_in = None  # 由PosStandIn注入
+
+    def log_message(self, format, *args):
+        pass  # 请求日志量大，不写入测试日志
+
+    def _handle(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        request_body = self.rfile.read(length) if length else b""
+        if self.stand_in.mode == "record":
+            status, headers, body = self.stand_in.forward(self.command, self.path, self.headers, request_body)
+        else:
+            status, headers, body = self.stand_in.replay(self.command, self.path, request_body)
+        body = self.stand_in.localize(headers, body)
+        self.send_response(status)
+        for name, value in headers:
+            if name.lower() == "set-cookie":
+                value = COOKIE_ATTRS.sub("", value)
+            elif name.lower() == "location":
+                value = value.replace(cm.POS_ORIGIN, cm.POS_BASE_URL)
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    do_GET = do_POST = do_PUT = do_DELETE = do_PATCH = do_HEAD = do_OPTIONS = _handle
+
+
+class PosStandIn:
+    """pos.amfuture.sg 本地替身（单例），地址为 cm.POS_BASE_URL"""
+    _instance = None
+
+    def __new__(cls, *args, **kwargs):
+        if not cls._instance:
+            cls._instance = super(PosStandIn, cls).__new__(cls)
+            cls._instance.server = None
+            cls._instance.archive = None
+        return cls._instance
+
+    @property
+    def mode(self):
+        return cm.POS_TRAFFIC_MODE
+
+    @property
+    def running(self):
+        return self.server is not None
+
+    def start(self):
+        """启动替身（已启动时直接返回；常驻进程内多次运行共用一个替身）"""
+        if self.running:
+            return
+        if self.mode not in ("record", "replay"):
+            raise ValueError(f"POS_TRAFFIC_MODE={self.mode} 不需要本地替身（仅record/replay模式）")
+        self.archive = TrafficArchive(cm.TRAFFIC_ARCHIVE_FILE)
+        if self.mode == "replay":
+            if not os.path.exists(cm.TRAFFIC_ARCHIVE_FILE):
+                raise FileNotFoundError(f"回放模式缺少录制归档：{cm.TRAFFIC_ARCHIVE_FILE}，请先以POS_TRAFFIC_MODE=record运行一次")
+            self.archive.load()
+        else:
+            if os.path.exists(cm.TRAFFIC_ARCHIVE_FILE):
+                self.archive.load()  # 增量录制：只跑部分用例时不丢失其余用例的录制
+            # 转发会话不保存cookie：浏览器与数据初始化各自的登录态由请求头原样带到线上
+            self.upstream = requests.Session()
+            self.upstream.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        handler = type("BoundStandInHandler", (StandInHandler,), {"stand_in": self})
+        self.server = ThreadingHTTPServer(("127.0.0.1", cm.REPLAY_PORT), handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, name="pos-stand-in", daemon=True).start()
+        logger.log("INFO", f"✅ POS本地替身已启动（{self.mode}模式）：{cm.POS_BASE_URL} → {cm.POS_ORIGIN}")
+
+    def stop(self):
+        """停止替身；record模式下保存归档"""
+        if not self.running:
+            return
+        self.server.shutdown()
+        self.server.server_close()
+        self.server = None
+        if self.mode == "record":
+            self.archive.save()
+
+    def forward(self, method: str, path: str, headers, request_body: bytes):
+        """record模式：转发到线上（请求中的替身地址还原为线上域名）并录制"""
+        upstream_headers = {k: v.replace(cm.POS_BASE_URL, cm.POS_ORIGIN) for k, v in headers.items()
+                            if k.lower() not in HOP_HEADERS and k.lower() not in ("host", "accept-encoding")}
+        start = time.perf_counter()
+        try:
+            resp = self.upstream.request(method, cm.POS_ORIGIN + path, headers=upstream_headers, data=request_body,
+                                         allow_redirects=False, timeout=60)
+        except requests.exceptions.RequestException as e:
+            logger.log("ERROR", f"❌ 替身转发失败（{method} {path}）：{str(e)}")
+            return 502, [("Content-Type", "text/plain; charset=utf-8")], f"upstream error: {e}".encode("utf-8")
+        elapsed = time.perf_counter() - start
+        response_headers = [(k, v) for k, v in resp.raw.headers.items() if k.lower() not in HOP_HEADERS]
+        self.archive.add(method, path, request_body, resp.status_code, response_headers, resp.content, elapsed)
+        return resp.status_code, response_headers, resp.content
+
+    def replay(self, method: str, path: str, request_body: bytes):
+        """replay模式：按归档返回，并按REPLAY_LATENCY_MS模拟延迟（recorded表示按录制时的实际耗时）"""
+        exchange = self.archive.match(method, path, request_body)
+        if exchange is None:
+            logger.log("WARNING", f"录制归档中无匹配请求：{method} {path}")
+            return 404, [("Content-Type", "text/plain; charset=utf-8")], f"not recorded: {method} {path}".encode("utf-8")
+        if cm.REPLAY_LATENCY_MS == "recorded":
+            time.sleep(exchange["elapsed"])
+        elif float(cm.REPLAY_LATENCY_MS) > 0:
+            time.sleep(float(cm.REPLAY_LATENCY_MS) / 1000)
+        return exchange["status"], [tuple(h) for h in exchange["headers"]], self.archive.bodies[exchange["body_sha1"]]
+
+    def localize(self, headers: list, body: bytes):
+        """文本响应中的线上域名替换为替身地址（前端代码/接口里的绝对地址也走替身）"""
+        content_type = next((v for k, v in headers if k.lower() == "content-type"), "")
+        if not body or not content_type.startswith(TEXT_TYPES):
+            return body
+        origin, local = cm.POS_ORIGIN.encode(), cm.POS_BASE_URL.encode()
+        return body.replace(origin, local).replace(origin.replace(b"/", b"\\/"), local.replace(b"/", b"\\/"))
+
+
+# 全局唯一本地替身
+pos_stand_in = PosStandIn()
+
+
+# 作为pytest插件加载（conftest.pytest_plugins）：record/replay模式下会话开始前启动替身，结束时停止（record保存归档）；
+# xdist下只由主控进程启动，worker共用同一替身（各自启动会争用同一端口，record时各自保存还会互相覆盖归档）
+def pytest_configure(config):
+    if os.getenv("PYTEST_XDIST_WORKER"):
+        return
+    if cm.POS_TRAFFIC_MODE in ("record", "replay") and not config.option.collectonly:
+        pos_stand_in.start()
+
+
+def pytest_unconfigure(config):
+    pos_stand_in.stop()
+
+
+if __name__ == "__main__":
+    # 单独启动替身（如压测/基准测试时常驻），Ctrl+C停止
+    pos_stand_in.start()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pos_stand_in.stop()
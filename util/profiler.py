@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+@Author: XieLong
+@Date: 2026/10/19
+@File: profiler.py
+@Description: 采样分析（--profile）：后台线程定时采样pytest主线程调用栈，按用例/阶段输出火焰图folded文件，并区分Python CPU耗时与等待浏览器/HTTP的耗时
+
+输出目录 logs/profile/<运行ID>/：
+    <用例>.folded     单条用例（setup/call/teardown）的折叠调用栈，可直接用flamegraph.pl或speedscope打开
+    _session.folded   用例之外的耗时（收集、插件初始化、会话结束处理）
+    merged.folded     全部合并
+    summary.json      各用例CPU/等待耗时拆分
+"""
+import json
+import os
+import re
+import sys
+import threading
+import time
+
+import pytest
+
+from config.conf import cm
+from util.history_store import history_store, case_id_of
+from util.logger import logger_instance as logger
+
+# 等待类别：调用栈中出现对应模块即归入该类（按顺序匹配）
+WAIT_CATEGORIES = (
+    ("browser", ("DrissionPage", "websocket")),
+    ("http", ("requests", "urllib3", "http" + os.sep + "client")),
+)
+SESSION_LABEL = "_session"
+
+
+def frame_name(code):
+    """调用栈帧名：模块文件名:函数限定名（包的__init__取包名；folded格式中不能出现分号）"""
+    module = os.path.splitext(os.path.basename(code.co_filename))[0]
+    if module == "__init__":
+        module = os.path.basename(os.path.dirname(code.co_filename))
+    return f"{module}:{getattr(code, 'co_qualname', code.co_name)}".replace(";", ",")
+
+
+def wait_category(filenames):
+    for category, markers in WAIT_CATEGORIES:
+        if any(marker in name for name in filenames for marker in markers):
+            return category
+    return "other"
+
+
+class SamplingProfiler:
+    """
+    采样分析器：每interval秒读取一次目标线程的调用栈；
+    按两次采样间目标线程的CPU时间增量判断该段时间在执行Python（cpu）还是在等待（wait:browser/http/other）
+    """
+
+    def __init__(self, interval: float, thread_id: int = None):
+        self.interval = interval
+        self.thread_id = thread_id or threading.main_thread().ident
+        self.label = (SESSION_LABEL, "session")  # 当前归属：(用例, 阶段)
+        self.stacks = {}  # 用例 → {折叠调用栈: 采样次数}
+        self.seconds = {}  # 用例 → {cpu/wait:xxx: 秒}
+        self._stop = threading.Event()
+        self._thread = None
+        try:
+            self._clock = time.pthread_getcpuclockid(self.thread_id)
+        except (AttributeError, OSError):
+            self._clock = None  # 非Linux：无法读取线程CPU时间，按调用栈判断是否在等待浏览器/HTTP
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+
+    def _cpu_time(self):
+        return time.clock_gettime(self._clock) if self._clock is not None else None
+
+    def _run(self):
+        last_wall, last_cpu = time.perf_counter(), self._cpu_time()
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            wall, cpu = time.perf_counter(), self._cpu_time()
+            elapsed = wall - last_wall
+            if frame is None:
+                break
+            codes = []
+            while frame is not None:
+                codes.append(frame.f_code)
+                frame = frame.f_back
+            codes.reverse()
+            category = wait_category([code.co_filename for code in codes])
+            if cpu is not None:
+                on_cpu = cpu - last_cpu >= elapsed / 2
+            else:
+                on_cpu = category == "other"
+            kind = "cpu" if on_cpu else f"wait:{category}"
+            self._record(kind, codes, elapsed)
+            last_wall, last_cpu = wall, cpu
+
+    def _record(self, kind: str, codes, elapsed: float):
+        case, phase = self.label
+        stack = ";".join([f"[{kind}]", f"[{phase}]"] + [frame_name(code) for code in codes])
+        stacks = self.stacks.setdefault(case, {})
+        stacks[stack] = stacks.get(stack, 0) + 1
+        seconds = self.seconds.setdefault(case, {})
+        seconds[kind] = seconds.get(kind, 0.0) + elapsed
+
+    def write(self, output_dir: str):
+        """写入各用例及合并的folded文件、耗时拆分汇总"""
+        os.makedirs(output_dir, exist_ok=True)
+        merged = {}
+        for case, stacks in self.stacks.items():
+            with open(os.path.join(output_dir, re.sub(r"[^\w.=\-\[\]]+", "_", case) + ".folded"), "w",
+                      encoding="utf-8") as f:
+                f.writelines(f"{stack} {count}\n" for stack, count in stacks.items())
+            for stack, count in stacks.items():
+                merged[stack] = merged.get(stack, 0) + count
+        with open(os.path.join(output_dir, "merged.folded"), "w", encoding="utf-8") as f:
+            f.writelines(f"{stack} {count}\n" for stack, count in sorted(merged.items()))
+        summary = {case: {kind: round(s, 3) for kind, s in sorted(kinds.items())} for case, kinds in self.seconds.items()}
+        with open(os.path.join(output_dir, "summary.json"), "w", encoding="utf-8") as f:
+            json.dump({"interval_ms": self.interval * 1000, "cases": summary}, f, ensure_ascii=False, indent=2)
+        return summary
+
+
+class CaseProfiler:
+    """采样分析插件：按当前执行的用例与阶段切换采样归属"""
+
+    def __init__(self):
+        self.profiler = SamplingProfiler(cm.PROFILE_INTERVAL_MS / 1000)
+        self.output_dir = os.path.join(cm.LOG_PATH, "profile", history_store.run_id)
+        self.profiler.start()
+
+    def _phase(self, case: str, phase: str):
+        self.profiler.label = (case, phase)
+        yield
+        self.profiler.label = (SESSION_LABEL, "session")
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_collection(self, session):
+        yield from self._phase(SESSION_LABEL, "collect")
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_setup(self, item):
+        yield from self._phase(case_id_of(item), "setup")
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_call(self, item):
+        yield from self._phase(case_id_of(item), "call")
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_teardown(self, item):
+        yield from self._phase(case_id_of(item), "teardown")
+
+    def pytest_terminal_summary(self, terminalreporter):
+        self.profiler.stop()
+        summary = self.profiler.write(self.output_dir)
+        totals = {}
+        for kinds in summary.values():
+            for kind, seconds in kinds.items():
+                totals[kind] = totals.get(kind, 0.0) + seconds
+        split = "，".join(f"{kind} {seconds:.1f}s" for kind, seconds in sorted(totals.items()))
+        terminalreporter.write_sep("-", f"采样分析：{split}（{self.output_dir}）")
+        logger.log("INFO", f"📈 采样分析已写入{self.output_dir}：{split}")
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("profiler", "采样分析")
+    group.addoption("--profile", action="store_true", default=False,
+                    help="采样分析pytest会话：按用例输出火焰图folded文件（logs/profile/运行ID），区分CPU与等待浏览器/HTTP耗时")
+
+
+def pytest_configure(config):
+    if config.getoption("profile") and not config.option.collectonly:
+        config.pluginmanager.register(CaseProfiler(), "case_profiler")
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+@Author: XieLong
+@Date: 2026/10/19
+@File: result_collector.py
+@Description: pytest结果收集插件：进程内执行时直接把结构化结果交给run.py；子进程执行时（-p util.result_collector）写入json/report.json
+"""
+
+import json
+
+import pytest
+
+from config.conf import cm
+from util.logger import logger_instance as logger
+
+
+class ResultCollector:
+    """收集每条用例的执行结果（结构与json/report.json一致：{"report": {"tests": [...]}}）"""
+
+    def __init__(self, report_path: str = None):
+        self.report_path = report_path  # 指定时在会话结束后写入文件
+        self.tests = []
+        self.exit_code = None
+
+    @pytest.hookimpl(trylast=True)
+    def pytest_runtest_logreport(self, report):
+        # 只收集用例主体结果；前置失败/跳过也计入，避免用例“消失”
+        if report.when != "call" and report.outcome == "passed":
+            return
+        if report.when == "teardown" and report.outcome != "failed":
+            return
+        self.tests.append({
+            "name": report.nodeid,
+            "outcome": report.outcome,
+            "when": report.when,
+            "duration": round(report.duration, 3),
+            "user_properties": [list(p) for p in report.user_properties],
+            "call": {"stdout": report.longreprtext if report.failed else report.capstdout},
+            # 跳过原因（如选择执行时的“reused result”）
+            "reason": report.longrepr[2] if report.skipped and isinstance(report.longrepr, tuple) else ""
+        })
+
+    def pytest_sessionfinish(self, session, exitstatus):
+        self.exit_code = int(exitstatus)
+        if not self.report_path:
+            return
+        try:
+            with open(self.report_path, "w", encoding="utf-8") as f:
+                json.dump(self.results, f, ensure_ascii=False, indent=2)
+            logger.log("INFO", f"✅ 测试结果已写入: {self.report_path}")
+        except OSError as e:
+            logger.log("ERROR", f"❌ 写入测试结果失败: {e}")
+
+    @property
+    def results(self):
+        outcomes = [t["outcome"] for t in self.tests]
+        return {
+            "report": {
+                "summary": {k: outcomes.count(k) for k in ("passed", "failed", "skipped")},
+                "tests": self.tests
+            }
+        }
+
+
+def run_in_process(args):
+    """
+    进程内执行pytest（不再二次启动解释器，已导入的模块可直接复用）；
+    每次执行时pytest会重新导入conftest，需要跨运行保持的状态放在模块级单例中
+    （common.data_init.data_init的会话与登录态、page_case.browser_pool的常驻浏览器等）
+    :return: (退出码, 结构化结果)
+    """
+    collector = ResultCollector()
+    exit_code = pytest.main(list(args), plugins=[collector])
+    return int(exit_code), collector.results
+
+
+# 通过 `pytest -p util.result_collector` 加载时，自动注册并写入json/report.json
+def pytest_configure(config):
+    if not config.pluginmanager.has_plugin("result_collector"):
+        config.pluginmanager.register(ResultCollector(cm.json_file("report.json")), "result_collector")
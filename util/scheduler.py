@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+@Author: XieLong
+@Date: 2026/10/19
+@File: scheduler.py
+@Description: 高峰/闲时调度守护进程：按标记的时段和间隔常驻执行，重叠运行排队或跳过，超时自动降频，状态写入本地文件
+"""
+
+import datetime
+import json
+import os
+import queue
+import signal
+import threading
+import time
+
+import yaml
+
+from config.conf import cm
+from util.logger import logger_instance as logger
+
+# 运行耗时超过间隔时，下次间隔 = 耗时 × THROTTLE_FACTOR（最多放大到配置间隔的 MAX_THROTTLE 倍）
+THROTTLE_FACTOR = 1.5
+MAX_THROTTLE = 6
+
+
+def parse_window(text: str):
+    """解析时段 "HH:MM-HH:MM" 为 (开始time, 结束time)"""
+    start, end = [datetime.datetime.strptime(t.strip(), "%H:%M").time() for t in text.split("-")]
+    return start, end
+
+
+class MarkSchedule:
+    """单个用例标记（main/other）的调度状态"""
+
+    def __init__(self, mark: str, windows, interval_minutes: float):
+        self.mark = mark
+        self.windows = [parse_window(w) for w in windows]
+        self.interval = interval_minutes * 60
+        self.effective_interval = self.interval
+        self.next_due = 0.0
+        self.last_start = None
+        self.last_duration = None
+        self.last_result = None
+        self.runs = 0
+        self.skipped = 0
+
+    def in_window(self, now: datetime.datetime):
+        t = now.time()
+        for start, end in self.windows:
+            # 支持跨零点时段（如 22:00-02:00）
+            if (start <= t < end) if start <= end else (t >= start or t < end):
+                return True
+        return False
+
+    def throttle(self, duration: float):
+        """根据本次耗时调整间隔：超过间隔则放慢，否则逐步恢复到配置间隔"""
+        if duration > self.effective_interval:
+            self.effective_interval = min(duration * THROTTLE_FACTOR, self.interval * MAX_THROTTLE)
+            logger.log("WARNING", f"⏱️ [{self.mark}] 运行耗时{duration:.0f}s超过间隔，"
+                                  f"调整为每{self.effective_interval:.0f}s执行一次")
+        elif self.effective_interval > self.interval:
+            self.effective_interval = max(self.interval, self.effective_interval / 2)
+
+    def to_dict(self, now: datetime.datetime):
+        fmt = lambda ts: datetime.datetime.fromtimestamp(ts).strftime("%Y-%m-%d %H:%M:%S") if ts else None
+        return {
+            "in_window": self.in_window(now),
+            "interval_seconds": self.interval,
+            "effective_interval_seconds": round(self.effective_interval, 1),
+            "next_due": fmt(self.next_due),
+            "last_start": fmt(self.last_start),
+            "last_duration": self.last_duration,
+            "last_result": self.last_result,
+            "runs": self.runs,
+            "skipped": self.skipped
+        }
+
+
+class Scheduler:
+    """
+    调度守护进程：主线程串行执行到期的运行（共享常驻浏览器/后台会话），后台线程按时段判断到期
+    :param run_callback: 执行一次运行的回调 run_callback(case_mark) -> 结果摘要（可JSON序列化）
+    """
+
+    def __init__(self, run_callback, config_path: str = None, status_path: str = None):
+        self.run_callback = run_callback
+        self.config_path = config_path or cm.SCHEDULE_FILE
+        self.status_path = status_path or cm.SCHEDULE_STATUS_FILE
+        self.schedules = {}
+        self.max_queue = 1
+        self.tick_seconds = 5
+        self.pending = queue.Queue()
+        self.queued = []  # 排队中的标记（用于状态展示与去重）
+        self.running = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def load_config(self):
+        with open(self.config_path, "r", encoding="utf-8") as f:
+            config = yaml.safe_load(f) or {}
+        self.max_queue = int(config.get("max_queue", 1))
+        self.tick_seconds = float(config.get("tick_seconds", 5))
+        for mark in (cm.MAIN_CASE_MARK, cm.OTHER_CASE_MARK):
+            if mark in config:
+                item = config[mark]
+                self.schedules[mark] = MarkSchedule(mark, item.get("windows", []), float(item["interval_minutes"]))
+        if not self.schedules:
+            raise ValueError(f"调度配置中没有任何标记：{self.config_path}")
+        logger.log("INFO", f"✅ 已加载调度配置：{self.config_path}（{', '.join(self.schedules)}）")
+
+    # ---------------- 到期判断（后台线程） ----------------
+    def _tick(self):
+        now = datetime.datetime.now()
+        ts = time.time()
+        with self._lock:
+            for mark, schedule in self.schedules.items():
+                if not schedule.in_window(now) or ts < schedule.next_due:
+                    continue
+                schedule.next_due = ts + schedule.effective_interval
+                busy = self.running is not None or self.queued
+                if mark in self.queued or (busy and len(self.queued) >= self.max_queue):
+                    schedule.skipped += 1
+                    logger.log("WARNING", f"⏭️ [{mark}] 上一次运行未结束且队列已满，跳过本次运行")
+                    continue
+                self.queued.append(mark)
+                self.pending.put(mark)
+                logger.log("INFO", f"📥 [{mark}] 已加入执行队列（排队{len(self.queued)}个）")
+        self.write_status()
+
+    def _ticker(self):
+        while not self._stop.is_set():
+            try:
+                self._tick()
+            except Exception as e:
+                logger.log("ERROR", f"❌ 调度检查失败：{str(e)}")
+            self._stop.wait(self.tick_seconds)
+
+    # ---------------- 执行（主线程） ----------------
+    def _execute(self, mark: str):
+        schedule = self.schedules[mark]
+        with self._lock:
+            self.queued.remove(mark)
+            self.running = mark
+            schedule.last_start = time.time()
+        self.write_status()
+        result = None
+        try:
+            result = self.run_callback(mark)
+        except Exception as e:
+            result = f"error: {str(e)}"
+            logger.log("ERROR", f"❌ [{mark}] 调度运行失败：{str(e)}")
+        finally:
+            with self._lock:
+                duration = time.time() - schedule.last_start
+                schedule.last_duration = round(duration, 1)
+                schedule.last_result = result
+                schedule.runs += 1
+                schedule.throttle(duration)
+                schedule.next_due = max(schedule.next_due, schedule.last_start + schedule.effective_interval)
+                self.running = None
+            self.write_status()
+
+    def write_status(self):
+        """写入调度状态文件（原子替换，供外部查看）"""
+        now = datetime.datetime.now()
+        with self._lock:
+            status = {
+                "pid": os.getpid(),
+                "updated_at": now.strftime("%Y-%m-%d %H:%M:%S"),
+                "running": self.running,
+                "queued": list(self.queued),
+                "max_queue": self.max_queue,
+                "marks": {mark: s.to_dict(now) for mark, s in self.schedules.items()}
+            }
+        tmp_path = f"{self.status_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(status, f, ensure_ascii=False, indent=2, default=str)
+        os.replace(tmp_path, self.status_path)
+
+    def stop(self, *_):
+        logger.log("INFO", "收到停止信号，当前运行结束后退出调度")
+        self._stop.set()
+
+    def run_forever(self):
+        """启动调度（阻塞直到收到SIGINT/SIGTERM）"""
+        self.load_config()
+        signal.signal(signal.SIGINT, self.stop)
+        signal.signal(signal.SIGTERM, self.stop)
+        ticker = threading.Thread(target=self._ticker, name="scheduler-ticker", daemon=True)
+        ticker.start()
+        logger.log("INFO", f"🚀 调度守护进程已启动，状态文件：{self.status_path}")
+        while not self._stop.is_set():
+            try:
+                mark = self.pending.get(timeout=1)
+            except queue.Empty:
+                continue
+            self._execute(mark)
+        ticker.join(timeout=self.tick_seconds + 1)
+        self.write_status()
+        logger.log("INFO", "调度守护进程已退出")
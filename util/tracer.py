@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+@Author: XieLong
+@Date: 2026/10/19
+@File: tracer.py
+@Description: 轻量链路追踪：记录运行/用例/步骤/浏览器等待/后台HTTP请求的嵌套耗时区间，导出为Chrome trace-event JSON
+（chrome://tracing、Perfetto可直接打开）；日志同时记为时间线上的瞬时事件
+
+每个进程（主进程、xdist worker、分片）写入各自的分段文件 logs/trace/<运行ID>/<轨道名>.jsonl，
+运行结束时由主控进程合并为 logs/trace/<运行ID>.json，每个进程一条轨道（进程内按线程再分轨道）
+
+合并只读取本机 logs/trace/<运行ID>/ 下已有的分段文件。多机分片要得到完整时间线，各分片须使用相同的RUN_ID，
+并且共享日志目录（如挂载同一网络目录），或在全部分片结束后把各机的分段目录收集到一台机器上合并：
+    python -m util.tracer RUN_ID [其他机器的分段目录 ...]
+"""
+import argparse
+import json
+import os
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+
+from requests.adapters import HTTPAdapter
+
+from config.conf import cm
+
+
+def trace_dir(run_id: str):
+    """一次运行的分段文件目录"""
+    return os.path.join(cm.LOG_PATH, "trace", run_id)
+
+
+def now_us():
+    """时间戳（微秒，墙钟时间：多进程/多机分段合并后在同一时间轴上）"""
+    return time.time_ns() // 1000
+
+
+class Tracer:
+    """链路追踪（单例）：未启用时span/instant为空操作"""
+    _instance = None
+
+    def __new__(cls, *args, **kwargs):
+        if not cls._instance:
+            cls._instance = super(Tracer, cls).__new__(cls)
+            cls._instance.enabled = False
+            cls._instance.process_name = None
+            cls._instance._events = []
+            cls._instance._threads = set()  # 已登记名称的线程
+            cls._instance._lock = threading.Lock()
+        return cls._instance
+
+    def enable(self, process_name: str, sort_index: int = 0):
+        """开始记录；process_name为本进程在时间线上的轨道名（如 main、worker-gw0、shard-1）"""
+        self.enabled = True
+        self.process_name = process_name
+        self._events = []
+        self._threads = set()
+        self._metadata("process_name", {"name": process_name})
+        self._metadata("process_sort_index", {"sort_index": sort_index})
+
+    def disable(self):
+        self.enabled = False
+
+    def _metadata(self, name: str, args: dict, tid: int = 0):
+        self._events.append({"name": name, "ph": "M", "pid": os.getpid(), "tid": tid, "args": args})
+
+    def _emit(self, event: dict):
+        tid = threading.get_ident()
+        event.update(pid=os.getpid(), tid=tid)
+        with self._lock:
+            if tid not in self._threads:
+                self._threads.add(tid)
+                self._metadata("thread_name", {"name": threading.current_thread().name}, tid)
+            self._events.append(event)
+
+    @contextmanager
+    def span(self, name: str, cat: str, **args):
+        """
+        记录一个耗时区间（Chrome trace的X事件）；同一线程内时间上包含的区间在时间线上显示为嵌套
+        :return: 上下文内可继续补充的args字典（如结果、状态码）
+        """
+        if not self.enabled:
+            yield args
+            return
+        start = now_us()
+        try:
+            yield args
+        except BaseException as e:
+            args["error"] = f"{type(e).__name__}: {str(e)[:200]}"
+            raise
+        finally:
+            self._emit({"name": name, "cat": cat, "ph": "X", "ts": start, "dur": max(now_us() - start, 1),
+                        "args": {k: v for k, v in args.items() if v is not None}})
+
+    def complete(self, name: str, cat: str, start_us: int, **args):
+        """补记一个已结束的区间（开始时间由调用方记录，如整个pytest会话）"""
+        if self.enabled:
+            self._emit({"name": name, "cat": cat, "ph": "X", "ts": start_us, "dur": max(now_us() - start_us, 1),
+                        "args": args})
+
+    def instant(self, name: str, cat: str, **args):
+        """记录一个瞬时事件（如一条日志），显示在当前线程轨道上"""
+        if self.enabled:
+            self._emit({"name": name, "cat": cat, "ph": "i", "s": "t", "ts": now_us(), "args": args})
+
+    def flush(self, run_id: str):
+        """本进程的事件追加写入分段文件，返回文件路径"""
+        with self._lock:
+            events, self._events = self._events, []
+        part_dir = trace_dir(run_id)
+        os.makedirs(part_dir, exist_ok=True)
+        part_file = os.path.join(part_dir, f"{self.process_name or os.getpid()}.jsonl")
+        with open(part_file, "a", encoding="utf-8") as f:
+            f.writelines(json.dumps(event, ensure_ascii=False) + "\n" for event in events)
+        return part_file
+
+
+def merge_trace(run_id: str):
+    """
+    合并本机已有的分段文件为Chrome trace-event JSON（logs/trace/<运行ID>.json），分段文件保留；
+    多机分片不共享日志目录时，每台机器只合并出自己的轨道，完整时间线需先用gather_trace收集各机分段文件
+    :return: 合并后的文件路径与事件数，没有分段文件时返回(None, 0)
+    """
+    part_dir = trace_dir(run_id)
+    if not os.path.isdir(part_dir):
+        return None, 0
+    events = []
+    for name in sorted(os.listdir(part_dir)):
+        with open(os.path.join(part_dir, name), "r", encoding="utf-8") as f:
+            events.extend(json.loads(line) for line in f if line.strip())
+    trace_file = part_dir + ".json"
+    with open(trace_file, "w", encoding="utf-8") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms", "otherData": {"run_id": run_id}},
+                  f, ensure_ascii=False)
+    return trace_file, len(events)
+
+
+def gather_trace(run_id: str, source_dirs: list):
+    """
+    把其他机器的分段目录（已复制到本机）收集到本机的logs/trace/<运行ID>/，同名分段文件加来源序号避免覆盖
+    :return: 收集的分段文件数
+    """
+    part_dir = trace_dir(run_id)
+    os.makedirs(part_dir, exist_ok=True)
+    gathered = 0
+    for index, source_dir in enumerate(source_dirs, 1):
+        if os.path.abspath(source_dir) == os.path.abspath(part_dir):
+            continue
+        for name in sorted(os.listdir(source_dir)):
+            if not name.endswith(".jsonl"):
+                continue
+            target = os.path.join(part_dir, name)
+            if os.path.exists(target):
+                target = os.path.join(part_dir, f"{name[:-len('.jsonl')]}-{index}.jsonl")
+            shutil.copyfile(os.path.join(source_dir, name), target)
+            gathered += 1
+    return gathered
+
+
+class TracingAdapter(HTTPAdapter):
+    """requests适配器：每个请求记为一个http区间（方法+路径，附状态码）；不记录查询串（可能含token等参数）"""
+
+    def send(self, request, **kwargs):
+        if not tracer.enabled:
+            return super().send(request, **kwargs)
+        path = request.path_url.split("?", 1)[0]
+        with tracer.span(f"{request.method} {path}", "http") as args:
+            response = super().send(request, **kwargs)
+            args["status"] = response.status_code
+            return response
+
+
+def trace_session(session):
+    """为requests会话挂载追踪适配器（未启用追踪时与默认适配器行为一致）"""
+    adapter = TracingAdapter()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+# 全局唯一链路追踪
+tracer = Tracer()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="收集多机分片的分段文件并合并链路追踪时间线")
+    parser.add_argument("run_id", help="运行ID（各分片使用的RUN_ID）")
+    parser.add_argument("source_dirs", nargs="*", help="从其他机器复制来的分段目录（logs/trace/<运行ID>/）")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.source_dirs:
+        print(f"收集分段文件{gather_trace(args.run_id, args.source_dirs)}个")
+    trace_file, count = merge_trace(args.run_id)
+    print(f"链路追踪已写入{trace_file}（{count}个事件）" if trace_file else f"没有运行{args.run_id}的分段文件")